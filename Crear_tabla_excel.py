@@ -1,44 +1,224 @@
-from openpyxl import load_workbook
-from openpyxl.worksheet.table import Table, TableStyleInfo
+import argparse
+import os
+import posixpath
+import re
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
 
-# Ruta al archivo
-archivo = r"C:\One Drive Hotmail\OneDrive\Documentos\Python VSCode\REPORTE WEB\HEC mensuales 2025.xlsx"
+from openpyxl.utils import get_column_letter, range_boundaries
 
-# Abrir archivo
-wb = load_workbook(archivo)
-ws = wb["Pluviometria"]
+from manifiesto import NS_MAIN, TABLAS_EXCEL, construir_manifiesto, partes_hojas, ruta_rels
+from plantas import libros_registrados
 
-# Detectar hasta dónde llegan los datos reales desde la fila 128 en adelante
-fila_inicio = 128
-fila_actual = fila_inicio
+# === TABLAS DE EXCEL DE LOS LIBROS HEC ===
+# Define o actualiza las tablas de Excel de TABLAS_EXCEL (Precipitaciones, DatosHistoricos,
+# EstadoResultado) que los lectores usan como rango exacto de datos:
+#   1. una pasada read_only (construir_manifiesto) encuentra el encabezado y la última fila
+#      con datos de Pluviometria, Datos Historicos y Estado de Resultado;
+#   2. una sola escritura: el paquete .xlsx se copia parte por parte y solo se reescriben las
+#      tablas, los .rels de sus hojas, la lista <tableParts> de la hoja y [Content_Types].xml.
+# Los nombres de columna son el texto exacto de las celdas del encabezado (Excel repara el libro
+# si no coinciden); las celdas del encabezado que no son texto (números, fechas) se reescriben
+# como texto.
+# Sin cargar el libro completo con openpyxl, que además pierde gráficos e imágenes al guardar.
+# Uso:
+#   python Crear_tabla_excel.py                       (todos los libros de las centrales registradas)
+#   python Crear_tabla_excel.py "data/HEC mensuales 2025.xlsx" --salida /tmp/copia.xlsx
+NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_TIPOS = "http://schemas.openxmlformats.org/package/2006/content-types"
+TIPO_REL_TABLA = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/table"
+TIPO_CONTENIDO_TABLA = "application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"
+ESTILO_TABLA = "TableStyleMedium9"
 
-while ws[f"C{fila_actual}"].value and ws[f"D{fila_actual}"].value:
-    fila_actual += 1
 
-fila_final = fila_actual - 1  # Última fila con datos
+def _ref_rango(rango):
+    min_col, _, max_col, _ = range_boundaries(rango["columnas"])
+    return min_col, max_col
 
-# Definir rango de tabla
-celda_inicio = f"C{fila_inicio}"
-celda_fin = f"D{fila_final}"
-rango = f"{celda_inicio}:{celda_fin}"
 
-# Crear tabla
-tabla = Table(displayName="Precipitaciones", ref=rango)
+def _xml_tabla(id_tabla, nombre, ref, titulos):
+    columnas = "".join(f'<tableColumn id="{i}" name={quoteattr(t)}/>' for i, t in enumerate(titulos, start=1))
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<table xmlns="{NS_MAIN[1:-1]}" id="{id_tabla}" name={quoteattr(nombre)} displayName={quoteattr(nombre)} '
+        f'ref="{ref}" totalsRowShown="0"><autoFilter ref="{ref}"/>'
+        f'<tableColumns count="{len(titulos)}">{columnas}</tableColumns>'
+        f'<tableStyleInfo name="{ESTILO_TABLA}" showFirstColumn="0" showLastColumn="0" showRowStripes="1" showColumnStripes="0"/>'
+        "</table>"
+    ).encode("utf-8")
 
-# Estilo visual
-estilo = TableStyleInfo(
-    name="TableStyleMedium9",
-    showFirstColumn=False,
-    showLastColumn=False,
-    showRowStripes=True,
-    showColumnStripes=False,
-)
-tabla.tableStyleInfo = estilo
 
-# Agregar tabla
-ws.add_table(tabla)
+def _cambiar_ref(xml, ref):
+    # Solo el atributo ref de <table> y de <autoFilter>: el resto de la parte (extensiones,
+    # prefijos de espacios de nombres) queda byte a byte
+    xml = re.sub(rb'(<(?:\w+:)?table\b[^>]*?\sref=")[^"]*(")', rb"\g<1>" + ref.encode() + rb"\g<2>", xml, count=1)
+    return re.sub(rb'(<(?:\w+:)?autoFilter\b[^>]*?\sref=")[^"]*(")', rb"\g<1>" + ref.encode() + rb"\g<2>", xml, count=1)
 
-# Guardar
-wb.save(archivo)
 
-print(f"✅ Tabla 'Precipitaciones' creada desde {celda_inicio} hasta {celda_fin}.")
+def _celda_texto(xml_hoja, celda, texto):
+    # Reemplaza la celda (p. ej. "C196") por un texto en línea, conservando su estilo
+    m = re.search(rb'<((?:\w+:)?)c\b[^>]*?\sr="' + celda.encode() + rb'"[^>]*?(?:/>|>.*?</\1c>)', xml_hoja, re.S)
+    if m is None:
+        return xml_hoja
+    p = m.group(1)
+    estilo = re.search(rb'\ss="\d+"', m.group(0)[:m.group(0).index(b">")])
+    nueva = (b"<" + p + b'c r="' + celda.encode() + b'"' + (estilo.group(0) if estilo else b"") + b' t="inlineStr"><'
+             + p + b"is><" + p + b't xml:space="preserve">' + escape(texto).encode() + b"</" + p + b"t></" + p + b"is></" + p + b"c>")
+    return xml_hoja[:m.start()] + nueva + xml_hoja[m.end():]
+
+
+def _agregar_table_part(xml_hoja, id_rel):
+    parte = f'<tablePart xmlns:r="{NS_R}" r:id="{id_rel}"/>'.encode()
+    m = re.search(rb"<tableParts\b[^>]*?(/?)>", xml_hoja)
+    if m and m.group(1):
+        # <tableParts count="0"/> vacío
+        return xml_hoja[:m.start()] + b'<tableParts count="1">' + parte + b"</tableParts>" + xml_hoja[m.end():]
+    if m:
+        n = len(re.findall(rb"<tablePart\b", xml_hoja)) + 1
+        cierre = xml_hoja.index(b"</tableParts>")
+        apertura = re.sub(rb'count="\d+"', f'count="{n}"'.encode(), m.group(0))
+        return xml_hoja[:m.start()] + apertura + xml_hoja[m.end():cierre] + parte + xml_hoja[cierre:]
+    # Según el esquema, <tableParts> va al final, antes de <extLst> si lo hay
+    pos = xml_hoja.find(b"<extLst")
+    pos = xml_hoja.rindex(b"</worksheet>") if pos < 0 else pos
+    return xml_hoja[:pos] + b'<tableParts count="1">' + parte + b"</tableParts>" + xml_hoja[pos:]
+
+
+def _xml_rels(rels):
+    ET.register_namespace("", NS_PKG_REL)
+    return b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + ET.tostring(rels)
+
+
+def planificar_tablas(manifiesto):
+    # [(hoja, nombre, ref, True si la tabla ya existe, títulos, {celda: texto} del encabezado a
+    # reescribir)] y avisos de lo que se omite
+    plan, avisos = [], []
+    for hoja, nombre in TABLAS_EXCEL.items():
+        rango = manifiesto["rangos"].get(hoja)
+        if rango is None:
+            avisos.append(f"sin hoja '{hoja}'")
+            continue
+        if not rango["fin_datos"] or rango["fin_datos"] <= rango["encabezado"]:
+            avisos.append(f"'{hoja}' no tiene datos bajo la fila {rango['encabezado']}")
+            continue
+        min_col, max_col = _ref_rango(rango)
+        existente = manifiesto["hojas"][hoja]["tablas"].get(nombre)
+        if existente is not None:
+            # Se conservan las columnas de la tabla; solo cambia la última fila
+            min_col, _, max_col, _ = range_boundaries(existente["ref"])
+        fin = rango["fin_datos"] + (existente or {}).get("totales", 0)
+        ref = f"{get_column_letter(min_col)}{rango['encabezado']}:{get_column_letter(max_col)}{fin}"
+        otras = [t["ref"] for n, t in manifiesto["hojas"][hoja]["tablas"].items() if n != nombre]
+        if any(_se_cruzan(ref, otra) for otra in otras):
+            avisos.append(f"{nombre}: el rango {ref} se cruza con otra tabla de '{hoja}'")
+            continue
+        titulos = rango["titulos"]
+        # Excel no distingue mayúsculas en los nombres de columna
+        if existente is None and (any(t is None or not t.strip() for t in titulos)
+                                  or len({t.lower() for t in titulos}) != len(titulos)):
+            avisos.append(f"{nombre}: el encabezado de '{hoja}' (fila {rango['encabezado']}) tiene celdas vacías o repetidas")
+            continue
+        celdas = {} if existente is not None else {
+            f"{get_column_letter(min_col + i)}{rango['encabezado']}": titulos[i] for i in rango["titulos_no_texto"]
+        }
+        plan.append((hoja, nombre, ref, existente is not None, titulos, celdas))
+    return plan, avisos
+
+
+def _se_cruzan(a, b):
+    a0, a1, a2, a3 = range_boundaries(a)
+    b0, b1, b2, b3 = range_boundaries(b)
+    return a0 <= b2 and b0 <= a2 and a1 <= b3 and b1 <= a3
+
+
+def escribir_tablas(path, plan, salida=None):
+    # Copia el paquete una vez con las partes modificadas; devuelve las tablas escritas
+    path, salida = Path(path), Path(salida or path)
+    with zipfile.ZipFile(path) as z:
+        partes = partes_hojas(z)
+        nombres = set(z.namelist())
+        ids = [int(ET.fromstring(z.read(n)).get("id", 0)) for n in nombres if n.startswith("xl/tables/") and n.endswith(".xml")]
+        siguiente_id = max(ids, default=0) + 1
+        nuevas, escritas = {}, []
+        for hoja, nombre, ref, existe, titulos, celdas in plan:
+            parte_hoja, tablas = partes[hoja]
+            if existe:
+                nuevas[tablas[nombre]] = _cambiar_ref(z.read(tablas[nombre]), ref)
+            else:
+                n = 1
+                while f"xl/tables/table{n}.xml" in nombres or f"xl/tables/table{n}.xml" in nuevas:
+                    n += 1
+                parte_tabla = f"xl/tables/table{n}.xml"
+                nuevas[parte_tabla] = _xml_tabla(siguiente_id, nombre, ref, titulos)
+                siguiente_id += 1
+                # Relación hoja -> tabla, <tablePart> en la hoja y tipo de contenido de la parte
+                rels_hoja = ruta_rels(parte_hoja)
+                rels = ET.fromstring(nuevas.get(rels_hoja) or z.read(rels_hoja)) if (rels_hoja in nombres or rels_hoja in nuevas) \
+                    else ET.Element(f"{{{NS_PKG_REL}}}Relationships")
+                usados = {r.get("Id") for r in rels}
+                id_rel = next(f"rId{i}" for i in range(1, len(usados) + 2) if f"rId{i}" not in usados)
+                ET.SubElement(rels, f"{{{NS_PKG_REL}}}Relationship", Id=id_rel, Type=TIPO_REL_TABLA, Target=posixpath.relpath(parte_tabla, posixpath.dirname(parte_hoja)))
+                nuevas[rels_hoja] = _xml_rels(rels)
+                xml_hoja = _agregar_table_part(nuevas.get(parte_hoja) or z.read(parte_hoja), id_rel)
+                for celda, texto in celdas.items():
+                    xml_hoja = _celda_texto(xml_hoja, celda, texto)
+                nuevas[parte_hoja] = xml_hoja
+                tipos = ET.fromstring(nuevas.get("[Content_Types].xml") or z.read("[Content_Types].xml"))
+                ET.SubElement(tipos, f"{{{NS_TIPOS}}}Override", PartName=f"/{parte_tabla}", ContentType=TIPO_CONTENIDO_TABLA)
+                ET.register_namespace("", NS_TIPOS)
+                nuevas["[Content_Types].xml"] = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + ET.tostring(tipos)
+            escritas.append((hoja, nombre, ref, "actualizada" if existe else "creada"))
+
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{salida.stem}-", suffix=".xlsx", dir=salida.parent)
+        try:
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as destino:
+                for info in z.infolist():
+                    destino.writestr(info, nuevas.pop(info.filename, None) or z.read(info.filename))
+                for nombre_parte, contenido in nuevas.items():
+                    destino.writestr(nombre_parte, contenido)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+    os.replace(tmp, salida)
+    return escritas
+
+
+def crear_tablas(path, salida=None):
+    manifiesto = construir_manifiesto(path)
+    plan, avisos = planificar_tablas(manifiesto)
+    # El manifiesto del libro modificado se reconstruye en su próximo parseo (cambió la huella)
+    escritas = escribir_tablas(path, plan, salida) if plan else []
+    return escritas, avisos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea o actualiza las tablas de Excel de los libros HEC")
+    parser.add_argument("libros", nargs="*", type=Path, help="Libros a procesar (por defecto, los de todas las centrales)")
+    parser.add_argument("--salida", type=Path, help="Escribe el resultado en otro archivo (solo con un libro)")
+    args = parser.parse_args()
+
+    libros = args.libros or libros_registrados()
+    if not libros:
+        parser.error("No se encontraron libros 'HEC mensuales AAAA.xlsx'")
+    if args.salida and len(libros) > 1:
+        parser.error("--salida admite un solo libro")
+    for path in libros:
+        if not path.exists():
+            parser.error(f"No se encontró el archivo: {path}")
+
+    for path in libros:
+        escritas, avisos = crear_tablas(path, args.salida)
+        print(f"\n{path}")
+        for hoja, nombre, ref, accion in escritas:
+            print(f"✅ Tabla '{nombre}' {accion} en '{hoja}': {ref}")
+        for aviso in avisos:
+            print(f"⚠️  {aviso}")
+
+
+if __name__ == "__main__":
+    main()
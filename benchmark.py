@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Las cachés del benchmark van a un directorio propio para no desalojar las del dashboard
+os.environ.setdefault("HEC_CACHE_DIR", str(Path(tempfile.gettempdir()) / "hec-benchmark-cache"))
+
+from cache_datos import CACHE_DIR, nombre_cache  # noqa: E402
+from datos import generacion_diaria_mes, leer_hec, leer_intervalos_generacion, tablas_hec  # noqa: E402
+from estado_resultado import tabla_estado_resultado_operativa  # noqa: E402
+from generar_libros import generar  # noqa: E402
+from ingesta_generacion import ingerir_generacion  # noqa: E402
+from kpis import construir_cubo_kpi, valores_kpi  # noqa: E402
+from particiones import cargar_particiones, particionar_libro  # noqa: E402
+from presentacion import AÑOS_PROMEDIO, MESES_LABELS, grafico_generacion_diaria, graficos_tendencia  # noqa: E402
+
+# === BENCHMARK DE CARGA, KPIs Y GRÁFICOS ===
+# Cronometra cada etapa del dashboard sobre uno o más libros (idealmente de tamaño
+# creciente) y guarda los resultados en JSON para comparar entre commits:
+#   parse_separado    lectura anterior: un pd.read_excel por hoja, reabriendo el archivo cada vez
+#   parse_frio        leer_hec: parseo completo del libro en una sola apertura, sin caché
+#   cache_caliente    tablas_hec con la caché Parquet ya escrita
+#   particiones       lectura de las particiones del año y los AÑOS_PROMEDIO anteriores
+#   copia_cache       pickle de ida y vuelta de esas particiones: lo que paga cada acierto de
+#                     st.cache_data en el dashboard (memoria_mb registra su tamaño en memoria)
+#   kpis              cubo de KPIs + valores de los 12 meses del último año
+#   figuras           los tres gráficos de tendencia (+ el diario si hay exportación)
+#   tabla_estado      filtrado del Estado de Resultado operativo
+#   generacion_frio / generacion_caliente  exportación del medidor (--generacion)
+# Uso:
+#   python benchmark.py "data/HEC mensuales 2025.xlsx" --salida bench.json
+#   python benchmark.py libros/*.xlsx --generacion data/Generacion.xlsx --comparar bench.json
+#   python benchmark.py --sinteticos 10 20 30   (libros de generar_libros.py con 10, 20 y 30 años)
+BASE_DIR = Path(__file__).parent
+EXCEL_PATH = BASE_DIR / "data" / "HEC mensuales 2025.xlsx"
+
+
+def lectura_separada(path):
+    # Lectura previa a leer_hec, con los rangos fijos de entonces (línea base de parse_frio)
+    df_pluv = pd.read_excel(str(path), sheet_name="Pluviometria", skiprows=127, usecols="C:D")
+    df_hist = pd.read_excel(str(path), sheet_name="Datos Historicos", skiprows=195, usecols="C:G")
+    df_estado = pd.read_excel(str(path), sheet_name="Estado de Resultado", header=None, usecols="A:G", skiprows=5, nrows=39)
+    df_mayor = pd.read_excel(str(path), sheet_name="Mayor", skiprows=4)
+    return df_pluv, df_hist, df_estado, df_mayor
+
+
+def cronometrar(fn, *args, repeticiones=3):
+    # (mínimo, mediana) en segundos
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn(*args)
+        tiempos.append(time.perf_counter() - t0)
+    return {"min": min(tiempos), "mediana": statistics.median(tiempos)}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_libro(path, repeticiones=3, gen_path=None):
+    path = Path(path)
+    etapas = {}
+    etapas["parse_separado"] = cronometrar(lectura_separada, path, repeticiones=repeticiones)
+    etapas["parse_frio"] = cronometrar(leer_hec, path, repeticiones=repeticiones)
+
+    shutil.rmtree(CACHE_DIR / nombre_cache(path), ignore_errors=True)
+    tablas = tablas_hec(path)
+    etapas["cache_caliente"] = cronometrar(tablas_hec, path, repeticiones=repeticiones)
+
+    df_hist, df_estado = tablas["historicos"], tablas["estado"]
+    año = int(df_hist["Año"].max())
+    libros = {año: path}
+    años = range(año - AÑOS_PROMEDIO, año + 1)
+    particionar_libro(path)
+
+    def _particiones():
+        return cargar_particiones(libros, años, "pluviometria"), cargar_particiones(libros, años, "historicos")
+
+    etapas["particiones"] = cronometrar(_particiones, repeticiones=repeticiones)
+    df_pluv, df_hist_ventana = _particiones()
+    etapas["copia_cache"] = cronometrar(
+        lambda: pickle.loads(pickle.dumps((df_pluv, df_hist_ventana))), repeticiones=max(repeticiones, 20),
+    )
+
+    def _kpis():
+        cubo = construir_cubo_kpi(df_hist_ventana, df_pluv)
+        return [valores_kpi(cubo, año, mes, AÑOS_PROMEDIO) for mes in range(1, 13)]
+
+    etapas["kpis"] = cronometrar(_kpis, repeticiones=repeticiones)
+
+    df_diaria = None
+    if gen_path is not None:
+        etapas["generacion_frio"] = cronometrar(leer_intervalos_generacion, gen_path, repeticiones=repeticiones)
+        ingerir_generacion(gen_path)
+        etapas["generacion_caliente"] = cronometrar(ingerir_generacion, gen_path, repeticiones=repeticiones)
+        df_diaria = ingerir_generacion(gen_path)["diaria"]
+
+    def _figuras():
+        figuras = graficos_tendencia(df_hist_ventana, df_pluv, año)
+        if df_diaria is not None and not df_diaria.empty:
+            año_gen, mes_gen = df_diaria.index[-1]
+            df_dia = generacion_diaria_mes(df_diaria, año_gen, mes_gen)
+            figuras.append(grafico_generacion_diaria(df_dia, MESES_LABELS[mes_gen - 1], año_gen, Path(gen_path).stem.removeprefix("Generacion ")))
+        return [fig.to_dict() for fig in figuras]
+
+    etapas["figuras"] = cronometrar(_figuras, repeticiones=repeticiones)
+    etapas["tabla_estado"] = cronometrar(tabla_estado_resultado_operativa, df_estado, repeticiones=repeticiones)
+
+    return {
+        "libro": path.name,
+        "tamaño_kb": round(path.stat().st_size / 1024),
+        "filas": {nombre: len(df) for nombre, df in tablas.items()},
+        "memoria_mb": round(sum(df.memory_usage(deep=True).sum() for df in (df_pluv, df_hist_ventana)) / 2**20, 3),
+        "etapas": etapas,
+    }
+
+
+def comparar(actual, previo):
+    # Razón mediana actual / previa por libro y etapa (>1 es más lento)
+    previos = {r["libro"]: r for r in previo["resultados"]}
+    for r in actual["resultados"]:
+        if r["libro"] not in previos:
+            continue
+        print(f"\n{r['libro']} vs {previo.get('commit') or 'previo'}")
+        if previos[r["libro"]].get("memoria_mb"):
+            print(f"  {'memoria_mb':<20} {previos[r['libro']]['memoria_mb']:8.3f} MB → {r['memoria_mb']:8.3f} MB")
+        for etapa, t in r["etapas"].items():
+            antes = previos[r["libro"]]["etapas"].get(etapa)
+            if antes:
+                print(f"  {etapa:<20} {antes['mediana']:8.3f} s → {t['mediana']:8.3f} s  ({t['mediana'] / antes['mediana']:5.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga, KPIs y gráficos del dashboard")
+    parser.add_argument("libros", nargs="*", help="Libros HEC, de menor a mayor tamaño")
+    parser.add_argument("--sinteticos", nargs="+", type=int, metavar="AÑOS",
+                        help="Genera y mide libros sintéticos con estos años de historia")
+    parser.add_argument("--generacion", type=Path, help="Exportación del medidor de 15 minutos")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", type=Path, default=BASE_DIR / "benchmark.json")
+    parser.add_argument("--comparar", type=Path, help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        carpeta = Path(tempfile.mkdtemp(prefix="hec-sinteticos-"))
+        for años in sorted(args.sinteticos):
+            rutas = generar(carpeta / f"{años}a", años=años, años_intervalos=0)["El Canelo"]
+            destino = rutas[0].with_name(f"HEC sintetico {años}a.xlsx")
+            args.libros.append(str(rutas[0].rename(destino)))
+    elif not args.libros:
+        args.libros = [str(EXCEL_PATH)]
+
+    for p in args.libros:
+        if not Path(p).exists():
+            parser.error(f"No se encontró el archivo: {p}")
+
+    resultados = []
+    for p in args.libros:
+        r = medir_libro(p, args.repeticiones, args.generacion)
+        resultados.append(r)
+        print(f"{r['libro']} ({r['tamaño_kb']:,} KB, {r['filas']}, particiones en memoria {r['memoria_mb']:.3f} MB)")
+        for etapa, t in r["etapas"].items():
+            print(f"  {etapa:<20} {t['min']:8.3f} s (mediana {t['mediana']:.3f} s)")
+        separado, unico = r["etapas"]["parse_separado"]["min"], r["etapas"]["parse_frio"]["min"]
+        print(f"  lectura única vs una apertura por hoja: {separado / unico:,.2f}x")
+
+    corrida = {
+        "fecha": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "repeticiones": args.repeticiones,
+        "resultados": resultados,
+    }
+    args.salida.write_text(json.dumps(corrida, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados en {args.salida}")
+    if args.comparar:
+        comparar(corrida, json.loads(args.comparar.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
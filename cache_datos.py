@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from perfil import etapa, fallo_cache
+
+# === CACHÉ COLUMNAR EN DISCO ===
+# Cada libro Excel se parsea una sola vez por contenido: las hojas ya tipadas se
+# guardan como Parquet en data/.cache/<libro>-<carpeta>/<etiqueta>-v<version>-<hash>/ y se
+# reutilizan mientras el archivo fuente no cambie. HEC_CACHE_DIR permite usar otro
+# directorio (p. ej. benchmarks, para no desalojar las cachés del dashboard).
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get("HEC_CACHE_DIR") or BASE_DIR / "data" / ".cache")
+CHUNK_HASH = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+# ruta -> (tamaño, mtime_ns, sha256) de la última versión vista; evita releer el archivo si no
+# cambió en disco. Una entrada por ruta: un libro reescrito reemplaza la suya en vez de sumar otra
+_hashes = {}
+
+
+def huella_archivo(path):
+    path = Path(path)
+    stat = path.stat()
+    ruta = str(path.resolve())
+    tamaño, mtime_ns, digest = _hashes.get(ruta, (None, None, None))
+    if (tamaño, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for bloque in iter(lambda: f.read(CHUNK_HASH), b""):
+                h.update(bloque)
+        digest = h.hexdigest()
+        _hashes[ruta] = (stat.st_size, stat.st_mtime_ns, digest)
+    return {"tamaño": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def recordar_huella(path, sha256):
+    # Para archivos cuyo hash ya se calculó al escribirlos (p. ej. libros subidos)
+    path = Path(path)
+    stat = path.stat()
+    _hashes[str(path.resolve())] = (stat.st_size, stat.st_mtime_ns, sha256)
+
+
+def firma_archivo(path):
+    # Clave corta para cachés en memoria (st.cache_data): cambia solo si cambia el contenido
+    return huella_archivo(path)["sha256"][:20]
+
+
+def nombre_cache(path):
+    # Carpeta de caché de un libro: nombre y carpeta de origen, para que libros homónimos
+    # de distintas centrales (data/<central>/HEC mensuales 2025.xlsx) no se pisen
+    path = Path(path).resolve()
+    return f"{path.stem}-{hashlib.sha1(str(path.parent).encode()).hexdigest()[:8]}"
+
+
+def _dir_libro(path):
+    return CACHE_DIR / nombre_cache(path)
+
+
+def _nombre_entrada(etiqueta, version, huella):
+    return f"{etiqueta}-v{version}-{huella['sha256'][:20]}"
+
+
+def leer_cache(path, etiqueta, version, huella, nombres=None):
+    entrada = _dir_libro(path) / _nombre_entrada(etiqueta, version, huella)
+    meta_path = entrada / "meta.json"
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        nombres = meta["tablas"] if nombres is None else nombres
+        return {nombre: pd.read_parquet(entrada / f"{nombre}.parquet") for nombre in nombres}
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Caché ilegible en %s, se vuelve a parsear: %s", entrada, e)
+        return None
+
+
+def publicar_directorio(tmp, destino):
+    # os.replace atómico de un directorio temporal ya completo, sin comprobar antes si existe.
+    # Si falla porque otro proceso publicó el mismo destino (la ruta depende del contenido, así
+    # que es igual), se descarta el temporal; cualquier otro error se propaga
+    try:
+        os.replace(tmp, destino)
+    except OSError:
+        if not destino.exists():
+            raise
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def guardar_cache(path, etiqueta, version, huella, tablas):
+    dir_libro = _dir_libro(path)
+    nombre = _nombre_entrada(etiqueta, version, huella)
+    tmp = None
+    try:
+        dir_libro.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{nombre}-", dir=dir_libro))
+        for nombre_tabla, df in tablas.items():
+            df.to_parquet(tmp / f"{nombre_tabla}.parquet")
+        meta = {"fuente": Path(path).name, "huella": huella, "tablas": list(tablas)}
+        # meta.json se escribe al final: su presencia marca la entrada como completa
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        publicar_directorio(tmp, dir_libro / nombre)
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudo escribir la caché de %s: %s", path, e)
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return
+    # Las entradas de versiones anteriores del mismo libro ya no sirven
+    for viejo in dir_libro.glob(f"{etiqueta}-v*"):
+        if viejo.name != nombre:
+            shutil.rmtree(viejo, ignore_errors=True)
+
+
+def cargar_tablas(path, etiqueta, parser, version=1, nombres=None):
+    # parser(path) -> dict nombre -> DataFrame; solo se invoca si no hay caché válida.
+    # nombres limita qué tablas del paquete se leen desde la caché.
+    with etapa(f"parquet {etiqueta}", cacheada=True, libro=Path(path).name) as r:
+        huella = huella_archivo(path)
+        tablas = leer_cache(path, etiqueta, version, huella, nombres)
+        if tablas is None:
+            fallo_cache()
+            with etapa(f"parseo {etiqueta}") as rp:
+                tablas = parser(path)
+                rp["filas"] = sum(len(df) for df in tablas.values())
+            guardar_cache(path, etiqueta, version, huella, tablas)
+            if nombres is not None:
+                tablas = {nombre: tablas[nombre] for nombre in nombres}
+        r["filas"] = sum(len(df) for df in tablas.values())
+    return tablas
+
+
+# === VIGILANTE DE data/ ===
+def vigilar_directorio(directorio, al_cambiar, patron="*.xlsx", intervalo=5.0):
+    # Hilo en segundo plano que sondea tamaño/mtime de los libros y llama
+    # al_cambiar(path) cuando uno aparece o se modifica (p. ej. para precalentar la caché)
+    directorio = Path(directorio)
+
+    def _estado():
+        estado = {}
+        for p in directorio.glob(patron):
+            if p.name.startswith("~$"):  # archivos de bloqueo de Excel
+                continue
+            try:
+                stat = p.stat()
+            except OSError:
+                continue
+            estado[p] = (stat.st_size, stat.st_mtime_ns)
+        return estado
+
+    def _bucle():
+        previo = _estado()
+        while True:
+            time.sleep(intervalo)
+            actual = _estado()
+            for p, marca in actual.items():
+                if previo.get(p) != marca:
+                    try:
+                        al_cambiar(p)
+                    except Exception:
+                        logger.exception("Error procesando el cambio en %s", p)
+            previo = actual
+
+    hilo = threading.Thread(target=_bucle, name=f"vigilante-{directorio.name}", daemon=True)
+    hilo.start()
+    return hilo
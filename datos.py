@@ -0,0 +1,242 @@
+from collections import deque
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from cache_datos import cargar_tablas
+from manifiesto import rangos_libro
+
+# === LECTURA Y TIPADO DE LOS LIBROS EXCEL ===
+# Funciones puras (sin Streamlit) que devuelven dict nombre -> DataFrame, listas
+# para guardarse en la caché columnar de cache_datos.py.
+COL_FECHA_GEN = "Fecha y hora"
+COL_APORTE = "APORTE.CANELO\nIntervalo de energía activa generada\n(kWh)"
+# Subir la versión cuando cambie el formato de las tablas que produce cada lector
+VERSION_HEC = 4
+
+
+def _nombres_columnas(valores):
+    nombres = []
+    for i, v in enumerate(valores):
+        nombre = str(v).strip() if pd.notna(v) else f"Columna {i + 1}"
+        while nombre in nombres:
+            nombre += "_"
+        nombres.append(nombre)
+    return nombres
+
+
+def _tipar_columna(serie):
+    # Numérica si todos los valores no nulos lo son; texto en caso contrario
+    numerica = pd.to_numeric(serie, errors="coerce")
+    if numerica.notna().sum() == serie.notna().sum():
+        return numerica
+    return serie.astype("string")
+
+
+def _leer_rango(xls, hoja, rango, **kwargs):
+    # Solo las filas del rango: con nrows el lector deja de recorrer la hoja al llegar al final
+    columnas, encabezado, fin = rango
+    nrows = None if fin is None else max(fin - encabezado, 0)
+    return xls.parse(hoja, skiprows=encabezado - 1, usecols=columnas, nrows=nrows, **kwargs)
+
+
+def _leer_pluviometria(xls, rango):
+    df_pluv = _leer_rango(xls, "Pluviometria", rango)
+    df_pluv.columns = ["Fecha", "Precipitacion"]
+    df_pluv["Fecha"] = pd.to_datetime(df_pluv["Fecha"], errors='coerce')
+    df_pluv["Precipitacion"] = pd.to_numeric(df_pluv["Precipitacion"], errors='coerce')
+    df_pluv.dropna(subset=["Fecha", "Precipitacion"], inplace=True)
+    df_pluv["Año"] = df_pluv["Fecha"].dt.year
+    df_pluv["Mes"] = df_pluv["Fecha"].dt.month
+    return df_pluv.reset_index(drop=True)
+
+
+def _leer_historicos(xls, rango):
+    df_hist = _leer_rango(xls, "Datos Historicos", rango)
+    df_hist.columns = ["Fecha", "Generacion", "Generacion_Ref", "Potencia", "Ventas"]
+    df_hist["Fecha"] = pd.to_datetime(df_hist["Fecha"], errors='coerce')
+    for col in ["Generacion", "Generacion_Ref", "Potencia", "Ventas"]:
+        df_hist[col] = pd.to_numeric(df_hist[col], errors='coerce')
+    df_hist.dropna(subset=["Fecha", "Generacion", "Ventas"], inplace=True)
+    df_hist["Año"] = df_hist["Fecha"].dt.year
+    df_hist["Mes"] = df_hist["Fecha"].dt.month
+    return df_hist.reset_index(drop=True)
+
+
+def _leer_estado(xls, rango):
+    if "Estado de Resultado" not in xls.sheet_names:
+        return pd.DataFrame()
+    # El encabezado se lee como una fila más para conservar los nombres tal cual (con duplicados)
+    columnas, encabezado, fin = rango
+    df = _leer_rango(xls, "Estado de Resultado", (columnas, encabezado, None if fin is None else fin + 1), header=None)
+    df.columns = _nombres_columnas(df.iloc[0])
+    df = df[1:].reset_index(drop=True)
+    return df.apply(_tipar_columna)
+
+
+def _leer_mayor(xls):
+    # Libro mayor (hoja "Mayor"), mismo criterio que respaldo_app.py
+    if "Mayor" not in xls.sheet_names:
+        return pd.DataFrame({"FECHA": pd.Series(dtype="datetime64[ns]"), "AÑO": pd.Series(dtype="Int64"), "MES": pd.Series(dtype="Int64")})
+    df_mayor = xls.parse("Mayor", skiprows=4)
+    df_mayor = df_mayor.loc[:, ~df_mayor.columns.astype(str).str.contains("^Unnamed")]
+    df_mayor.columns = _nombres_columnas([str(c).strip().upper() for c in df_mayor.columns])
+    df_mayor = df_mayor.dropna(how="all").reset_index(drop=True)
+    if "FECHA" in df_mayor.columns:
+        df_mayor["FECHA"] = pd.to_datetime(df_mayor["FECHA"], errors="coerce")
+        otras = [c for c in df_mayor.columns if c != "FECHA"]
+        df_mayor[otras] = df_mayor[otras].apply(_tipar_columna)
+        df_mayor["AÑO"] = df_mayor["FECHA"].dt.year.astype("Int64")
+        df_mayor["MES"] = df_mayor["FECHA"].dt.month.astype("Int64")
+    else:
+        df_mayor = df_mayor.apply(_tipar_columna)
+        df_mayor["AÑO"] = pd.Series(pd.NA, index=df_mayor.index, dtype="Int64")
+        df_mayor["MES"] = pd.Series(pd.NA, index=df_mayor.index, dtype="Int64")
+    return df_mayor
+
+
+def leer_hec(path):
+    # Un único ExcelFile: el zip/XML del libro se abre y descomprime una sola vez para todas las hojas
+    # Los rangos salen del manifiesto del libro (tablas de Excel o encabezados detectados); si no
+    # existe se construye sobre el mismo libro abierto (xls.book, openpyxl read_only)
+    with pd.ExcelFile(str(path)) as xls:
+        rangos = rangos_libro(path, xls.book)
+        return {
+            "pluviometria": _leer_pluviometria(xls, rangos["Pluviometria"]),
+            "historicos": _leer_historicos(xls, rangos["Datos Historicos"]),
+            "estado": _leer_estado(xls, rangos["Estado de Resultado"]),
+            "mayor": _leer_mayor(xls),
+        }
+
+
+def agregar_generacion(df_intervalos, df_diaria=None):
+    # Energía diaria y mensual de todas las fechas, indexadas por (Año, Mes) para búsqueda directa.
+    # Con df_diaria, los intervalos nuevos se suman a los totales diarios ya calculados.
+    fecha = df_intervalos["FechaHora"].dt.normalize()
+    serie = df_intervalos.groupby(fecha)["AporteCanelo_kWh"].sum()
+    if df_diaria is not None and not df_diaria.empty:
+        serie = df_diaria.set_index("Fecha")["AporteCanelo_kWh"].add(serie, fill_value=0)
+    df_dia = serie.rename_axis("Fecha").reset_index()
+    df_dia["Año"] = df_dia["Fecha"].dt.year.astype("int16")
+    df_dia["Mes"] = df_dia["Fecha"].dt.month.astype("int8")
+    df_mes = df_dia.groupby(["Año", "Mes"]).agg(
+        AporteCanelo_kWh=("AporteCanelo_kWh", "sum"), Dias=("Fecha", "size")
+    )
+    return df_dia.set_index(["Año", "Mes"]).sort_index(), df_mes.sort_index()
+
+
+def generacion_diaria_mes(df_diaria, año, mes):
+    try:
+        df = df_diaria.loc[[(año, mes)]]
+    except KeyError:
+        return pd.DataFrame()
+    return df.reset_index(drop=True)[["Fecha", "AporteCanelo_kWh"]]
+
+
+def intervalos_vacios():
+    return pd.DataFrame({"FechaHora": pd.Series(dtype="datetime64[ns]"), "AporteCanelo_kWh": pd.Series(dtype="float64")})
+
+
+def _tipar_intervalos(fechas, valores):
+    df = pd.DataFrame({
+        "FechaHora": pd.to_datetime(pd.Series(fechas, dtype="object"), errors="coerce", dayfirst=True),
+        "AporteCanelo_kWh": pd.to_numeric(pd.Series(valores, dtype="object"), errors="coerce"),
+    })
+    return df.dropna(subset=["FechaHora", "AporteCanelo_kWh"])
+
+
+def _fecha_celda(valor):
+    return pd.to_datetime(valor, errors="coerce", dayfirst=True)
+
+
+def _leer_intervalos(ws, col_fecha, col_aporte, posicion, filas_bloque):
+    # Una sola pasada: encabezado, verificación de la fila guardada y filas nuevas.
+    # Devuelve None si la fila guardada ya no tiene la misma fecha (archivo reemplazado).
+    filas = enumerate(ws.iter_rows(values_only=True), start=1)
+    for n, fila in filas:
+        if col_fecha in fila and col_aporte in fila:
+            header_row, idx_fecha, idx_gen = n, fila.index(col_fecha), fila.index(col_aporte)
+            break
+    else:
+        return intervalos_vacios(), None, []
+    # Desde el encabezado solo se recorren las columnas entre fecha y aporte
+    desde, hasta = min(idx_fecha, idx_gen), max(idx_fecha, idx_gen)
+    filas = enumerate(
+        ws.iter_rows(min_row=header_row + 1, min_col=desde + 1, max_col=hasta + 1, values_only=True), start=header_row + 1,
+    )
+    idx_fecha, idx_gen = idx_fecha - desde, idx_gen - desde
+
+    fila_previa = posicion.get("ultima_fila") if posicion.get("fila_encabezado") == header_row else None
+    if fila_previa:
+        fecha_previa = pd.Timestamp(posicion["fecha_ultima_fila"])
+        for n, fila in filas:
+            if n == fila_previa:
+                if _fecha_celda(fila[idx_fecha]) != fecha_previa:
+                    return None
+                break
+        else:
+            return None
+
+    bloques, fechas, valores = [], [], []
+    # Últimas filas no vacías: la exportación termina con filas de pie ("ID: ...")
+    cola = deque(maxlen=8)
+    for n, fila in filas:
+        if len(fila) <= max(idx_fecha, idx_gen) or fila[idx_fecha] is None:
+            continue
+        cola.append((n, fila[idx_fecha]))
+        fechas.append(fila[idx_fecha])
+        valores.append(fila[idx_gen])
+        if len(fechas) >= filas_bloque:
+            bloques.append(_tipar_intervalos(fechas, valores))
+            fechas, valores = [], []
+    if fechas:
+        bloques.append(_tipar_intervalos(fechas, valores))
+    df = pd.concat(bloques, ignore_index=True) if bloques else intervalos_vacios()
+    return df, header_row, list(cola)
+
+
+def leer_intervalos_nuevos(path, posicion=None, col_aporte=COL_APORTE, filas_bloque=10_000, col_fecha=COL_FECHA_GEN):
+    # Lectura en streaming (read_only) de la exportación del medidor, tipando por bloques
+    # para no acumular texto. posicion = {"fila_encabezado", "ultima_fila", "fecha_ultima_fila",
+    # "ultima_fecha"} de una lectura previa: si la fila guardada conserva su fecha solo se tipan
+    # las filas posteriores y se descartan los intervalos no posteriores a ultima_fecha. Si no
+    # (archivo reemplazado o corregido) se lee el archivo completo. Devuelve (intervalos,
+    # posicion nueva, completa); posicion es None si no hay encabezado y completa indica que los
+    # intervalos son todos los del archivo y reemplazan a los ya ingeridos.
+    posicion = posicion or {}
+    wb = load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        leido = _leer_intervalos(ws, col_fecha, col_aporte, posicion, filas_bloque)
+        reanudado = leido is not None and bool(posicion.get("ultima_fila"))
+        if leido is None:
+            leido = _leer_intervalos(ws, col_fecha, col_aporte, {}, filas_bloque)
+    finally:
+        wb.close()
+    df, header_row, cola = leido
+    if header_row is None:
+        return df, None, True
+
+    ultima_fecha = pd.Timestamp(posicion["ultima_fecha"]) if reanudado and posicion.get("ultima_fecha") else pd.NaT
+    if pd.notna(ultima_fecha):
+        df = df[df["FechaHora"] > ultima_fecha].reset_index(drop=True)
+    if not df.empty:
+        ultima_fecha = df["FechaHora"].max() if pd.isna(ultima_fecha) else max(ultima_fecha, df["FechaHora"].max())
+    nueva = {"fila_encabezado": header_row, "ultima_fecha": None if pd.isna(ultima_fecha) else ultima_fecha.isoformat()}
+    ultima_fila = next(((n, _fecha_celda(v)) for n, v in reversed(cola) if pd.notna(_fecha_celda(v))), None)
+    if ultima_fila is not None:
+        nueva["ultima_fila"] = ultima_fila[0]
+        nueva["fecha_ultima_fila"] = ultima_fila[1].isoformat()
+    elif reanudado:
+        nueva["ultima_fila"] = posicion["ultima_fila"]
+        nueva["fecha_ultima_fila"] = posicion["fecha_ultima_fila"]
+    return df, nueva, not reanudado
+
+
+def leer_intervalos_generacion(path, col_aporte=COL_APORTE, filas_bloque=10_000, col_fecha=COL_FECHA_GEN):
+    return leer_intervalos_nuevos(path, None, col_aporte, filas_bloque, col_fecha)[0]
+
+
+def tablas_hec(path, nombres=None):
+    return cargar_tablas(path, "hec", leer_hec, version=VERSION_HEC, nombres=nombres)
+
@@ -0,0 +1,50 @@
+import re
+
+import pandas as pd
+
+# === CLASIFICACIÓN DEL ESTADO DE RESULTADO ===
+# Cada fila se etiqueta según su descripción (primera columna):
+#   "resumen"     GANANCIA / PERDIDA / TOTAL GENERAL
+#   "operativa"   partidas de ingresos y costos de operación (PALABRAS_OPERATIVAS)
+#   "encabezado"  rubros y subtotales en mayúsculas sin dígitos (INGRESOS, COSTOS...)
+# Las palabras clave se combinan en un solo patrón compilado que se aplica a toda
+# la columna con operaciones vectorizadas de pandas.
+PALABRAS_OPERATIVAS = [
+    "Transferencias de Energía", "Transferencias de Potencia", "Servicios de Administrativos",
+    "Peajes", "Costos por Energía", "Balance de Potencial", "Transferencia de Energía",
+    "Petroleo", "Bencina", "Pasajes", "Electricidad", "Agua", "Gas", "Telefono", "Computacion",
+    "Aseo", "Mantenimiento", "Revisión", "Depreciación", "Equipos Hidroelectrica", "Seguros",
+    "Rutinaria", "Vehiculos", "Oficina"
+]
+PALABRAS_RESUMEN = ["GANANCIA", "PERDIDA", "TOTAL GENERAL"]
+TIPOS_FILA = ["resumen", "operativa", "encabezado"]
+
+
+def _alternativas(palabras):
+    return "|".join(re.escape(p) for p in palabras)
+
+
+# Un lookahead opcional por grupo: ambos se evalúan sobre toda la descripción en una sola pasada
+PATRON_FILAS = re.compile(
+    rf"^(?:(?=.*?(?P<resumen>{_alternativas(PALABRAS_RESUMEN)})))?"
+    rf"(?:(?=.*?(?P<operativa>{_alternativas(PALABRAS_OPERATIVAS)})))?",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def clasificar_filas_estado(df):
+    # Serie categórica (mismo índice que df) con el tipo de cada fila; NaN si no se reconoce
+    desc = df[df.columns[0]].astype("string").str.strip()
+    coincidencias = desc.str.extract(PATRON_FILAS)
+    encabezado = desc.str.isupper() & ~desc.str.contains(r"\d", regex=True) & (desc.str.len() > 3)
+    tipo = pd.Series(pd.NA, index=df.index, dtype="object")
+    tipo = tipo.mask(encabezado.fillna(False).astype(bool), "encabezado")
+    tipo = tipo.mask(coincidencias["operativa"].notna(), "operativa")
+    tipo = tipo.mask(coincidencias["resumen"].notna(), "resumen")
+    return pd.Series(pd.Categorical(tipo, categories=TIPOS_FILA), index=df.index, name="Tipo")
+
+
+def tabla_estado_resultado_operativa(df, tipos=None):
+    # Filas de resumen, operativas y encabezados; tipos permite reutilizar una clasificación ya hecha
+    tipos = clasificar_filas_estado(df) if tipos is None else tipos
+    return df.loc[tipos.notna()].copy()
@@ -0,0 +1,250 @@
+import argparse
+import datetime as dt
+import unicodedata
+import uuid
+from pathlib import Path
+
+import numpy as np
+from openpyxl import Workbook
+
+from cache_datos import BASE_DIR
+from datos import COL_FECHA_GEN
+from estado_resultado import PALABRAS_OPERATIVAS
+from presentacion import MESES_LABELS
+
+# === GENERADOR DE LIBROS SINTÉTICOS ===
+# Escribe libros con la misma estructura que los reales, para benchmarks y pruebas
+# de carga sin datos de producción:
+#   HEC mensuales AAAA.xlsx  Pluviometria (encabezado fila 128, C:D, un dato diario),
+#                            Datos Historicos (encabezado fila 196, C:G, un dato mensual),
+#                            Estado de Resultado (A6:G44) y Mayor (encabezado fila 5)
+#   Generacion Central <planta>.xlsx  exportación del medidor: título, período en A5,
+#                            encabezado multilínea "APORTE.<PLANTA>" en la fila 9,
+#                            intervalos de 15 minutos y pie "ID: ..."
+# Con una planta se escribe directamente en --salida; con varias, una carpeta por planta.
+# Nunca dentro de data/: la app y los loaders tomarían los libros sintéticos como reales.
+# Uso:
+#   python generar_libros.py --salida /tmp/hec --años 30
+#   python generar_libros.py --salida /tmp/flota --años 10 --plantas "El Canelo" "Los Maitenes" --años-intervalos 2
+FILA_PLUVIOMETRIA = 128
+FILA_HISTORICOS = 196
+FILA_ESTADO = 6
+FILA_MAYOR = 5
+FILA_ENCABEZADO_GEN = 9
+MAX_FILAS_EXCEL = 1_048_576
+COLUMNAS_MEDIDOR = [
+    (2, "Intensidad media media\n(A)"),
+    (3, "Intervalo de energía activa consumida\n(kWh)"),
+    (6, "Intervalo de energía activa generada\n(kWh)"),
+    (7, "Intervalo de energía reactiva consumida\n(kVArh)"),
+    (9, "Intervalo de energía reactiva generada\n(kVArh)"),
+    (10, "Potencia activa media\n(kW)"),
+    (11, "Potencia reactiva media\n(kVAr)"),
+    (12, "Tensión L-L media media\n(V)"),
+]
+# Lluvia concentrada en otoño-invierno (mayo a agosto), como en la zona central
+PROB_LLUVIA_MES = [0.05, 0.05, 0.08, 0.15, 0.30, 0.40, 0.40, 0.35, 0.20, 0.12, 0.08, 0.05]
+CUENTAS_MAYOR = ["Transferencias de Energía", "Transferencias de Potencia", "Peajes", "Costos por Energía",
+                 "Seguros", "Mantenimiento", "Electricidad", "Petroleo", "Oficina", "Depreciación"]
+
+
+def etiqueta_planta(nombre):
+    # "El Canelo" -> "CANELO" (prefijo de las columnas de la exportación del medidor)
+    palabras = nombre.split()
+    if len(palabras) > 1 and palabras[0].lower() in ("el", "la", "los", "las"):
+        palabras = palabras[1:]
+    texto = unicodedata.normalize("NFKD", " ".join(palabras)).encode("ascii", "ignore").decode()
+    return texto.upper().replace(" ", "_")
+
+
+def _texto_fecha(t):
+    # Formato de la exportación: "01-06-2025 0:15:00" (hora sin cero a la izquierda)
+    return f"{t:%d-%m-%Y} {t.hour}:{t:%M:%S}"
+
+
+def _filas_vacias(ws, n):
+    for _ in range(n):
+        ws.append([])
+
+
+def _serie_diaria(rng, inicio, fin):
+    dias = np.arange(np.datetime64(inicio), np.datetime64(fin) + 1, dtype="datetime64[D]")
+    meses = (dias.astype("datetime64[M]").astype(int) % 12)
+    llueve = rng.random(len(dias)) < np.take(PROB_LLUVIA_MES, meses)
+    mm = np.where(llueve, np.round(rng.gamma(0.9, 12.0, len(dias)), 1), 0.0)
+    return dias, mm
+
+
+def _hoja_pluviometria(wb, dias, mm, nombre):
+    ws = wb.create_sheet("Pluviometria")
+    ws.append([f"Pluviometría Central {nombre}"])
+    _filas_vacias(ws, FILA_PLUVIOMETRIA - 2)
+    ws.append([None, None, "Fecha", "Precipitación (mm)"])
+    for dia, valor in zip(dias.astype(dt.datetime), mm):
+        ws.append([None, None, dt.datetime.combine(dia, dt.time()), float(valor)])
+
+
+def _mensual(dias, mm):
+    # Totales mensuales de lluvia: [(datetime del mes, mm)]
+    meses = dias.astype("datetime64[M]")
+    unicos, inv = np.unique(meses, return_inverse=True)
+    return unicos.astype(dt.datetime), np.bincount(inv, weights=mm)
+
+
+def _serie_mensual(rng, dias, mm, potencia_mw):
+    # Datos Historicos de toda la serie: [(datetime del mes, generación, ventas)]. Se sortea una
+    # sola vez por planta para que todos los libros traigan las mismas filas de los años comunes.
+    meses, lluvia_mes = _mensual(dias, mm)
+    # La generación sigue a la lluvia del mes y del anterior, acotada por la potencia instalada
+    maximo = potencia_mw * 730
+    efectiva = 0.6 * lluvia_mes + 0.4 * np.concatenate([[lluvia_mes[0]], lluvia_mes[:-1]])
+    generacion = np.minimum(maximo, maximo * (0.25 + efectiva / 250) * rng.uniform(0.9, 1.1, len(meses)))
+    precio = rng.uniform(60_000, 120_000, len(meses))
+    return list(zip(meses, generacion, generacion * precio))
+
+
+def _hoja_historicos(wb, historia, año, potencia_mw):
+    ws = wb.create_sheet("Datos Historicos")
+    ws.append(["Datos Históricos"])
+    _filas_vacias(ws, FILA_HISTORICOS - 2)
+    ws.append([None, None, "Fecha", "Generacion", "Generacion Ref", "Potencia", "Ventas"])
+    maximo = potencia_mw * 730
+    for mes, gen, ventas in historia:
+        if mes.year <= año:
+            ws.append([None, None, dt.datetime(mes.year, mes.month, 1), round(float(gen), 1),
+                       round(maximo * 0.55, 1), potencia_mw, round(float(ventas))])
+
+
+def _hoja_estado(wb, rng, año):
+    ws = wb.create_sheet("Estado de Resultado")
+    ws.append([f"Estado de Resultado {año}"])
+    _filas_vacias(ws, FILA_ESTADO - 2)
+    ws.append(["Etiquetas de fila"] + MESES_LABELS[:5] + ["Total general"])
+    rubros = (["INGRESOS"] + PALABRAS_OPERATIVAS[:2] + ["COSTOS"] + PALABRAS_OPERATIVAS[2:]
+              + ["Otros gastos 2024", "OTROS RESULTADOS", "GANANCIA (PERDIDA)", "TOTAL GENERAL"])
+    for rubro in rubros[:38]:
+        valores = [round(float(v)) for v in rng.normal(0, 5e6, 5)]
+        ws.append([rubro] + valores + [sum(valores)])
+
+
+def _hoja_mayor(wb, rng, inicio, fin, asientos_año):
+    ws = wb.create_sheet("Mayor")
+    ws.append(["Libro Mayor"])
+    _filas_vacias(ws, FILA_MAYOR - 2)
+    ws.append([None, "Fecha", "Cuenta", "Descripcion", "Glosa", "Debe", "Haber"])
+    n = asientos_año * (fin.year - inicio.year + 1)
+    dias = np.sort(rng.integers(0, (fin - inicio).days + 1, n))
+    cuentas = rng.integers(0, len(CUENTAS_MAYOR), n)
+    montos = np.round(rng.lognormal(12, 1.2, n))
+    for d, c, m in zip(dias, cuentas, montos):
+        es_ingreso = c < 2
+        ws.append([None, dt.datetime.combine(inicio + dt.timedelta(days=int(d)), dt.time()), 4100 + int(c) * 10,
+                   CUENTAS_MAYOR[c], f"Asiento {CUENTAS_MAYOR[c].lower()}",
+                   0 if es_ingreso else float(m), float(m) if es_ingreso else 0])
+
+
+def escribir_libro_hec(destino, rng, dias, mm, historia, año, nombre="El Canelo", potencia_mw=2.5, asientos_año=2000):
+    # Libro del año `año` con la historia desde el primer día de `dias` hasta fin de ese año;
+    # historia: _serie_mensual de la planta
+    mascara = dias <= np.datetime64(f"{año}-12-31")
+    dias, mm = dias[mascara], mm[mascara]
+    wb = Workbook(write_only=True)
+    _hoja_pluviometria(wb, dias, mm, nombre)
+    _hoja_historicos(wb, historia, año, potencia_mw)
+    _hoja_estado(wb, rng, año)
+    _hoja_mayor(wb, rng, dt.date(año - 1, 1, 1), dt.date(año, 12, 31), asientos_año)
+    wb.save(destino)
+    return destino
+
+
+def escribir_exportacion_medidor(destino, rng, inicio, fin, nombre="El Canelo", potencia_mw=2.5):
+    # Intervalos de 15 minutos desde inicio 0:15 hasta fin+1 0:00, con el formato de texto del medidor
+    etiqueta = etiqueta_planta(nombre)
+    n = ((fin - inicio).days + 1) * 96
+    if n + FILA_ENCABEZADO_GEN + 2 > MAX_FILAS_EXCEL:
+        raise ValueError(f"{n:,} intervalos superan el máximo de filas de Excel ({MAX_FILAS_EXCEL:,})")
+    t0 = dt.datetime.combine(inicio, dt.time())
+    # Energía por intervalo (kWh): estacional, con ruido y detenciones ocasionales
+    dia_año = (np.arange(n) // 96 + inicio.timetuple().tm_yday) % 365
+    base = potencia_mw * 250 * (0.6 + 0.4 * np.cos(2 * np.pi * (dia_año - 180) / 365))
+    energia = np.clip(base * rng.normal(1, 0.03, n), 0, potencia_mw * 250)
+    energia[rng.random(n) < 0.002] = 0.0
+    potencia = -4 * energia
+    tension = rng.normal(23950, 60, n)
+    corriente = energia / 10.3
+    reactiva = np.abs(rng.normal(75, 10, n))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append([None] * 5 + [f"Central {nombre}"])
+    _filas_vacias(ws, 3)
+    fin_periodo = t0 + dt.timedelta(minutes=15 * n)
+    ws.append([f"{_texto_fecha(t0)} - {_texto_fecha(fin_periodo)} (Local del servidor)"])
+    _filas_vacias(ws, FILA_ENCABEZADO_GEN - 6)
+    encabezado = [COL_FECHA_GEN] + [None] * 13
+    for col, texto in COLUMNAS_MEDIDOR:
+        encabezado[col] = f"APORTE.{etiqueta}\n{texto}"
+    ws.append(encabezado)
+    paso = dt.timedelta(minutes=15)
+    for i in range(n):
+        t = t0 + paso * (i + 1)
+        ws.append([_texto_fecha(t), None, float(corriente[i]), 0, None, None, float(energia[i]),
+                   float(reactiva[i]), None, 0, float(potencia[i]), float(reactiva[i] * 4), float(tension[i]), None])
+    ws.append([f"ID: {uuid.UUID(int=int(rng.integers(0, 2**63)))}"])
+    wb.save(destino)
+    return destino
+
+
+def generar(salida, años=10, hasta=2025, plantas=("El Canelo",), años_intervalos=1, libros=1,
+            asientos_año=2000, semilla=0):
+    # Devuelve {planta: [rutas escritas]}
+    salida = Path(salida)
+    inicio = dt.date(hasta - años + 1, 1, 1)
+    fin = dt.date(hasta, 12, 31)
+    escritos = {}
+    for i, nombre in enumerate(plantas):
+        rng = np.random.default_rng(semilla + i)
+        carpeta = salida if len(plantas) == 1 else salida / etiqueta_planta(nombre).lower()
+        carpeta.mkdir(parents=True, exist_ok=True)
+        potencia_mw = round(float(rng.uniform(1.5, 6.0)), 1) if i else 2.5
+        dias, mm = _serie_diaria(rng, inicio, fin)
+        historia = _serie_mensual(rng, dias, mm, potencia_mw)
+        rutas = [
+            escribir_libro_hec(carpeta / f"HEC mensuales {año}.xlsx", rng, dias, mm, historia, año, nombre, potencia_mw,
+                               asientos_año)
+            for año in range(hasta - libros + 1, hasta + 1)
+        ]
+        if años_intervalos:
+            rutas.append(escribir_exportacion_medidor(
+                carpeta / f"Generacion Central {nombre}.xlsx", rng, dt.date(hasta - años_intervalos + 1, 1, 1), fin, nombre, potencia_mw,
+            ))
+        escritos[nombre] = rutas
+    return escritos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera libros HEC y exportaciones del medidor sintéticos")
+    parser.add_argument("--salida", type=Path, required=True)
+    parser.add_argument("--años", type=int, default=10, help="Años de historia (pluviometría y datos mensuales)")
+    parser.add_argument("--hasta", type=int, default=2025, help="Último año de datos")
+    parser.add_argument("--plantas", nargs="+", default=["El Canelo"])
+    parser.add_argument("--años-intervalos", type=int, default=1,
+                        help="Años de intervalos de 15 minutos en la exportación del medidor (0 para omitirla)")
+    parser.add_argument("--libros", type=int, default=1, help="Libros anuales a escribir, terminando en --hasta")
+    parser.add_argument("--asientos-año", type=int, default=2000, help="Filas del Mayor por año")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    if not 1 <= args.libros <= args.años:
+        parser.error("--libros debe estar entre 1 y --años")
+    if args.salida.resolve().is_relative_to((BASE_DIR / "data").resolve()):
+        parser.error("--salida no puede estar dentro de data/ (usar una carpeta temporal)")
+
+    escritos = generar(args.salida, args.años, args.hasta, args.plantas, args.años_intervalos,
+                       args.libros, args.asientos_año, args.semilla)
+    for nombre, rutas in escritos.items():
+        for ruta in rutas:
+            print(f"✅ {nombre}: {ruta} ({ruta.stat().st_size / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import io
+import numbers
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from docx import Document
+from docx.shared import Inches, Pt, RGBColor
+from matplotlib.figure import Figure
+
+from presentacion import AÑOS_PROMEDIO, MESES_CORTOS, MESES_LABELS, PALETTE, TENDENCIAS, series_tendencia, tarjetas_kpi, texto_delta
+
+# === INFORME WORD ===
+# Documento .docx con los KPIs, los gráficos (renderizados con matplotlib, sin
+# navegador) y el Estado de Resultado operativo. Se construye a pedido en un hilo
+# aparte y se guarda por (año, mes, firma de los datos) para que las descargas
+# repetidas sean inmediatas; los pedidos reemplazados o desalojados que aún no
+# empezaron se cancelan.
+TITULO = "Reporte Operativo y Financiero - {}"
+MAX_INFORMES = 24
+
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+    return io.BytesIO(buf.getvalue())
+
+
+def _grafico_diario(df_dia, mes_nombre, año, central):
+    # API orientada a objetos de matplotlib (sin pyplot): segura fuera del hilo principal
+    fig = Figure(figsize=(9, 4))
+    ax = fig.subplots()
+    ax.plot(df_dia["Fecha"], df_dia["AporteCanelo_kWh"], marker="o", color=PALETTE[1], linewidth=2)
+    ax.set_title(f"Generación Diaria - {central} ({mes_nombre} {año})", fontweight="bold")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Energía generada (kWh)")
+    ax.grid(alpha=0.3)
+    fig.autofmt_xdate()
+    return _png(fig)
+
+
+def _grafico_tendencia(df, col_valor, col_label, nombre, año, base=None, ventana=AÑOS_PROMEDIO):
+    actual, anterior, prom = series_tendencia(df, "Fecha", col_valor, año, base)
+    fig = Figure(figsize=(9, 4))
+    ax = fig.subplots()
+    nan = float("nan")
+    ax.plot(MESES_CORTOS, [nan if v is None else v for v in actual], marker="o", color=PALETTE[0], linewidth=2.5, label=str(año))
+    ax.plot(MESES_CORTOS, [nan if v is None else v for v in anterior], marker="o", color=PALETTE[1], linestyle=":", label=str(año - 1))
+    ax.plot(MESES_CORTOS, [nan if v is None else v for v in prom], marker="o", color=PALETTE[2], linestyle="--", label=f"Promedio {ventana}A")
+    ax.set_title(nombre, fontweight="bold")
+    ax.set_xlabel("Mes")
+    ax.set_ylabel(col_label)
+    ax.grid(alpha=0.3)
+    ax.legend()
+    return _png(fig)
+
+
+def _tabla_kpis(doc, subtitulo, tarjetas, año, ventana):
+    doc.add_heading(subtitulo, level=2)
+    tabla = doc.add_table(rows=1, cols=4)
+    tabla.style = "Light Grid Accent 1"
+    for celda, texto in zip(tabla.rows[0].cells, ["Indicador", "Valor", f"Δ vs {año - 1}", f"Δ vs Promedio {ventana}A"]):
+        celda.text = texto
+    for titulo, valor, delta_anterior, delta_promedio in tarjetas:
+        fila = tabla.add_row().cells
+        fila[0].text, fila[1].text = titulo, valor
+        for celda, delta in zip(fila[2:], [delta_anterior, delta_promedio]):
+            run = celda.paragraphs[0].add_run(delta)
+            if delta != "N/A":
+                run.font.color.rgb = RGBColor(0x2C, 0xA0, 0x2C) if delta.startswith("+") else RGBColor(0xD6, 0x27, 0x28)
+
+
+def _tabla_estado(doc, df_estado, año):
+    doc.add_heading(f"Estado de Resultado Operativo Período {año}", level=2)
+    tabla = doc.add_table(rows=1, cols=len(df_estado.columns))
+    tabla.style = "Light Grid Accent 1"
+    for celda, col in zip(tabla.rows[0].cells, df_estado.columns):
+        celda.text = str(col)
+    for fila in df_estado.itertuples(index=False):
+        celdas = tabla.add_row().cells
+        for celda, valor in zip(celdas, fila):
+            if pd.isna(valor):
+                celda.text = ""
+            elif isinstance(valor, numbers.Number):
+                celda.text = f"{valor:,.0f}"
+            else:
+                celda.text = str(valor)
+            for p in celda.paragraphs:
+                for run in p.runs:
+                    run.font.size = Pt(8)
+
+
+def construir_informe_word(titulo, central, año, mes, kpi, df_dia, df_hist, df_pluv, df_estado_op, logo=None, base=None,
+                           ventana=AÑOS_PROMEDIO):
+    # titulo: el de la central en el registro ("Hidroeléctrica El Canelo"); central: rótulo del
+    # gráfico diario ("Central El Canelo"); logo: bytes de imagen (p. ej. recursos.imagen_optimizada);
+    # base: consulta de linea_base.consultar_base para el año y la ventana de los promedios
+    mes_nombre = MESES_LABELS[mes - 1]
+    tarjetas = tarjetas_kpi(kpi, formato_delta=texto_delta)
+    doc = Document()
+    if logo:
+        doc.add_picture(io.BytesIO(logo), width=Inches(1.5))
+    doc.add_heading(TITULO.format(titulo), level=0)
+    doc.add_paragraph(f"Período: {mes_nombre} {año}")
+
+    _tabla_kpis(doc, "KPIs Mensuales (solo mes seleccionado)", tarjetas["mensual"], año, ventana)
+    _tabla_kpis(doc, "KPIs Acumulados (enero a mes seleccionado)", tarjetas["acumulado"], año, ventana)
+
+    doc.add_heading("Generación Diaria", level=2)
+    if df_dia is not None and not df_dia.empty:
+        doc.add_picture(_grafico_diario(df_dia, mes_nombre, año, central), width=Inches(6.5))
+    else:
+        doc.add_paragraph(f"No hay datos diarios disponibles para {mes_nombre}.")
+
+    doc.add_heading(f"Tendencias Mensuales: Actual, Año Anterior y Promedio {ventana}A", level=2)
+    fuentes = {"historicos": df_hist, "pluviometria": df_pluv}
+    for fuente, col_valor, col_label, nombre in TENDENCIAS:
+        doc.add_picture(_grafico_tendencia(
+            fuentes[fuente], col_valor, col_label, nombre, año, None if base is None else base[col_valor]["mes"], ventana,
+        ), width=Inches(6.5))
+
+    if df_estado_op is not None and not df_estado_op.empty:
+        _tabla_estado(doc, df_estado_op, año)
+
+    doc.add_paragraph(f"Reporte generado el {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')}")
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+class GeneradorInformes:
+    # Construye los informes en segundo plano y conserva los últimos MAX_INFORMES por clave
+    def __init__(self, max_informes=MAX_INFORMES):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="informe-word")
+        self._futuros = OrderedDict()
+        self._lock = threading.Lock()
+        self._max = max_informes
+
+    def solicitar(self, clave, *args, **kwargs):
+        with self._lock:
+            futuro = self._futuros.get(clave)
+            if futuro is None:
+                futuro = self._pool.submit(construir_informe_word, *args, **kwargs)
+                self._futuros[clave] = futuro
+            self._futuros.move_to_end(clave)
+            while len(self._futuros) > self._max:
+                self._futuros.popitem(last=False)[1].cancel()
+            return futuro
+
+    def cancelar(self, clave):
+        # Pedido reemplazado: se descarta si sigue en cola; si ya empezó, termina y queda guardado
+        with self._lock:
+            futuro = self._futuros.get(clave)
+            if futuro is not None and futuro.cancel():
+                del self._futuros[clave]
+
+    def obtener(self, clave):
+        with self._lock:
+            return self._futuros.get(clave)
@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import CACHE_DIR, huella_archivo, nombre_cache
+from datos import COL_APORTE, COL_FECHA_GEN, agregar_generacion, intervalos_vacios, leer_intervalos_nuevos
+from perfil import etapa, fallo_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# === INGESTA INCREMENTAL DE LA EXPORTACIÓN DEL MEDIDOR ===
+# La exportación de 15 minutos solo crece al final. Por cada libro se guarda en
+# data/.cache/generacion/<libro>/:
+#   partes/NNNNN.parquet  intervalos ingeridos, una parte por ingesta
+#   diaria.parquet, mensual.parquet  agregados actualizados con cada parte nueva
+#   serie_t.i8, serie_v.f4  serie cruda en arreglos binarios planos (ns desde epoch,
+#                           kWh en float32), ordenada y solo anexada; se lee con memmap
+#   estado.json  huella del archivo y posición (fila y fecha) de lo último leído
+# Un cambio en el archivo solo obliga a leer las filas posteriores a esa posición; si la fila
+# guardada ya no tiene la misma fecha (exportación reemplazada o corregida) el almacén se
+# reconstruye con el archivo completo. Para forzarlo:
+#   python ingesta_generacion.py --reconstruir [--planta canelo]
+# Las escrituras se serializan con un lock de archivo (.lock) además del de hilos: también
+# ingieren los procesos de preparar_flota y otras instancias del servidor. estado.json se
+# reemplaza al final, así que los lectores sin lock ven el almacén anterior o el nuevo.
+STORE_DIR = CACHE_DIR / "generacion"
+VERSION_STORE = 2
+MAX_PARTES = 64
+SERIE = {"t": ("serie_t.i8", np.int64), "v": ("serie_v.f4", np.float32)}
+
+logger = logging.getLogger(__name__)
+# Un lock por almacén: las exportaciones de distintas centrales se ingieren en paralelo
+_locks = {}
+_locks_lock = threading.Lock()
+ESPERA_LOCK_S = 0.1
+
+
+def _dir_store(path):
+    return STORE_DIR / nombre_cache(path)
+
+
+def _lock_hilos(dir_store):
+    with _locks_lock:
+        return _locks.setdefault(dir_store, threading.Lock())
+
+
+def _bloquear(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(ESPERA_LOCK_S)
+
+
+def _desbloquear(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _lock_store(dir_store):
+    # Exclusivo entre hilos y entre procesos; el lock de archivo se libera solo si el proceso muere
+    with _lock_hilos(dir_store):
+        dir_store.mkdir(parents=True, exist_ok=True)
+        with open(dir_store / ".lock", "a+b") as f:
+            f.seek(0)
+            _bloquear(f)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                _desbloquear(f)
+
+
+def _leer_estado(dir_store):
+    try:
+        estado = json.loads((dir_store / "estado.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if estado.get("version") != VERSION_STORE:
+        return None
+    return estado
+
+
+def _escribir_parquet(df, destino):
+    tmp = destino.with_name(f".{destino.name}.tmp")
+    df.to_parquet(tmp)
+    tmp.replace(destino)
+
+
+def _compactar(dir_partes):
+    partes = sorted(dir_partes.glob("*.parquet"))
+    if len(partes) <= MAX_PARTES:
+        return
+    df = pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True)
+    _escribir_parquet(df, dir_partes / partes[-1].name)
+    for p in partes[:-1]:
+        p.unlink()
+
+
+def _anexar_serie(dir_store, nuevos, n_previo):
+    # Trunca a n_previo (descarta restos de una ingesta interrumpida) y anexa los intervalos nuevos.
+    # Al reconstruir (n_previo 0) se escribe un archivo nuevo y se reemplaza: los memmap abiertos
+    # por leer_serie siguen apuntando al anterior y nunca ven el archivo achicarse.
+    nuevos = nuevos.drop_duplicates("FechaHora", keep="last").sort_values("FechaHora")
+    datos = {"t": nuevos["FechaHora"].to_numpy("datetime64[ns]").view(np.int64), "v": nuevos["AporteCanelo_kWh"].to_numpy()}
+    for clave, (nombre, dtype) in SERIE.items():
+        p = dir_store / nombre
+        if n_previo == 0 or not p.exists():
+            tmp = p.with_name(f".{nombre}.tmp")
+            datos[clave].astype(dtype).tofile(tmp)
+            tmp.replace(p)
+            continue
+        with open(p, "r+b") as f:
+            f.truncate(n_previo * np.dtype(dtype).itemsize)
+            f.seek(0, 2)
+            datos[clave].astype(dtype).tofile(f)
+    return n_previo + len(nuevos)
+
+
+def leer_serie(path):
+    # (t, v) de todos los intervalos ingeridos, como memmap de solo lectura (sin copiar a memoria)
+    dir_store = _dir_store(path)
+    n = (_leer_estado(dir_store) or {}).get("intervalos", 0)
+    if not n:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return tuple(np.memmap(dir_store / nombre, dtype=dtype, mode="r", shape=(n,)) for nombre, dtype in SERIE.values())
+
+
+def store_vigente(path, col_aporte=COL_APORTE, col_fecha=COL_FECHA_GEN):
+    # True si el almacén ya refleja el contenido actual del archivo (no hay nada que leer)
+    estado = _leer_estado(_dir_store(path))
+    return (estado is not None and estado.get("columnas") == [col_fecha, col_aporte]
+            and estado["huella"] == huella_archivo(path)["sha256"])
+
+
+def ingerir_generacion(path, reconstruir=False, col_aporte=COL_APORTE, col_fecha=COL_FECHA_GEN):
+    # Actualiza el almacén del libro con los intervalos nuevos y devuelve sus agregados
+    path = Path(path)
+    with etapa("store generación", cacheada=True, libro=path.name):
+        return _ingerir(path, reconstruir, col_aporte, col_fecha)
+
+
+def _ingerir(path, reconstruir, col_aporte, col_fecha):
+    dir_store = _dir_store(path)
+    dir_partes = dir_store / "partes"
+    columnas = [col_fecha, col_aporte]
+    with _lock_store(dir_store):
+        huella = huella_archivo(path)
+        estado = None if reconstruir else _leer_estado(dir_store)
+        if estado is not None and estado.get("columnas") != columnas:
+            estado = None
+        if estado is not None and estado["huella"] == huella["sha256"]:
+            return leer_agregados(path)
+
+        fallo_cache()
+        with etapa("lectura intervalos", libro=path.name) as r:
+            nuevos, posicion, completa = leer_intervalos_nuevos(
+                path, estado["posicion"] if estado else None, col_aporte=col_aporte, col_fecha=col_fecha)
+            r["filas"] = len(nuevos)
+            r["reanudada"] = not completa
+        if completa and estado is not None:
+            logger.info("Exportación %s reemplazada: se reconstruye el almacén", path.name)
+            estado = None
+        if estado is None:
+            for p in dir_partes.glob("*.parquet") if dir_partes.exists() else []:
+                p.unlink()
+            df_diaria = None
+            n_intervalos = 0
+        else:
+            df_diaria = pd.read_parquet(dir_store / "diaria.parquet")
+            n_intervalos = estado.get("intervalos", 0)
+        dir_partes.mkdir(parents=True, exist_ok=True)
+        if not nuevos.empty or estado is None:
+            df_diaria, df_mensual = agregar_generacion(nuevos, df_diaria)
+            if not nuevos.empty:
+                n = (estado or {}).get("partes", 0)
+                _escribir_parquet(nuevos, dir_partes / f"{n:05d}.parquet")
+                _compactar(dir_partes)
+            n_intervalos = _anexar_serie(dir_store, nuevos, n_intervalos)
+            _escribir_parquet(df_diaria, dir_store / "diaria.parquet")
+            _escribir_parquet(df_mensual, dir_store / "mensual.parquet")
+        logger.info("Ingesta de %s: %d intervalos nuevos", path.name, len(nuevos))
+
+        previo = estado["posicion"] if estado else None
+        estado = {
+            "version": VERSION_STORE,
+            "fuente": path.name,
+            "columnas": columnas,
+            "huella": huella["sha256"],
+            "posicion": posicion or previo,
+            "partes": (estado or {}).get("partes", 0) + (0 if nuevos.empty else 1),
+            "intervalos": n_intervalos,
+        }
+        tmp = dir_store / ".estado.json.tmp"
+        tmp.write_text(json.dumps(estado, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, dir_store / "estado.json")
+        return leer_agregados(path)
+
+
+def leer_agregados(path):
+    dir_store = _dir_store(path)
+    return {
+        "diaria": pd.read_parquet(dir_store / "diaria.parquet"),
+        "mensual": pd.read_parquet(dir_store / "mensual.parquet"),
+    }
+
+
+def leer_intervalos_store(path):
+    partes = sorted((_dir_store(path) / "partes").glob("*.parquet"))
+    if not partes:
+        return intervalos_vacios()
+    return pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True)
+
+
+def main():
+    # Importado aquí: plantas usa este módulo
+    from plantas import cargar_registro
+
+    registro = cargar_registro()
+    parser = argparse.ArgumentParser(description="Ingiere las exportaciones del medidor de las centrales registradas")
+    parser.add_argument("--planta", nargs="+", choices=list(registro), help="Centrales a ingerir (todas por omisión)")
+    parser.add_argument("--reconstruir", action="store_true", help="Descarta el almacén y relee la exportación completa")
+    args = parser.parse_args()
+    for pid in args.planta or list(registro):
+        planta = registro[pid]
+        if not planta["generacion"].exists():
+            print(f"⚠️ {planta['nombre']}: no existe {planta['generacion']}")
+            continue
+        diaria = ingerir_generacion(planta["generacion"], args.reconstruir, planta["col_aporte"], planta["col_fecha"])["diaria"]
+        print(f"✅ {planta['nombre']}: {len(diaria)} días")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+
+# === CUBO DE KPIs AÑO × MES × MÉTRICA ===
+# Se construye una vez por carga de datos. Todas las consultas (mes, acumulado
+# enero-mes, año anterior, promedio de N años previos) son lecturas directas de
+# arreglos: sumas prefijas por mes (acumulados) y por año (promedios móviles).
+METRICAS = {
+    "Generacion": "historicos",
+    "Ventas": "historicos",
+    "Precipitacion": "pluviometria",
+}
+
+
+def _prefijo_años(x):
+    # Fila extra de ceros para que suma(años a..b) = p[b+1] - p[a]
+    return np.concatenate([np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)])
+
+
+def construir_cubo_kpi(df_hist, df_pluv):
+    fuentes = {"historicos": df_hist, "pluviometria": df_pluv}
+    años = np.concatenate([df["Año"].to_numpy() for df in fuentes.values() if not df.empty] or [np.array([0])])
+    año_min, año_max = int(años.min()), int(años.max())
+    n_años, n_met = año_max - año_min + 1, len(METRICAS)
+
+    suma = np.zeros((n_años, 12, n_met))
+    filas = np.zeros((n_años, 12, n_met))
+    for k, (metrica, fuente) in enumerate(METRICAS.items()):
+        df = fuentes[fuente]
+        if df.empty:
+            continue
+        g = df.groupby(["Año", "Mes"])[metrica].agg(["sum", "size"])
+        ai = g.index.get_level_values("Año").to_numpy() - año_min
+        mi = g.index.get_level_values("Mes").to_numpy() - 1
+        suma[ai, mi, k] = g["sum"].to_numpy()
+        filas[ai, mi, k] = g["size"].to_numpy()
+
+    acum = np.cumsum(suma, axis=1)
+    hay_mes = filas > 0
+    hay_año = np.broadcast_to(hay_mes.any(axis=1, keepdims=True), hay_mes.shape)
+    return {
+        "año_min": año_min,
+        "metricas": list(METRICAS),
+        "suma": suma,
+        "acum": acum,
+        # Promedio mensual: años con datos en ese mes; acumulado: años con algún dato
+        "p_suma": _prefijo_años(np.where(hay_mes, suma, 0.0)),
+        "p_n_mes": _prefijo_años(hay_mes.astype(float)),
+        "p_acum": _prefijo_años(np.where(hay_año, acum, 0.0)),
+        "p_n_año": _prefijo_años(hay_año.astype(float)),
+    }
+
+
+def _ventana(prefijo, año_min, desde, hasta, mi, k):
+    n = prefijo.shape[0] - 1
+    a = min(max(desde - año_min, 0), n)
+    b = min(max(hasta - año_min + 1, 0), n)
+    return prefijo[b, mi, k] - prefijo[a, mi, k]
+
+
+def _celda(arr, año_min, año, mi, k):
+    ai = año - año_min
+    if 0 <= ai < arr.shape[0]:
+        return float(arr[ai, mi, k])
+    return 0.0
+
+
+def valores_kpi(cubo, año, mes, n_años=5, base=None):
+    # dict métrica -> mes, mes_anterior, mes_prom, acum, acum_anterior, acum_prom
+    # base: consulta de linea_base.consultar_base; si se pasa, los promedios se leen de ella
+    año_min, mi = cubo["año_min"], mes - 1
+    desde, hasta = año - n_años, año - 1
+    resultado = {}
+    for k, metrica in enumerate(cubo["metricas"]):
+        n_mes = _ventana(cubo["p_n_mes"], año_min, desde, hasta, mi, k)
+        n_año = _ventana(cubo["p_n_año"], año_min, desde, hasta, mi, k)
+        resultado[metrica] = {
+            "mes": _celda(cubo["suma"], año_min, año, mi, k),
+            "mes_anterior": _celda(cubo["suma"], año_min, año - 1, mi, k),
+            "mes_prom": _ventana(cubo["p_suma"], año_min, desde, hasta, mi, k) / n_mes if n_mes else float("nan"),
+            "acum": _celda(cubo["acum"], año_min, año, mi, k),
+            "acum_anterior": _celda(cubo["acum"], año_min, año - 1, mi, k),
+            "acum_prom": _ventana(cubo["p_acum"], año_min, desde, hasta, mi, k) / n_año if n_año else float("nan"),
+        }
+        if base is not None:
+            resultado[metrica]["mes_prom"] = float(base[metrica]["mes"]["media"][mi])
+            resultado[metrica]["acum_prom"] = float(base[metrica]["acum"]["media"][mi])
+    return resultado
@@ -0,0 +1,206 @@
+import json
+import os
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import CACHE_DIR, firma_archivo, nombre_cache
+from kpis import METRICAS
+from particiones import TABLAS_SERIES, candidatos, cargar_particiones, particionar_libro
+from perfil import etapa
+
+# === LÍNEA BASE MÓVIL MATERIALIZADA ===
+# Por central se guarda en data/.cache/lineas_base/<carpeta>/:
+#   mensuales.parquet  total de cada métrica por año y mes (Año, Mes, Metrica, Total)
+#   base.parquet       por año objetivo, mes, métrica, ventana (VENTANAS años anteriores) y tipo
+#                      ("mes" o "acum" enero-mes): media, mínimo, máximo, p10, p50, p90 y n
+#   estado.json        firma del libro que aportó cada año y años objetivo ya calculados
+# Al actualizar solo se leen los años cuyo libro fuente cambió (el año en curso, o el que se
+# cierra al llegar el libro del año siguiente) y solo se recalculan los años objetivo cuya
+# ventana los incluye. Cambiar la ventana es elegir otras filas de base.parquet.
+# Mismo criterio que kpis.py: el promedio mensual usa los años con datos en ese mes y el
+# acumulado los años con algún dato.
+BASE_DIR_STORE = CACHE_DIR / "lineas_base"
+VERSION_BASE = 2
+VENTANAS = (5, 10, 20)
+PERCENTILES = (10, 50, 90)
+ESTADISTICAS = ["media", "minimo", "maximo"] + [f"p{p}" for p in PERCENTILES] + ["n"]
+TIPOS_BASE = ("mes", "acum")
+# Categorías fijas: las tablas de distintas actualizaciones se concatenan sin volver a texto
+TIPO_METRICA = pd.CategoricalDtype(list(METRICAS))
+TIPO_BASE = pd.CategoricalDtype(TIPOS_BASE)
+
+
+def mensuales_vacios():
+    return pd.DataFrame({
+        "Año": pd.Series(dtype="int16"), "Mes": pd.Series(dtype="int8"),
+        "Metrica": pd.Series(dtype=TIPO_METRICA), "Total": pd.Series(dtype="float64"),
+    })
+
+
+def base_vacia():
+    columnas = {"Año": "int16", "Mes": "int8", "Metrica": TIPO_METRICA, "Ventana": "int8", "Tipo": TIPO_BASE}
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in {**columnas, **dict.fromkeys(ESTADISTICAS, "float64")}.items()})
+
+
+def totales_mensuales(df_hist, df_pluv):
+    fuentes = {"historicos": df_hist, "pluviometria": df_pluv}
+    frames = []
+    for metrica, fuente in METRICAS.items():
+        df = fuentes[fuente]
+        if df.empty:
+            continue
+        g = df.groupby(["Año", "Mes"], as_index=False)[metrica].sum().rename(columns={metrica: "Total"})
+        g["Metrica"] = metrica
+        frames.append(g)
+    if not frames:
+        return mensuales_vacios()
+    return pd.concat(frames, ignore_index=True).astype(mensuales_vacios().dtypes.to_dict())[list(mensuales_vacios())]
+
+
+def combinar_mensuales(lista):
+    # Vista de flota: generación y ventas se suman, la precipitación se promedia entre centrales
+    # (mismo criterio que plantas.combinar_series)
+    lista = [m for m in lista if not m.empty]
+    if not lista:
+        return mensuales_vacios()
+    df = pd.concat(lista, ignore_index=True)
+    df.loc[df["Metrica"] == "Precipitacion", "Total"] /= len(lista)
+    return df.groupby(["Año", "Mes", "Metrica"], as_index=False)["Total"].sum().astype(mensuales_vacios().dtypes.to_dict())
+
+
+def calcular_base(mensuales, objetivos, ventanas=VENTANAS):
+    objetivos = np.asarray(sorted(objetivos), dtype=np.int64)
+    if mensuales.empty or objetivos.size == 0:
+        return base_vacia()
+    metricas = list(METRICAS)
+    n_max = max(ventanas)
+    # Cubo año × mes × métrica con NaN donde no hay datos, desde n_max años antes del primer objetivo
+    año_min = int(objetivos[0]) - n_max
+    n_años = int(objetivos[-1]) - año_min
+    m = mensuales[(mensuales["Año"] >= año_min) & (mensuales["Año"] < objetivos[-1])]
+    cubo = np.full((n_años, 12, len(metricas)), np.nan)
+    cubo[m["Año"].to_numpy() - año_min, m["Mes"].to_numpy() - 1, m["Metrica"].cat.codes.to_numpy()] = m["Total"].to_numpy()
+    hay_año = ~np.isnan(cubo).all(axis=1, keepdims=True)
+    series = {"mes": cubo, "acum": np.where(hay_año, np.nancumsum(cubo, axis=1), np.nan)}
+
+    frames = []
+    años, meses, mets = np.meshgrid(objetivos, np.arange(1, 13), np.arange(len(metricas)), indexing="ij")
+    for ventana in ventanas:
+        # (objetivo, año de la ventana) -> fila del cubo: los `ventana` años anteriores al objetivo
+        filas = (objetivos - año_min)[:, None] - ventana + np.arange(ventana)[None, :]
+        for tipo, x in series.items():
+            bloque = x[filas]  # objetivo × ventana × mes × métrica
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # ventanas sin datos -> NaN
+                stats = {
+                    "media": np.nanmean(bloque, axis=1),
+                    "minimo": np.nanmin(bloque, axis=1),
+                    "maximo": np.nanmax(bloque, axis=1),
+                    **{f"p{p}": v for p, v in zip(PERCENTILES, np.nanpercentile(bloque, PERCENTILES, axis=1))},
+                }
+            stats["n"] = (~np.isnan(bloque)).sum(axis=1).astype(float)
+            frames.append(pd.DataFrame({
+                "Año": años.ravel(), "Mes": meses.ravel(), "Metrica": np.asarray(metricas)[mets.ravel()],
+                "Ventana": ventana, "Tipo": tipo, **{s: v.ravel() for s, v in stats.items()},
+            }))
+    return pd.concat(frames, ignore_index=True).astype(base_vacia().dtypes.to_dict())
+
+
+# === ALMACÉN ===
+def años_fuente(libros):
+    # Años cuyas series entran en la base de los años objetivo (los de los libros)
+    if not libros:
+        return range(0)
+    return range(min(libros) - max(VENTANAS), max(libros))
+
+
+def _fuentes(libros, años):
+    # {año: {tabla: firma del libro que lo aporta}} con el criterio de cargar_particiones
+    indices = {}
+    fuentes = {}
+    for año in años:
+        fuentes[año] = {}
+        for tabla in TABLAS_SERIES:
+            for a in candidatos(libros, año):
+                if a not in indices:
+                    indices[a] = particionar_libro(libros[a])[0]
+                if año in indices[a].get(tabla, []):
+                    fuentes[año][tabla] = firma_archivo(libros[a])
+                    break
+    return fuentes
+
+
+def _escribir(destino, mensuales, base, estado):
+    destino.mkdir(parents=True, exist_ok=True)
+    for nombre, df in (("mensuales", mensuales), ("base", base)):
+        fd, tmp = tempfile.mkstemp(prefix=f".{nombre}-", suffix=".parquet", dir=destino)
+        os.close(fd)
+        df.to_parquet(tmp)
+        os.replace(tmp, destino / f"{nombre}.parquet")
+    # estado.json al final: si falta o no coincide, la próxima actualización recalcula
+    fd, tmp = tempfile.mkstemp(prefix=".estado-", suffix=".json", dir=destino)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(tmp, destino / "estado.json")
+
+
+def _leer(destino):
+    try:
+        estado = json.loads((destino / "estado.json").read_text(encoding="utf-8"))
+        if estado.get("version") != VERSION_BASE or estado.get("ventanas") != list(VENTANAS):
+            return None
+        return estado, pd.read_parquet(destino / "mensuales.parquet"), pd.read_parquet(destino / "base.parquet")
+    except (OSError, ValueError):
+        return None
+
+
+def actualizar_base(libros, data_dir):
+    # -> (mensuales, base) de una central; objetivos: los años de sus libros
+    destino = BASE_DIR_STORE / nombre_cache(data_dir)
+    with etapa("línea base", cacheada=True, carpeta=str(data_dir)) as r:
+        objetivos = sorted(libros)
+        if not objetivos:
+            return mensuales_vacios(), base_vacia()
+        fuentes = {str(a): f for a, f in _fuentes(libros, años_fuente(libros)).items()}
+        previo = _leer(destino)
+        estado, mensuales, base = previo or ({"fuentes": {}, "objetivos": []}, mensuales_vacios(), base_vacia())
+        cambiados = [int(a) for a, f in fuentes.items() if estado["fuentes"].get(a) != f]
+        nuevos = set(objetivos) - set(estado["objetivos"])
+        if cambiados or nuevos or set(estado["objetivos"]) - set(objetivos):
+            r["cache"] = "miss"
+            if cambiados:
+                with etapa("totales mensuales", años=len(cambiados)):
+                    nuevos_totales = totales_mensuales(
+                        cargar_particiones(libros, cambiados, "historicos"), cargar_particiones(libros, cambiados, "pluviometria"),
+                    )
+                mensuales = pd.concat([mensuales[~mensuales["Año"].isin(cambiados)], nuevos_totales], ignore_index=True)
+            afectados = nuevos | {t for t in objetivos for a in cambiados if t - max(VENTANAS) <= a < t}
+            base = pd.concat(
+                [base[base["Año"].isin(objetivos) & ~base["Año"].isin(afectados)], calcular_base(mensuales, afectados)],
+                ignore_index=True,
+            ).sort_values(["Ventana", "Año", "Tipo", "Metrica", "Mes"], ignore_index=True)
+            _escribir(destino, mensuales, base, {
+                "version": VERSION_BASE, "ventanas": list(VENTANAS), "fuentes": fuentes, "objetivos": objetivos,
+            })
+        r["filas"] = len(base)
+    return mensuales, base
+
+
+def consultar_base(base, año, ventana):
+    # {métrica: {tipo: {estadística: arreglo de 12 meses}}} (NaN donde no hay años con datos)
+    sel = base[(base["Año"] == año) & (base["Ventana"] == ventana)]
+    resultado = {}
+    for metrica in METRICAS:
+        resultado[metrica] = {}
+        for tipo in TIPOS_BASE:
+            g = sel[(sel["Metrica"] == metrica) & (sel["Tipo"] == tipo)]
+            meses = g["Mes"].to_numpy() - 1
+            resultado[metrica][tipo] = {}
+            for s in ESTADISTICAS:
+                arr = np.full(12, np.nan)
+                arr[meses] = g[s].to_numpy()
+                resultado[metrica][tipo][s] = arr
+    return resultado
@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import posixpath
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string, get_column_letter, range_boundaries
+
+from cache_datos import CACHE_DIR, huella_archivo, nombre_cache
+from perfil import etapa
+
+# === MANIFIESTO DE LOS LIBROS HEC ===
+# Índice JSON por libro (data/.cache/<libro>-<carpeta>/manifiesto.json): hojas con su rango
+# usado y tablas de Excel, y para cada hoja de datos el rango exacto a leer (columnas, fila
+# del encabezado, última fila), filas y años. Se construye una vez por contenido (huella
+# sha256) con verificar_tablas.py, al subir un libro o en el primer parseo; los lectores de
+# datos.py lo consumen para leer solo ese rango, sin recorrer hojas en tiempo de ejecución.
+VERSION_MANIFIESTO = 3
+# Rango de datos de cada hoja: (primera columna, número de columnas, fila del encabezado,
+# última fila o None = hasta el final). Si el libro define la tabla de Excel (ListObject) de
+# TABLAS_EXCEL en la hoja, su referencia reemplaza la columna y las filas de RANGOS_DEFECTO;
+# si no, en las hojas de series se busca el encabezado "Fecha" más cercano a esa fila.
+TABLAS_EXCEL = {"Pluviometria": "Precipitaciones", "Datos Historicos": "DatosHistoricos", "Estado de Resultado": "EstadoResultado"}
+RANGOS_DEFECTO = {
+    "Pluviometria": ("C", 2, 128, None),
+    "Datos Historicos": ("C", 5, 196, None),
+    "Estado de Resultado": ("A", 7, 6, 44),
+}
+# Hojas cuyo rango empieza con una columna de fechas
+HOJAS_SERIES = ("Pluviometria", "Datos Historicos")
+
+logger = logging.getLogger(__name__)
+
+
+# === TABLAS DE EXCEL ===
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _relaciones(z, parte):
+    # {Id: (tipo, ruta dentro del zip)} del .rels de una parte del paquete
+    base = posixpath.dirname(posixpath.dirname(parte))
+    try:
+        raiz = ET.fromstring(z.read(parte))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in raiz.iter(f"{NS_PKG}Relationship"):
+        destino = rel.get("Target", "")
+        destino = destino.lstrip("/") if destino.startswith("/") else posixpath.normpath(posixpath.join(base, destino))
+        rels[rel.get("Id")] = (rel.get("Type", ""), destino)
+    return rels
+
+
+def ruta_rels(parte):
+    return posixpath.join(posixpath.dirname(parte), "_rels", posixpath.basename(parte) + ".rels")
+
+
+def partes_hojas(z):
+    # {hoja: (parte XML de la hoja, {nombre de tabla: parte XML de la tabla})} de un ZipFile abierto
+    partes = {}
+    rels_libro = _relaciones(z, "xl/_rels/workbook.xml.rels")
+    for hoja in ET.fromstring(z.read("xl/workbook.xml")).iter(f"{NS_MAIN}sheet"):
+        _, parte = rels_libro.get(hoja.get(f"{NS_REL}id"), ("", ""))
+        tablas = {}
+        for tipo, destino in _relaciones(z, ruta_rels(parte)).values():
+            if tipo.endswith("/table"):
+                t = ET.fromstring(z.read(destino))
+                tablas[t.get("displayName") or t.get("name")] = destino
+        partes[hoja.get("name")] = (parte, tablas)
+    return partes
+
+
+def tablas_excel(path):
+    # {hoja: {nombre: (ref, filas de encabezado, filas de totales)}} leyendo solo workbook.xml,
+    # los .rels y las partes de tablas: no se abre ninguna hoja (el modo read_only de openpyxl
+    # no expone ws.tables)
+    tablas = {}
+    try:
+        with zipfile.ZipFile(path) as z:
+            for hoja, (_, partes) in partes_hojas(z).items():
+                for nombre, parte in partes.items():
+                    t = ET.fromstring(z.read(parte))
+                    tablas.setdefault(hoja, {})[nombre] = (
+                        t.get("ref"), int(t.get("headerRowCount", 1)), int(t.get("totalsRowCount", 0)),
+                    )
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        logger.warning("No se pudieron leer las tablas de %s: %s", path, e)
+        return {}
+    return tablas
+
+
+def rango_hoja(tablas, hoja):
+    # (columnas "C:D", fila del encabezado, última fila o None) para leer exactamente los datos
+    col, ancho, encabezado, fin = RANGOS_DEFECTO[hoja]
+    tabla = tablas.get(hoja, {}).get(TABLAS_EXCEL[hoja])
+    if tabla is not None:
+        ref, filas_encabezado, filas_totales = tabla
+        min_col, min_fila, _, max_fila = range_boundaries(ref)
+        col = get_column_letter(min_col)
+        encabezado = min_fila if filas_encabezado else min_fila - 1
+        fin = max_fila - filas_totales
+    ultima_col = get_column_letter(column_index_from_string(col) + ancho - 1)
+    return f"{col}:{ultima_col}", encabezado, fin
+
+
+# === CONSTRUCCIÓN ===
+def _detectar_encabezado(valores, encabezado):
+    # Celda "Fecha" seguida de una fecha; entre varias, la más cercana a la fila de siempre
+    filas = [
+        n for n, (v, siguiente) in enumerate(zip(valores, valores[1:]), start=1)
+        if isinstance(v, str) and v.strip().lower() == "fecha" and isinstance(siguiente, datetime)
+    ]
+    return min(filas, key=lambda n: abs(n - encabezado)) if filas else encabezado
+
+
+def _texto_celda(v):
+    # Texto de una celda del encabezado que no es texto (número, fecha)
+    if isinstance(v, datetime):
+        return f"{v:%d-%m-%Y}"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _titulos(fila):
+    # Texto exacto de cada celda (sin recortar): es el nombre de columna de la tabla de Excel,
+    # que debe coincidir con la celda o Excel pide reparar el libro
+    return [None if v is None else v if isinstance(v, str) else _texto_celda(v) for v in fila]
+
+
+def _no_texto(fila):
+    # Posiciones del encabezado con celdas que no son texto: Crear_tabla_excel.py las reescribe
+    return [i for i, v in enumerate(fila) if v is not None and not isinstance(v, str)]
+
+
+def _rango_series(ws, columnas, encabezado, fin, con_tabla):
+    min_col, _, max_col, _ = range_boundaries(columnas)
+    filas = list(ws.iter_rows(min_col=min_col, max_col=max_col, values_only=True))
+    valores = [f[0] for f in filas]
+    if not con_tabla:
+        encabezado = _detectar_encabezado(valores, encabezado)
+    # Última fila con fecha bajo el encabezado, aunque quede fuera de la tabla (Crear_tabla_excel.py
+    # la usa para extender la tabla cuando se agregan meses)
+    fechas = [(n, v) for n, v in enumerate(valores[encabezado:], start=encabezado + 1) if isinstance(v, datetime)]
+    fin_datos = fechas[-1][0] if fechas else None
+    if not con_tabla:
+        # La última fecha cierra el rango: el lector no recorre filas vacías o notas al pie
+        fin = fin_datos
+    fechas = [v for n, v in fechas if fin is None or n <= fin]
+    return {
+        "encabezado": encabezado,
+        "fin": fin,
+        "fin_datos": fin_datos,
+        "titulos": _titulos(filas[encabezado - 1]) if 0 < encabezado <= len(filas) else [],
+        "titulos_no_texto": _no_texto(filas[encabezado - 1]) if 0 < encabezado <= len(filas) else [],
+        "filas": len(fechas),
+        "años": [min(v.year for v in fechas), max(v.year for v in fechas)] if fechas else None,
+    }
+
+
+def _rango_fijo(ws, columnas, encabezado, fin):
+    # Hojas sin columna de fechas (Estado de Resultado): se lee el rango de la tabla o el de
+    # siempre; fin_datos es la última fila con texto en la primera columna dentro de ese rango
+    min_col, _, max_col, _ = range_boundaries(columnas)
+    filas = list(ws.iter_rows(min_row=encabezado, max_row=fin, min_col=min_col, max_col=max_col, values_only=True))
+    con_datos = [n for n, f in enumerate(filas[1:], start=encabezado + 1) if f and f[0] is not None]
+    return {
+        "encabezado": encabezado,
+        "fin": fin,
+        "fin_datos": con_datos[-1] if con_datos else None,
+        "titulos": _titulos(filas[0]) if filas else [],
+        "titulos_no_texto": _no_texto(filas[0]) if filas else [],
+        "filas": None if fin is None else fin - encabezado,
+        "años": None,
+    }
+
+
+def construir_manifiesto(path, wb=None):
+    # Una pasada read_only: dimensiones de cada hoja y las columnas del rango de las hojas de series.
+    # wb: el libro ya abierto por quien lo va a leer (datos.leer_hec), para no abrirlo dos veces
+    path = Path(path)
+    with etapa("indexar libro", libro=path.name):
+        tablas = tablas_excel(path)
+        propio = wb is None
+        if propio:
+            wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            hojas = {}
+            for ws in wb.worksheets:
+                # Excel siempre guarda <dimension>; sin ella (escritores en streaming) no se recorre la hoja
+                hojas[ws.title] = {
+                    "dimension": ws.calculate_dimension() if ws.max_row and ws.max_column else None,
+                    "filas": ws.max_row,
+                    "columnas": ws.max_column,
+                    "tablas": {n: {"ref": ref, "encabezado": e, "totales": t} for n, (ref, e, t) in tablas.get(ws.title, {}).items()},
+                }
+            rangos = {}
+            for hoja in RANGOS_DEFECTO:
+                if hoja not in wb.sheetnames:
+                    continue
+                columnas, encabezado, fin = rango_hoja(tablas, hoja)
+                con_tabla = TABLAS_EXCEL[hoja] in tablas.get(hoja, {})
+                rango = {"columnas": columnas, "origen": "tabla" if con_tabla else "posicion"}
+                if hoja in HOJAS_SERIES:
+                    rango.update(_rango_series(wb[hoja], columnas, encabezado, fin, con_tabla))
+                else:
+                    rango.update(_rango_fijo(wb[hoja], columnas, encabezado, fin))
+                rangos[hoja] = rango
+        finally:
+            if propio:
+                wb.close()
+    return {
+        "version": VERSION_MANIFIESTO,
+        "fuente": path.name,
+        "huella": huella_archivo(path),
+        "hojas": hojas,
+        "rangos": rangos,
+    }
+
+
+# === LECTURA Y ESCRITURA ===
+def ruta_manifiesto(path):
+    return CACHE_DIR / nombre_cache(path) / "manifiesto.json"
+
+
+def guardar_manifiesto(path, manifiesto):
+    destino = ruta_manifiesto(path)
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".manifiesto-", suffix=".json", dir=destino.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, destino)
+    except OSError as e:
+        logger.warning("No se pudo escribir el manifiesto de %s: %s", path, e)
+
+
+def leer_manifiesto(path):
+    # None si no existe o si corresponde a otro contenido o versión
+    try:
+        manifiesto = json.loads(ruta_manifiesto(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifiesto.get("version") != VERSION_MANIFIESTO:
+        return None
+    if manifiesto.get("huella", {}).get("sha256") != huella_archivo(path)["sha256"]:
+        return None
+    return manifiesto
+
+
+def manifiesto_libro(path, forzar=False, wb=None):
+    manifiesto = None if forzar else leer_manifiesto(path)
+    if manifiesto is None:
+        manifiesto = construir_manifiesto(path, wb)
+        guardar_manifiesto(path, manifiesto)
+    return manifiesto
+
+
+def rangos_libro(path, wb=None):
+    # {hoja: (columnas, fila del encabezado, última fila)} para los lectores de datos.py
+    rangos = manifiesto_libro(path, wb=wb)["rangos"]
+    return {
+        hoja: (rangos[hoja]["columnas"], rangos[hoja]["encabezado"], rangos[hoja]["fin"]) if hoja in rangos
+        else rango_hoja({}, hoja)
+        for hoja in RANGOS_DEFECTO
+    }
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from particiones import cargar_particiones
+from perfil import etapa
+
+# === LIBRO MAYOR ===
+# Las líneas de la hoja "Mayor" se normalizan al particionar cada libro (particiones.py) y cada
+# año se toma del libro de ese año o, si no lo trae, del primero posterior. Las de los años
+# pedidos se compactan en una tabla ordenada por cuenta, año y mes,
+# con cuenta, descripción y glosa como categorías. Se agregan una vez en un cubo
+# cuenta × año × mes (debe, haber, neto = debe - haber, acumulado enero-mes, asientos):
+# la serie mensual de una cuenta y el ranking de cuentas por acumulado son lecturas del cubo,
+# y los asientos de una cuenta en un mes, un corte de la tabla por búsqueda binaria.
+# Nombres de columna aceptados (en mayúsculas, como los deja datos._leer_mayor)
+COLUMNAS_MAYOR = {
+    "Cuenta": ("CUENTA", "CODIGO", "CÓDIGO"),
+    "Descripcion": ("DESCRIPCION", "DESCRIPCIÓN", "NOMBRE CUENTA", "NOMBRE"),
+    "Glosa": ("GLOSA", "DETALLE", "CONCEPTO"),
+    "Debe": ("DEBE", "CARGO"),
+    "Haber": ("HABER", "ABONO"),
+    "Monto": ("MONTO", "IMPORTE"),
+}
+TOP_CUENTAS = 10
+
+
+def _columna(df, clave):
+    return next((c for c in COLUMNAS_MAYOR[clave] if c in df.columns), None)
+
+
+def _texto(serie):
+    # Códigos numéricos (4100.0 al leerse con vacíos) como "4100"
+    if pd.api.types.is_numeric_dtype(serie):
+        enteros = serie.dropna()
+        if (enteros == enteros.round()).all():
+            return serie.astype("Int64").astype("string")
+    return serie.astype("string").str.strip()
+
+
+def lineas_libro(df_mayor):
+    # Líneas con fecha de la tabla "mayor" de un libro, con las columnas de particiones.ESQUEMAS["mayor"]
+    cuenta, descripcion = _columna(df_mayor, "Cuenta"), _columna(df_mayor, "Descripcion")
+    if "FECHA" not in df_mayor.columns or (cuenta is None and descripcion is None):
+        return None
+    df = df_mayor.dropna(subset=["FECHA"])
+    codigo = _texto(df[cuenta or descripcion])
+    glosa, debe, haber, monto = (_columna(df, c) for c in ("Glosa", "Debe", "Haber", "Monto"))
+    if debe is None and haber is None and monto is not None:
+        # Monto con signo: positivo al debe, negativo al haber
+        valores = pd.to_numeric(df[monto], errors="coerce").fillna(0.0)
+        col_debe, col_haber = valores.clip(lower=0), (-valores).clip(lower=0)
+    else:
+        col_debe, col_haber = (
+            pd.to_numeric(df[c], errors="coerce").fillna(0.0) if c else pd.Series(0.0, index=df.index) for c in (debe, haber)
+        )
+    return pd.DataFrame({
+        "Fecha": df["FECHA"],
+        "Año": df["FECHA"].dt.year.astype("int16"),
+        "Mes": df["FECHA"].dt.month.astype("int8"),
+        "Cuenta": codigo,
+        "Descripcion": _texto(df[descripcion]) if descripcion else codigo,
+        "Glosa": _texto(df[glosa]) if glosa else pd.Series(pd.NA, index=df.index, dtype="string"),
+        "Debe": col_debe.astype("float64"),
+        "Haber": col_haber.astype("float64"),
+    }).dropna(subset=["Cuenta"])
+
+
+def cargar_mayor(libros, años):
+    # Líneas de los años pedidos (el de consulta y el anterior), categorizadas una sola vez al final
+    # (las categorías deben ser las mismas para todos los años)
+    lineas = cargar_particiones(libros, años, "mayor")
+    for col in ("Cuenta", "Descripcion", "Glosa"):
+        lineas[col] = lineas[col].astype("category")
+    return lineas
+
+
+def construir_mayor(lineas):
+    # Cubo cuenta × año × mes y tabla de líneas ordenada por (cuenta, año, mes) con su clave
+    with etapa("motor mayor") as r:
+        lineas = lineas.sort_values(["Cuenta", "Año", "Mes", "Fecha"], ignore_index=True)
+        cuentas = lineas["Cuenta"].cat.categories
+        año_min = int(lineas["Año"].min()) if not lineas.empty else 0
+        n_años = int(lineas["Año"].max()) - año_min + 1 if not lineas.empty else 0
+        forma = (len(cuentas), n_años, 12)
+        # Clave lineal de la celda de cada línea: creciente porque la tabla está ordenada
+        clave = (lineas["Cuenta"].cat.codes.to_numpy(np.int64) * n_años + (lineas["Año"].to_numpy(np.int64) - año_min)) * 12 \
+            + lineas["Mes"].to_numpy(np.int64) - 1
+        n_celdas = int(np.prod(forma))
+        debe = np.bincount(clave, weights=lineas["Debe"].to_numpy(), minlength=n_celdas).reshape(forma)
+        haber = np.bincount(clave, weights=lineas["Haber"].to_numpy(), minlength=n_celdas).reshape(forma)
+        neto = debe - haber
+        # Descripción de cada cuenta: la de su primera línea
+        descripciones = lineas.drop_duplicates("Cuenta").set_index("Cuenta")["Descripcion"].reindex(cuentas).astype("string")
+        r["filas"] = len(lineas)
+    return {
+        "año_min": año_min,
+        "cuentas": np.asarray(cuentas, dtype=object),
+        "descripciones": descripciones.fillna("").to_numpy(dtype=object),
+        "debe": debe,
+        "haber": haber,
+        "neto": neto,
+        "acum": np.cumsum(neto, axis=2),
+        "asientos": np.bincount(clave, minlength=n_celdas).reshape(forma),
+        "lineas": lineas,
+        "clave": clave,
+    }
+
+
+# === CONSULTAS ===
+def etiqueta_cuenta(motor, i):
+    cuenta, descripcion = motor["cuentas"][i], motor["descripciones"][i]
+    return cuenta if not descripcion or descripcion == cuenta else f"{cuenta} - {descripcion}"
+
+
+def buscar_cuentas(motor, texto):
+    # Índices de las cuentas cuyo código o descripción contiene el texto (sin distinguir mayúsculas)
+    texto = texto.lower()
+    return [i for i, (c, d) in enumerate(zip(motor["cuentas"], motor["descripciones"])) if texto in c.lower() or texto in d.lower()]
+
+
+def _año(motor, año):
+    ai = año - motor["año_min"]
+    return ai if 0 <= ai < motor["neto"].shape[1] else None
+
+
+def serie_mensual(motor, cuentas, año):
+    # Debe, haber, neto y asientos por mes de la suma de las cuentas (índices), ceros si no hay datos
+    ai = _año(motor, año)
+    datos = {}
+    for col in ("debe", "haber", "neto", "asientos"):
+        datos[col.capitalize()] = motor[col][cuentas, ai].sum(axis=0) if ai is not None and len(cuentas) else np.zeros(12)
+    return pd.DataFrame({"Mes": np.arange(1, 13), **datos})
+
+
+def top_cuentas(motor, año, mes, n=TOP_CUENTAS):
+    # Cuentas con mayor acumulado enero-mes (en valor absoluto) y su comparación con el año anterior
+    mi = mes - 1
+    ai, ai_ant = _año(motor, año), _año(motor, año - 1)
+    n_cuentas = len(motor["cuentas"])
+    actual = motor["acum"][:, ai, mi] if ai is not None else np.zeros(n_cuentas)
+    anterior = motor["acum"][:, ai_ant, mi] if ai_ant is not None else np.zeros(n_cuentas)
+    n = min(n, n_cuentas)
+    if n == 0:
+        return pd.DataFrame(columns=["Cuenta", "Descripción", f"Acum. {año}", f"Acum. {año - 1}", "Δ", "Δ %"])
+    orden = np.argpartition(-np.abs(actual), n - 1)[:n]
+    orden = orden[np.argsort(-np.abs(actual[orden]), kind="stable")]
+    delta = actual[orden] - anterior[orden]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(np.abs(anterior[orden]) > 1e-9, delta / np.abs(anterior[orden]) * 100, np.nan)
+    return pd.DataFrame({
+        "Cuenta": motor["cuentas"][orden],
+        "Descripción": motor["descripciones"][orden],
+        f"Acum. {año}": actual[orden],
+        f"Acum. {año - 1}": anterior[orden],
+        "Δ": delta,
+        "Δ %": pct,
+    })
+
+
+def lineas_cuenta(motor, cuenta, año, mes=None):
+    # Asientos de una cuenta (índice) en un mes, o en todo el año con mes=None
+    ai = _año(motor, año)
+    if ai is None:
+        return motor["lineas"].iloc[:0]
+    inicio = (cuenta * motor["neto"].shape[1] + ai) * 12
+    desde, hasta = (inicio, inicio + 12) if mes is None else (inicio + mes - 1, inicio + mes)
+    a, b = np.searchsorted(motor["clave"], [desde, hasta], side="left")
+    return motor["lineas"].iloc[a:b]
@@ -0,0 +1,157 @@
+import json
+import logging
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from cache_datos import CACHE_DIR, firma_archivo, huella_archivo, nombre_cache, publicar_directorio
+from datos import tablas_hec
+from perfil import etapa
+
+# === ALMACÉN PARTICIONADO POR AÑO ===
+# Un libro "HEC mensuales AAAA.xlsx" por año en data/. Las tablas de series
+# (Pluviometria, Datos Historicos) y las líneas del Mayor de cada libro se guardan partidas por año en
+# data/.cache/particiones/<libro>/<hash>-v<versión>/<tabla>/<año>.parquet con un indice.json.
+# Un libro solo se parsea cuando se pide alguno de sus años, y de cada libro se
+# leen solo las particiones de los años pedidos. Si no se pueden escribir (disco lleno,
+# permisos), las particiones del libro quedan en memoria del proceso, como en cache_datos.
+PART_DIR = CACHE_DIR / "particiones"
+PATRON_LIBRO = re.compile(r"^HEC mensuales (\d{4})\.xlsx$")
+TABLAS_SERIES = ("pluviometria", "historicos")
+TABLAS_PARTICIONADAS = (*TABLAS_SERIES, "mayor")
+# Esquema compacto de lo que se carga en memoria (y se copia en cada acierto de st.cache_data):
+# año y mes como enteros pequeños, float32 salvo Ventas (pesos: superan los 7 dígitos
+# significativos de float32) y sin Fecha, que todos los consumidores usan solo como Año/Mes.
+# El Mayor se guarda ya normalizado por mayor.lineas_libro (texto sin categorizar).
+# Subir la versión cuando cambie: las particiones viejas quedan en otra carpeta.
+VERSION_PARTICIONES = 3
+ESQUEMAS = {
+    "pluviometria": {"Año": "int16", "Mes": "int8", "Precipitacion": "float32"},
+    "historicos": {
+        "Año": "int16", "Mes": "int8", "Generacion": "float32", "Generacion_Ref": "float32",
+        "Potencia": "float32", "Ventas": "float64",
+    },
+    "mayor": {
+        "Fecha": "datetime64[ns]", "Año": "int16", "Mes": "int8", "Cuenta": "string", "Descripcion": "string",
+        "Glosa": "string", "Debe": "float64", "Haber": "float64",
+    },
+}
+
+logger = logging.getLogger(__name__)
+# destino -> (indice, {tabla: {año: DataFrame}}) de los libros cuyas particiones no se pudieron escribir
+_en_memoria = {}
+
+
+def descubrir_libros(data_dir):
+    # {año del libro: ruta}, solo a partir de los nombres de archivo
+    libros = {}
+    for p in Path(data_dir).glob("HEC mensuales *.xlsx"):
+        m = PATRON_LIBRO.match(p.name)
+        if m:
+            libros[int(m.group(1))] = p
+    return dict(sorted(libros.items()))
+
+
+def candidatos(libros, año):
+    # El libro del propio año primero; luego los posteriores, que traen ese año como historia
+    return [a for a in libros if a == año] + [a for a in libros if a > año]
+
+
+def firmas_libros(libros, desde):
+    # Firmas de los libros que pueden aportar años >= desde: clave para cachés en memoria
+    return tuple((a, firma_archivo(p)) for a, p in libros.items() if a >= desde)
+
+
+def _carpeta(path):
+    return f"{huella_archivo(path)['sha256'][:20]}-v{VERSION_PARTICIONES}"
+
+
+def particiones_vigentes(path):
+    # True si el libro ya está particionado para su contenido actual
+    path = Path(path)
+    destino = PART_DIR / nombre_cache(path) / _carpeta(path)
+    return destino in _en_memoria or (destino / "indice.json").exists()
+
+
+def particionar_libro(path):
+    # Devuelve (indice {tabla: [años]}, directorio); parsea el libro solo si no hay particiones
+    path = Path(path)
+    dir_libro = PART_DIR / nombre_cache(path)
+    destino = dir_libro / _carpeta(path)
+    if destino in _en_memoria:
+        return _en_memoria[destino][0], destino
+    indice_path = destino / "indice.json"
+    if indice_path.exists():
+        return json.loads(indice_path.read_text(encoding="utf-8")), destino
+
+    with etapa("particionar libro", libro=path.name):
+        return _escribir_particiones(path, dir_libro, destino)
+
+
+def _grupos_mayor(df_mayor):
+    # {año: líneas normalizadas}, solo los años con alguna línea (mismo criterio que candidatos)
+    from mayor import lineas_libro  # mayor.py importa este módulo
+    grupos = {}
+    for año, grupo in df_mayor.groupby("AÑO"):
+        lineas = lineas_libro(grupo)
+        if lineas is not None and not lineas.empty:
+            grupos[int(año)] = lineas.astype(ESQUEMAS["mayor"]).reset_index(drop=True)
+    return grupos
+
+
+def _escribir_particiones(path, dir_libro, destino):
+    tablas = tablas_hec(path, nombres=list(TABLAS_PARTICIONADAS))
+    particiones = {
+        nombre: {int(año): grupo[list(ESQUEMAS[nombre])].astype(ESQUEMAS[nombre]).reset_index(drop=True)
+                 for año, grupo in df.groupby("Año")}
+        for nombre, df in tablas.items() if nombre in TABLAS_SERIES
+    }
+    particiones["mayor"] = _grupos_mayor(tablas["mayor"])
+    indice = {nombre: list(grupos) for nombre, grupos in particiones.items()}
+    tmp = None
+    try:
+        dir_libro.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".part-", dir=dir_libro))
+        for nombre, grupos in particiones.items():
+            (tmp / nombre).mkdir()
+            for año, df in grupos.items():
+                df.to_parquet(tmp / nombre / f"{año}.parquet")
+        (tmp / "indice.json").write_text(json.dumps(indice), encoding="utf-8")
+        publicar_directorio(tmp, destino)
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudieron escribir las particiones de %s: %s", path, e)
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        for viejo in [d for d in _en_memoria if d.parent == dir_libro]:
+            del _en_memoria[viejo]
+        _en_memoria[destino] = (indice, particiones)
+        return indice, destino
+    for viejo in dir_libro.iterdir():
+        if viejo.name != destino.name and not viejo.name.startswith("."):
+            shutil.rmtree(viejo, ignore_errors=True)
+    return indice, destino
+
+
+def _leer_particion(destino, tabla, año):
+    if destino in _en_memoria:
+        return _en_memoria[destino][1][tabla][año].copy()
+    return pd.read_parquet(destino / tabla / f"{año}.parquet")
+
+
+def cargar_particiones(libros, años, tabla):
+    with etapa(f"particiones {tabla}", años=f"{min(años, default=None)}-{max(años, default=None)}") as r:
+        frames = []
+        for año in años:
+            for año_libro in candidatos(libros, año):
+                indice, destino = particionar_libro(libros[año_libro])
+                if año in indice.get(tabla, []):
+                    frames.append(_leer_particion(destino, tabla, año))
+                    break
+        if not frames:
+            return pd.DataFrame({c: pd.Series(dtype=t) for c, t in ESQUEMAS[tabla].items()})
+        df = pd.concat(frames, ignore_index=True)
+        r["filas"] = len(df)
+        return df
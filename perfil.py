@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# === PERFIL POR ETAPAS ===
+# Mide cada etapa del dashboard y de los cargadores: tiempo de reloj, acierto/fallo
+# de caché, filas procesadas y memoria neta retenida (solo con tracemalloc activo).
+# Las etapas se anidan; las de una misma ejecución de la página se agrupan con
+# iniciar()/registros() para el panel de diagnóstico, y cada etapa se escribe como
+# una línea JSON en logs/perfil.jsonl (HEC_PERFIL_LOG cambia la ruta; vacío lo desactiva).
+# Uso:
+#   with etapa("kpis", cacheada=True) as r:
+#       ...
+#       r["filas"] = len(df)
+# y dentro de la función cacheada, fallo_cache() marca la etapa como "miss".
+# tracemalloc es global al proceso y hace más lentas las asignaciones: se activa una sola vez
+# al arrancar con HEC_TRACEMALLOC=1 y nunca se detiene ni se reinicia su pico desde una sesión.
+BASE_DIR = Path(__file__).parent
+LOG_PATH = os.environ.get("HEC_PERFIL_LOG", str(BASE_DIR / "logs" / "perfil.jsonl"))
+MAX_LOG_BYTES = 5 * 1024 * 1024
+MEDIR_MEMORIA = os.environ.get("HEC_TRACEMALLOC", "") not in ("", "0")
+
+logger = logging.getLogger("perfil")
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _configurar_log():
+    # Un RotatingFileHandler con el mensaje JSON tal cual; una sola vez por proceso
+    with _lock:
+        if not LOG_PATH or logger.handlers:
+            return
+        try:
+            Path(LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH, maxBytes=MAX_LOG_BYTES, backupCount=3, encoding="utf-8")
+        except OSError:
+            return
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def _iniciar_memoria():
+    if MEDIR_MEMORIA and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _pila():
+    if not hasattr(_local, "pila"):
+        _local.pila = []
+    return _local.pila
+
+
+def iniciar():
+    # Comienza una ejecución: las etapas siguientes de este hilo se acumulan para registros()
+    _local.ejecucion = uuid.uuid4().hex[:8]
+    _local.registros = []
+    _local.pila = []
+
+
+def registros():
+    return list(getattr(_local, "registros", []))
+
+
+def midiendo_memoria():
+    return tracemalloc.is_tracing()
+
+
+def fallo_cache():
+    # Llamar dentro del cuerpo de una función cacheada: la etapa cacheada más cercana fue un "miss"
+    for r in reversed(_pila()):
+        if r["cache"] is not None:
+            r["cache"] = "miss"
+            return
+
+
+@contextmanager
+def etapa(nombre, cacheada=False, **datos):
+    _configurar_log()
+    pila = _pila()
+    memoria = tracemalloc.is_tracing()
+    r = {
+        "etapa": nombre,
+        "nivel": len(pila),
+        "cache": "hit" if cacheada else None,
+        "filas": None,
+        **datos,
+    }
+    # Memoria actual, no el pico: el pico es del proceso y lo comparten las sesiones y los hilos
+    inicio_mem = tracemalloc.get_traced_memory()[0] if memoria else None
+    pila.append(r)
+    if hasattr(_local, "registros"):
+        _local.registros.append(r)
+    t0 = time.perf_counter()
+    try:
+        yield r
+    finally:
+        r["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        pila.pop()
+        if memoria and tracemalloc.is_tracing():
+            r["mem_mb"] = round((tracemalloc.get_traced_memory()[0] - inicio_mem) / 2**20, 2)
+        else:
+            r["mem_mb"] = None
+        logger.info(json.dumps(
+            {"ts": time.time(), "ejecucion": getattr(_local, "ejecucion", None), "hilo": threading.current_thread().name, **r},
+            ensure_ascii=False, default=str,
+        ))
+
+
+_iniciar_memoria()
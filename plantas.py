@@ -0,0 +1,114 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from datos import COL_APORTE, COL_FECHA_GEN
+from ingesta_generacion import ingerir_generacion, store_vigente
+from linea_base import años_fuente
+from particiones import candidatos, descubrir_libros, particionar_libro, particiones_vigentes
+from perfil import etapa
+
+# === REGISTRO DE CENTRALES ===
+# plantas.json (opcional, en la raíz del proyecto) lista las centrales:
+#   [{"id": "canelo", "nombre": "El Canelo", "titulo": "Hidroeléctrica El Canelo",
+#     "datos": "data", "generacion": "data/Generacion Central El Canelo.xlsx",
+#     "col_fecha": "Fecha y hora", "col_aporte": "APORTE.CANELO\n...\n(kWh)"}, ...]
+# Rutas relativas a la raíz; "datos" es la carpeta con los libros HEC mensuales AAAA.xlsx.
+# Sin plantas.json se usa solo El Canelo con las rutas de siempre. La energía de cualquier
+# central se normaliza a la columna AporteCanelo_kWh de los agregados diarios.
+BASE_DIR = Path(__file__).parent
+REGISTRO_PATH = BASE_DIR / "plantas.json"
+PLANTA_CANELO = {
+    "id": "canelo",
+    "nombre": "El Canelo",
+    "titulo": "Hidroeléctrica El Canelo",
+    "datos": "data",
+    "generacion": "data/Generacion Central El Canelo.xlsx",
+    "col_fecha": COL_FECHA_GEN,
+    "col_aporte": COL_APORTE,
+}
+FLOTA = "flota"
+
+
+def cargar_registro(path=REGISTRO_PATH):
+    # {id: planta} con rutas absolutas, en el orden del archivo
+    entradas = json.loads(Path(path).read_text(encoding="utf-8")) if Path(path).exists() else [PLANTA_CANELO]
+    registro = {}
+    for entrada in entradas:
+        planta = {**PLANTA_CANELO, "titulo": entrada.get("nombre", ""), **entrada}
+        planta["datos"] = BASE_DIR / planta["datos"]
+        planta["generacion"] = BASE_DIR / planta["generacion"]
+        registro[planta["id"]] = planta
+    return registro
+
+
+def libros_registrados(registro=None):
+    # Todos los libros HEC de las centrales registradas (herramientas de línea de comandos)
+    registro = registro or cargar_registro()
+    return [p for planta in registro.values() for p in descubrir_libros(planta["datos"]).values()]
+
+
+def _pendientes(planta, años):
+    # Trabajo que requiere parsear Excel: libros sin particiones y exportación no ingerida.
+    # Incluye los libros fuente de la línea base, que si no se parsearían en serie al consultarla
+    libros = descubrir_libros(planta["datos"])
+    necesarios = {a for año in {*años, *años_fuente(libros)} for a in candidatos(libros, año)[:1]}
+    sin_particionar = [libros[a] for a in sorted(necesarios) if not particiones_vigentes(libros[a])]
+    gen = planta["generacion"]
+    gen_pendiente = gen.exists() and not store_vigente(gen, planta["col_aporte"], planta["col_fecha"])
+    return sin_particionar, gen_pendiente
+
+
+def preparar_planta(planta, años):
+    # Deja particiones y almacén de generación al día (se ejecuta en un proceso del pool)
+    sin_particionar, gen_pendiente = _pendientes(planta, años)
+    for path in sin_particionar:
+        particionar_libro(path)
+    if gen_pendiente:
+        ingerir_generacion(planta["generacion"], col_aporte=planta["col_aporte"], col_fecha=planta["col_fecha"])
+    return planta["id"]
+
+
+def preparar_flota(plantas, años, procesos=None):
+    # Parsea en paralelo (un proceso por central) solo lo que no está ya en caché. El parseo
+    # con openpyxl es CPU y retiene el GIL, así que se usan procesos y no hilos; "spawn"
+    # evita heredar los hilos del servidor de Streamlit. Con todo en caché no se crea el pool.
+    with etapa("preparar centrales", cacheada=True) as r:
+        pendientes = [p for p in plantas if any(_pendientes(p, años))]
+        r["filas"] = len(pendientes)
+        if not pendientes:
+            return
+        r["cache"] = "miss"
+        procesos = min(len(pendientes), procesos or os.cpu_count() or 1)
+        if procesos == 1:
+            for planta in pendientes:
+                preparar_planta(planta, años)
+            return
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for futuro in [pool.submit(preparar_planta, p, list(años)) for p in pendientes]:
+                futuro.result()
+
+
+# === VISTA CONSOLIDADA ===
+def combinar_series(frames_pluv, frames_hist):
+    # Generación y ventas se suman entre centrales; la precipitación se promedia
+    # (cada serie se divide por el número de centrales antes de concatenar, así las
+    # sumas por mes del cubo de KPIs y de los gráficos quedan como promedio)
+    n = max(len(frames_pluv), 1)
+    pluv = [df.assign(Precipitacion=df["Precipitacion"] / n) for df in frames_pluv]
+    return pd.concat(pluv, ignore_index=True), pd.concat(frames_hist, ignore_index=True)
+
+
+def sumar_diarias(diarias):
+    # Suma por fecha de los agregados diarios (índice Año, Mes) de varias centrales
+    diarias = [df for df in diarias if not df.empty]
+    if not diarias:
+        return pd.DataFrame()
+    df = pd.concat(diarias).groupby("Fecha", as_index=False)["AporteCanelo_kWh"].sum()
+    df["Año"] = df["Fecha"].dt.year.astype("int16")
+    df["Mes"] = df["Fecha"].dt.month.astype("int8")
+    return df.set_index(["Año", "Mes"]).sort_index()
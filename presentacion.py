@@ -0,0 +1,220 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+# === ESTILOS, FORMATOS Y GRÁFICOS ===
+# Compartidos por streamlit_app.py y los reportes generados fuera del navegador.
+PALETTE = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
+KPI_FONT_SIZE = 25
+KPI_DELTA_FONT_SIZE = 18
+CHART_HEIGHT = 450
+AÑOS_PROMEDIO = 5
+MESES_LABELS = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+MESES_CORTOS = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+def texto_delta(actual, anterior):
+    if anterior is None or pd.isna(anterior) or abs(anterior) < 1e-9:
+        return "N/A"
+    delta = actual - anterior
+    pct = (delta / anterior) * 100
+    return f"{delta:+,.0f} ({pct:+.1f}%)"
+
+
+def calcular_delta(actual, anterior):
+    texto = texto_delta(actual, anterior)
+    if texto == "N/A":
+        return texto
+    color = "green" if actual - anterior >= 0 else "red"
+    return f"<span style='font-size:{KPI_DELTA_FONT_SIZE}px; color:{color};'>{texto}</span>"
+
+
+def format_currency(x):
+    return f"${x:,.0f}"
+
+
+def format_MWh(x):
+    return f"{x:,.0f} MWh"
+
+
+def grafico_generacion_diaria(df_dia, mes_nombre, año, central):
+    # central: "Central El Canelo", "Flota de centrales"...
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_dia['Fecha'],
+        y=df_dia['AporteCanelo_kWh'],
+        mode='lines+markers',
+        name='Energía diaria',
+        line=dict(color=PALETTE[1], width=3)
+    ))
+    title = f"<b>Generación Diaria - {central} ({mes_nombre} {año})</b>"
+    fig.update_layout(
+        title=title,
+        xaxis_title="Fecha",
+        yaxis_title="Energía generada (kWh)",
+        template='plotly_white',
+        height=CHART_HEIGHT,
+        legend=dict(font=dict(size=12)),
+        margin=dict(t=100),
+        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        dragmode=False
+    )
+    fig.update_traces(hoverinfo="skip", hovertemplate=None)
+    fig['layout']['uirevision'] = True
+    return fig
+
+
+def grafico_intradia(x, y, titulo, unidad="kWh por intervalo"):
+    # x: datetime64; y ya submuestreado. Arrastrar selecciona un rango (zoom en el servidor)
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", name="Energía", line=dict(color=PALETTE[0], width=1.5)))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Fecha y hora",
+        yaxis_title=f"Energía ({unidad})",
+        template='plotly_white',
+        height=CHART_HEIGHT,
+        margin=dict(t=80),
+        dragmode="select",
+        selectdirection="h",
+        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+    )
+    return fig
+
+
+def grafico_cuenta_mensual(actual, anterior, titulo, año_actual):
+    # actual/anterior: mayor.serie_mensual del año y del anterior; barras del neto (debe - haber)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=MESES_CORTOS, y=anterior["Neto"], name=f"{año_actual-1}", marker_color=PALETTE[1]))
+    fig.add_trace(go.Bar(x=MESES_CORTOS, y=actual["Neto"], name=f"{año_actual}", marker_color=PALETTE[0]))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Mes",
+        yaxis_title="Neto ($)",
+        barmode="group",
+        template='plotly_white',
+        height=CHART_HEIGHT,
+        legend=dict(font=dict(size=12)),
+        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        dragmode=False
+    )
+    fig['layout']['uirevision'] = True
+    return fig
+
+
+def series_tendencia(df, col_fecha, col_valor, año_actual, base=None):
+    # Totales mensuales del año, del año anterior y promedio de los AÑOS_PROMEDIO previos (None si falta).
+    # Usa las columnas Año/Mes de las particiones si existen; una sola agrupación sobre la ventana.
+    # base: {estadística: 12 meses} de la línea base materializada (linea_base.py); el promedio
+    # sale de ahí y solo se agrupan el año y el anterior.
+    if {"Año", "Mes"} <= set(df.columns):
+        años, meses = df["Año"], df["Mes"]
+    else:
+        años, meses = df[col_fecha].dt.year, df[col_fecha].dt.month
+    mask = años.between(año_actual - (1 if base is not None else AÑOS_PROMEDIO), año_actual)
+    totales = df.loc[mask, col_valor].groupby([años[mask].to_numpy(), meses[mask].to_numpy()]).sum()
+
+    def _mensual(serie):
+        return [serie.get(i + 1, None) for i in range(12)]
+
+    def _del_año(año):
+        return _mensual(totales.xs(año, level=0) if año in totales.index.get_level_values(0) else {})
+
+    if base is not None:
+        prom = [None if pd.isna(v) else float(v) for v in base["media"]]
+    else:
+        prom = _mensual(totales[totales.index.get_level_values(0) < año_actual].groupby(level=1).mean())
+    return _del_año(año_actual), _del_año(año_actual - 1), prom
+
+
+def _rgba(color, alpha):
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r},{g},{b},{alpha})"
+
+
+def grafico_lineas_tendencia(df, col_fecha, col_valor, año_actual, col_label, meses_labels, nombre, color_actual, color_anterior, color_5a,
+                             base=None, ventana=AÑOS_PROMEDIO):
+    serie_actual, serie_anterior, serie_5a = series_tendencia(df, col_fecha, col_valor, año_actual, base)
+    fig = go.Figure()
+    if base is not None:
+        # Banda mínimo-máximo de los años de la ventana, bajo las líneas
+        minimo = [None if pd.isna(v) else float(v) for v in base["minimo"]]
+        maximo = [None if pd.isna(v) else float(v) for v in base["maximo"]]
+        fig.add_trace(go.Scatter(x=meses_labels, y=minimo, mode='lines', line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(
+            x=meses_labels, y=maximo, mode='lines', line=dict(width=0), fill='tonexty',
+            fillcolor=_rgba(color_5a, 0.15), name=f"Rango {ventana}A"
+        ))
+    fig.add_trace(go.Scatter(
+        x=meses_labels, y=serie_actual,
+        mode='lines+markers', name=f"{año_actual}", line=dict(color=color_actual, width=3)
+    ))
+    fig.add_trace(go.Scatter(
+        x=meses_labels, y=serie_anterior,
+        mode='lines+markers', name=f"{año_actual-1}", line=dict(color=color_anterior, width=2, dash='dot')
+    ))
+    fig.add_trace(go.Scatter(
+        x=meses_labels, y=serie_5a,
+        mode='lines+markers', name=f"Promedio {ventana}A", line=dict(color=color_5a, width=2, dash='dash')
+    ))
+    fig.update_layout(
+        title=nombre,
+        xaxis_title="Mes",
+        yaxis_title=col_label,
+        template='plotly_white',
+        height=CHART_HEIGHT,
+        legend=dict(font=dict(size=12)),
+        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
+        dragmode=False
+    )
+    fig.update_traces(hoverinfo="skip", hovertemplate=None)
+    fig['layout']['uirevision'] = True
+    return fig
+
+
+def tarjetas_kpi(kpi, formato_delta=calcular_delta):
+    # Bloques de KPIs (título, valor, Δ año anterior, Δ promedio) a partir de kpis.valores_kpi.
+    # formato_delta=texto_delta entrega los Δ sin HTML (informe Word)
+    gen, vent, prec = kpi["Generacion"], kpi["Ventas"], kpi["Precipitacion"]
+    tarjetas = {}
+    for clave, sufijo in [("mensual", ""), ("acumulado", " Acum.")]:
+        actual, anterior, prom = ("mes", "mes_anterior", "mes_prom") if clave == "mensual" else ("acum", "acum_anterior", "acum_prom")
+        tarjetas[clave] = [
+            (f"{titulo}{sufijo}", formato(m[actual]), formato_delta(m[actual], m[anterior]), formato_delta(m[actual], m[prom]))
+            for titulo, m, formato in [
+                ("Generación", gen, format_MWh),
+                ("Ventas", vent, format_currency),
+                ("Precipitaciones", prec, lambda x: f"{x:,.1f} mm"),
+            ]
+        ]
+    return tarjetas
+
+
+# (fuente, columna, etiqueta eje, título) de los tres gráficos de tendencia
+TENDENCIAS = [
+    ("historicos", "Generacion", "Generación (MWh)", "Generación Mensual"),
+    ("historicos", "Ventas", "Ventas ($)", "Ventas Mensuales"),
+    ("pluviometria", "Precipitacion", "Precipitación (mm)", "Precipitaciones Mensuales"),
+]
+
+
+def grafico_tendencia(df, metrica, año_actual, base=None, ventana=AÑOS_PROMEDIO):
+    # Gráfico de tendencia de una métrica de TENDENCIAS ("Generacion", "Ventas", "Precipitacion");
+    # base: consulta de linea_base.consultar_base para el año y la ventana
+    col_label, nombre = next((label, nombre) for _, col, label, nombre in TENDENCIAS if col == metrica)
+    return grafico_lineas_tendencia(
+        df, col_fecha="Fecha", col_valor=metrica, año_actual=año_actual,
+        col_label=col_label, meses_labels=MESES_CORTOS, nombre=nombre,
+        color_actual=PALETTE[0], color_anterior=PALETTE[1], color_5a=PALETTE[2],
+        base=None if base is None else base[metrica]["mes"], ventana=ventana
+    )
+
+
+def graficos_tendencia(df_hist, df_pluv, año_actual, base=None, ventana=AÑOS_PROMEDIO):
+    fuentes = {"historicos": df_hist, "pluviometria": df_pluv}
+    return [grafico_tendencia(fuentes[fuente], col_valor, año_actual, base, ventana) for fuente, col_valor, _, _ in TENDENCIAS]
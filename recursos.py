@@ -0,0 +1,60 @@
+import base64
+import io
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image
+
+# === LOGOS E IMÁGENES DE MARCA ===
+# Cada imagen se abre, se reduce a su tamaño de despliegue (x2 para pantallas de
+# alta densidad), se recomprime y se codifica una sola vez por proceso. La página
+# la referencia como archivo estático (static/, servido por Streamlit y cacheado
+# por el navegador) en lugar de incrustar cientos de KB de base64 en cada render.
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / "static"
+# Solo las imágenes que alguna vista muestra; otra imagen de marca se agrega aquí al usarla
+ASSETS = {
+    "logo": BASE_DIR / "assets" / "logo.jpg",
+}
+CALIDAD_JPEG = 85
+ESCALA_PANTALLA = 2
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def imagen_optimizada(nombre, alto):
+    # JPEG redimensionado a alto*ESCALA_PANTALLA px (nunca se agranda)
+    with Image.open(ASSETS[nombre]) as img:
+        img = img.convert("RGB")
+        alto_px = min(img.height, alto * ESCALA_PANTALLA)
+        ancho_px = round(img.width * alto_px / img.height)
+        if alto_px < img.height:
+            img = img.resize((ancho_px, alto_px), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=32)
+def data_uri(nombre, alto):
+    return "data:image/jpeg;base64," + base64.b64encode(imagen_optimizada(nombre, alto)).decode()
+
+
+@lru_cache(maxsize=32)
+def url_estatica(nombre, alto):
+    # Escribe la versión optimizada en static/ (una vez) y devuelve su URL relativa
+    origen = ASSETS[nombre]
+    destino = STATIC_DIR / f"{nombre}_{alto}.jpg"
+    with _lock:
+        if not destino.exists() or destino.stat().st_mtime < origen.stat().st_mtime:
+            STATIC_DIR.mkdir(exist_ok=True)
+            tmp = destino.with_name(f".{destino.name}.tmp")
+            tmp.write_bytes(imagen_optimizada(nombre, alto))
+            tmp.replace(destino)
+    return f"app/static/{destino.name}"
+
+
+def existe(nombre):
+    return ASSETS[nombre].exists()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from html import escape
+from pathlib import Path
+
+import pandas as pd
+
+from datos import generacion_diaria_mes
+from ingesta_generacion import ingerir_generacion
+from kpis import construir_cubo_kpi, valores_kpi
+from linea_base import VENTANAS, actualizar_base, consultar_base
+from particiones import cargar_particiones, descubrir_libros
+from plantas import cargar_registro
+from recursos import data_uri, existe
+from presentacion import (
+    AÑOS_PROMEDIO, KPI_FONT_SIZE, MESES_LABELS,
+    grafico_generacion_diaria, graficos_tendencia, tarjetas_kpi,
+)
+
+# === REPORTES MENSUALES EN HTML SIN NAVEGADOR ===
+# Genera un HTML autónomo por período reutilizando los mismos cargadores, KPIs y
+# gráficos del dashboard, y los promedios de la misma línea base (linea_base.py) para
+# la central del registro (plantas.json) y la ventana elegidas. Los datos se cargan una
+# sola vez en el proceso principal y se entregan a cada trabajador del pool al iniciarlo. Uso:
+#   python reporte_batch.py --año 2025
+#   python reporte_batch.py --periodos 2025-05 2025-06 --salida reportes --procesos 4
+#   python reporte_batch.py --planta maitenes --ventana 10 --año 2025
+BASE_DIR = Path(__file__).parent
+
+_DATOS = None
+_TENDENCIAS = {}
+_BASES = {}
+
+
+def cargar_datos_reporte(planta, años, ventana=AÑOS_PROMEDIO):
+    # planta: entrada de plantas.cargar_registro()
+    libros = descubrir_libros(planta["datos"])
+    rango = range(min(años) - AÑOS_PROMEDIO, max(años) + 1)
+    df_pluv = cargar_particiones(libros, rango, "pluviometria")
+    df_hist = cargar_particiones(libros, rango, "historicos")
+    gen = planta["generacion"]
+    df_diaria = (ingerir_generacion(gen, col_aporte=planta["col_aporte"], col_fecha=planta["col_fecha"])["diaria"]
+                 if gen.exists() else pd.DataFrame())
+    return {
+        "id": planta["id"],
+        "titulo": planta["titulo"],
+        "central": f"Central {planta['nombre']}",
+        "ventana": ventana,
+        "pluviometria": df_pluv,
+        "historicos": df_hist,
+        "diaria": df_diaria,
+        "cubo": construir_cubo_kpi(df_hist, df_pluv),
+        "base": actualizar_base(libros, planta["datos"])[1],
+    }
+
+
+def _iniciar_trabajador(datos):
+    global _DATOS
+    _DATOS = datos
+    _TENDENCIAS.clear()
+    _BASES.clear()
+
+
+def _base(año):
+    if año not in _BASES:
+        _BASES[año] = consultar_base(_DATOS["base"], año, _DATOS["ventana"])
+    return _BASES[año]
+
+
+def _tendencias(año):
+    # Los gráficos de tendencia dependen solo del año: se construyen una vez por trabajador
+    if año not in _TENDENCIAS:
+        _TENDENCIAS[año] = graficos_tendencia(
+            _DATOS["historicos"], _DATOS["pluviometria"], año, _base(año), _DATOS["ventana"],
+        )
+    return _TENDENCIAS[año]
+
+
+def _html_tarjetas(subtitulo, tarjetas, año, ventana):
+    celdas = "".join(
+        f"<div class='kpi'><div style='font-size:{KPI_FONT_SIZE}px;'><b>{titulo}</b><br>{valor}</div>"
+        f"<p>Δ vs {año - 1}: {delta_anterior}</p><p>Δ vs Promedio {ventana}A: {delta_promedio}</p></div>"
+        for titulo, valor, delta_anterior, delta_promedio in tarjetas
+    )
+    return f"<h3>{subtitulo}</h3><div class='fila'>{celdas}</div>"
+
+
+def renderizar_periodo(año, mes, salida, plotlyjs="cdn"):
+    mes_nombre = MESES_LABELS[mes - 1]
+    ventana = _DATOS["ventana"]
+    tarjetas = tarjetas_kpi(valores_kpi(_DATOS["cubo"], año, mes, ventana, base=_base(año)))
+
+    partes = [
+        _html_tarjetas("KPIs Mensuales (solo mes seleccionado)", tarjetas["mensual"], año, ventana),
+        _html_tarjetas("KPIs Acumulados (enero a mes seleccionado)", tarjetas["acumulado"], año, ventana),
+    ]
+    figuras = []
+    df_dia = generacion_diaria_mes(_DATOS["diaria"], año, mes) if not _DATOS["diaria"].empty else pd.DataFrame()
+    if not df_dia.empty:
+        figuras.append(grafico_generacion_diaria(df_dia, mes_nombre, año, _DATOS["central"]))
+    else:
+        partes.append(f"<p>No hay datos diarios disponibles para {mes_nombre}.</p>")
+    figuras += _tendencias(año)
+    for i, fig in enumerate(figuras):
+        # plotly.js se incluye una sola vez por archivo
+        partes.append(fig.to_html(full_html=False, include_plotlyjs=plotlyjs if i == 0 else False))
+
+    titulo = f"Reporte Operativo y Financiero - {_DATOS['titulo']} - {mes_nombre} {año}"
+    # El logo se codifica una vez por trabajador (data_uri está memoizado)
+    logo = f"<img src='{data_uri('logo', 120)}' style='height:120px;'/>" if existe("logo") else ""
+    html = (
+        "<!DOCTYPE html><html lang='es'><head><meta charset='utf-8'>"
+        f"<title>{escape(titulo)}</title>"
+        "<style>body{font-family:sans-serif;margin:2em;} .fila{display:flex;gap:2em;} .kpi{flex:1;}</style>"
+        f"</head><body>{logo}<h1>{escape(titulo)}</h1>{''.join(partes)}"
+        f"<p><small>Reporte generado el {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')}</small></p>"
+        "</body></html>"
+    )
+    destino = Path(salida) / f"reporte_{_DATOS['id']}_{año}_{mes:02d}.html"
+    destino.write_text(html, encoding="utf-8")
+    return destino
+
+
+def _parsear_periodo(texto):
+    # "AAAA-MM" -> (año, mes); como type= de argparse, un período inválido falla en la línea de comandos
+    try:
+        año, mes = (int(x) for x in texto.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"período inválido '{texto}' (se espera AAAA-MM)") from None
+    if not 1 <= mes <= 12:
+        raise argparse.ArgumentTypeError(f"mes fuera de rango en '{texto}' (01 a 12)")
+    return año, mes
+
+
+def main():
+    registro = cargar_registro()
+    parser = argparse.ArgumentParser(description="Genera los reportes mensuales en HTML")
+    parser.add_argument("--planta", choices=list(registro), default=next(iter(registro)),
+                        help="Central del registro (plantas.json)")
+    parser.add_argument("--ventana", type=int, choices=VENTANAS, default=AÑOS_PROMEDIO,
+                        help="Años previos de los promedios")
+    parser.add_argument("--año", type=int, help="Genera los 12 meses del año indicado")
+    parser.add_argument("--periodos", nargs="+", type=_parsear_periodo, metavar="AAAA-MM",
+                        help="Lista de períodos a generar")
+    parser.add_argument("--salida", type=Path, default=BASE_DIR / "reportes")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count())
+    parser.add_argument("--plotlyjs", choices=["cdn", "inline"], default="cdn",
+                        help="'inline' incrusta plotly.js para abrir los archivos sin conexión")
+    args = parser.parse_args()
+    planta = registro[args.planta]
+
+    if args.periodos:
+        periodos = args.periodos
+    else:
+        libros = descubrir_libros(planta["datos"])
+        if not args.año and not libros:
+            parser.error(f"No se encontraron libros 'HEC mensuales AAAA.xlsx' en {planta['datos']}")
+        año = args.año or max(libros)
+        periodos = [(año, mes) for mes in range(1, 13)]
+    plotlyjs = True if args.plotlyjs == "inline" else "cdn"
+    args.salida.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    datos = cargar_datos_reporte(planta, [a for a, _ in periodos], args.ventana)
+    t_carga = time.perf_counter() - t0
+
+    procesos = max(1, min(args.procesos or 1, len(periodos)))
+    if procesos == 1:
+        _iniciar_trabajador(datos)
+        generados = [renderizar_periodo(a, m, args.salida, plotlyjs) for a, m in periodos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(datos,)) as pool:
+            tareas = [pool.submit(renderizar_periodo, a, m, args.salida, plotlyjs) for a, m in periodos]
+            generados = [t.result() for t in as_completed(tareas)]
+
+    for destino in sorted(generados):
+        print(f"✅ {destino}")
+    print(f"{len(generados)} reportes en {time.perf_counter() - t0:.1f} s "
+          f"(carga de datos {t_carga:.1f} s, {procesos} procesos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,297 +1,535 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import plotly.graph_objects as go
-import base64
 
-# === CONFIGURACIÓN DE PÁGINA Y ESTILOS ===
+from cache_datos import firma_archivo, vigilar_directorio
+from datos import generacion_diaria_mes, tablas_hec
+from estado_resultado import tabla_estado_resultado_operativa
+from informe_word import GeneradorInformes
+from ingesta_generacion import ingerir_generacion, leer_serie
+from recursos import data_uri, existe, imagen_optimizada, url_estatica
+from presentacion import (
+    AÑOS_PROMEDIO, KPI_FONT_SIZE, MESES_LABELS,
+    TENDENCIAS, grafico_cuenta_mensual, grafico_generacion_diaria, grafico_intradia, grafico_tendencia, tarjetas_kpi,
+)
+import perfil
+from perfil import etapa, fallo_cache
+from plantas import FLOTA, cargar_registro, combinar_series, preparar_flota, sumar_diarias
+from particiones import PATRON_LIBRO, cargar_particiones, descubrir_libros, firmas_libros, particionar_libro
+from kpis import construir_cubo_kpi, valores_kpi
+from mayor import TOP_CUENTAS, buscar_cuentas, cargar_mayor, construir_mayor, etiqueta_cuenta, lineas_cuenta, serie_mensual, top_cuentas
+from linea_base import VENTANAS, actualizar_base, calcular_base, combinar_mensuales, consultar_base
+from subidas import es_subida, planta_subida, registrar_subida
+from submuestreo import agregar_horas, submuestrear, sumar_series, ventana
+
+# === CONFIGURACIÓN DE PÁGINA ===
 st.set_page_config(page_title="Reporte Operativo y Financiero", layout="wide")
-PALETTE = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
-KPI_FONT_SIZE = 25
-KPI_DELTA_FONT_SIZE = 18
-CHART_HEIGHT = 450
 
 # --- Rutas relativas universales ---
 BASE_DIR = Path(__file__).parent
-EXCEL_PATH = BASE_DIR / "data" / "HEC mensuales 2025.xlsx"
-GEN_PATH = BASE_DIR / "data" / "Generacion Central El Canelo.xlsx"
-LOGO_PATH = BASE_DIR / "assets" / "logo.jpg"
-
-def mostrar_titulo_con_logo(logo_path):
-    logo_path_obj = Path(logo_path)
-    if logo_path_obj.exists():
-        with open(logo_path_obj, "rb") as image_file:
-            image_type = "jpeg" if logo_path_obj.suffix.lower() in [".jpg", ".jpeg"] else logo_path_obj.suffix.lower().replace(".", "")
-            encoded = base64.b64encode(image_file.read()).decode()
+# Centrales registradas (plantas.json o solo El Canelo); FLOTA es la vista consolidada
+REGISTRO = cargar_registro()
+
+def mostrar_titulo_con_logo(titulo, nombre_logo="logo", alto=240):
+    if existe(nombre_logo):
+        # Logo redimensionado y codificado una vez por proceso; servido como archivo estático si está habilitado
+        src = url_estatica(nombre_logo, alto) if st.get_option("server.enableStaticServing") else data_uri(nombre_logo, alto)
         st.markdown(
             f"<div style='display:flex; align-items:center;'>"
-            f"<img src='data:image/{image_type};base64,{encoded}' style='height:240px;margin-right:60px;'/>"
-            f"<h1 style='display:inline;'>Reporte Operativo y Financiero - Hidroeléctrica El Canelo</h1>"
+            f"<img src='{src}' style='height:{alto}px;margin-right:60px;'/>"
+            f"<h1 style='display:inline;'>Reporte Operativo y Financiero - {titulo}</h1>"
             f"</div>", unsafe_allow_html=True
         )
     else:
-        st.title("Reporte Operativo y Financiero - Hidroeléctrica El Canelo")
-
-@st.cache_data(ttl=3600)
-def cargar_datos(path):
-    df_pluv = pd.read_excel(str(path), sheet_name="Pluviometria", skiprows=127, usecols="C:D")
-    df_pluv.columns = ["Fecha", "Precipitacion"]
-    df_pluv["Fecha"] = pd.to_datetime(df_pluv["Fecha"], errors='coerce')
-    df_pluv.dropna(subset=["Fecha", "Precipitacion"], inplace=True)
-    df_pluv["Año"] = df_pluv["Fecha"].dt.year
-    df_pluv["Mes"] = df_pluv["Fecha"].dt.month
-
-    df_hist = pd.read_excel(str(path), sheet_name="Datos Historicos", skiprows=195, usecols="C:G")
-    df_hist.columns = ["Fecha", "Generacion", "Generacion_Ref", "Potencia", "Ventas"]
-    df_hist["Fecha"] = pd.to_datetime(df_hist["Fecha"], errors='coerce')
-    df_hist.dropna(subset=["Fecha", "Generacion", "Ventas"], inplace=True)
-    df_hist["Año"] = df_hist["Fecha"].dt.year
-    df_hist["Mes"] = df_hist["Fecha"].dt.month
+        st.title(f"Reporte Operativo y Financiero - {titulo}")
+
+def planta(planta_id):
+    # Central registrada o libro subido en esta u otra sesión (subidas.py)
+    return planta_subida(planta_id) if es_subida(planta_id) else REGISTRO[planta_id]
+
+def titulo_planta(planta_id):
+    return "Flota de centrales" if planta_id == FLOTA else planta(planta_id)["titulo"]
+
+def rotulo_central(planta_id):
+    # Nombre en los títulos de los gráficos
+    return "Flota de centrales" if planta_id == FLOTA else f"Central {planta(planta_id)['nombre']}"
+
+def ids_plantas(planta_id):
+    return list(REGISTRO) if planta_id == FLOTA else [planta_id]
+
+def libros_planta(planta_id):
+    return descubrir_libros(planta(planta_id)["datos"])
+
+# === CARGA DE DATOS ===
+# Las cachés en memoria se indexan por la firma (hash del contenido) de los libros fuente:
+# se invalidan exactamente cuando un Excel cambia y nunca por tiempo.
+# Para un año se cargan solo las particiones de ese año y de los AÑOS_PROMEDIO anteriores.
+# Cada función recibe el id de una central o FLOTA; la flota combina las series de todas.
+def firmas_series(planta_id, año):
+    return tuple((pid, firmas_libros(libros_planta(pid), año - AÑOS_PROMEDIO)) for pid in ids_plantas(planta_id))
 
+def firmas_generacion(planta_id):
+    gens = [(pid, planta(pid)["generacion"]) for pid in ids_plantas(planta_id)]
+    return tuple((pid, firma_archivo(g) if g.exists() else None) for pid, g in gens)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cargar_datos(planta_id, año, firmas):
+    fallo_cache()
+    if planta_id == FLOTA:
+        series = [_cargar_datos(pid, año, ((pid, f),)) for pid, f in firmas]
+        return combinar_series([p for p, _ in series], [h for _, h in series])
+    libros = libros_planta(planta_id)
+    años = range(año - AÑOS_PROMEDIO, año + 1)
+    return cargar_particiones(libros, años, "pluviometria"), cargar_particiones(libros, años, "historicos")
+
+def megabytes(*frames):
+    return round(sum(df.memory_usage(deep=True).sum() for df in frames) / 2**20, 3)
+
+def cargar_datos(planta_id, año):
+    # El tiempo de un acierto es la copia (unpickle) de los DataFrames: crece con su tamaño en memoria
+    with etapa("datos", cacheada=True, planta=planta_id, año=año) as r:
+        df_pluv, df_hist = _cargar_datos(planta_id, año, firmas_series(planta_id, año))
+        r["filas"] = len(df_pluv) + len(df_hist)
+        r["mb"] = megabytes(df_pluv, df_hist)
     return df_pluv, df_hist
 
-@st.cache_data(ttl=3600)
-def cargar_generacion_diaria(path, año, mes):
-    df = pd.read_excel(str(path), sheet_name=0, header=None)
-    header_row = None
-    for i, row in df.iterrows():
-        if ("APORTE.CANELO\nIntervalo de energía activa generada\n(kWh)" in row.values and "Fecha y hora" in row.values):
-            header_row = i
-            break
-    if header_row is None:
-        return pd.DataFrame()
-    df = pd.read_excel(str(path), sheet_name=0, header=header_row)
-    col_fecha = "Fecha y hora"
-    col_gen = "APORTE.CANELO\nIntervalo de energía activa generada\n(kWh)"
-    df[col_fecha] = pd.to_datetime(df[col_fecha], errors="coerce", dayfirst=True)
-    df = df.dropna(subset=[col_fecha, col_gen])
-    df = df[(df[col_fecha].dt.year == año) & (df[col_fecha].dt.month == mes)].copy()
-    if df.empty:
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cargar_cubo_kpi(planta_id, año, firmas):
+    fallo_cache()
+    df_pluv, df_hist = _cargar_datos(planta_id, año, firmas)
+    return construir_cubo_kpi(df_hist, df_pluv)
+
+def cargar_cubo_kpi(planta_id, año):
+    with etapa("cubo kpi", cacheada=True, planta=planta_id, año=año):
+        return _cargar_cubo_kpi(planta_id, año, firmas_series(planta_id, año))
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cargar_generacion(planta_id, firmas):
+    # Solo se leen los intervalos nuevos; cada mes se resuelve luego con una búsqueda por índice
+    fallo_cache()
+    if planta_id == FLOTA:
+        return sumar_diarias([_cargar_generacion(pid, ((pid, f),)) for pid, f in firmas])
+    p = planta(planta_id)
+    if not p["generacion"].exists():
         return pd.DataFrame()
-    df['Dia'] = df[col_fecha].dt.date
-    df_dia = df.groupby('Dia')[col_gen].sum().reset_index()
-    df_dia['Fecha'] = pd.to_datetime(df_dia['Dia'])
-    return df_dia[['Fecha', col_gen]].rename(columns={col_gen: 'AporteCanelo_kWh'})
+    return ingerir_generacion(p["generacion"], col_aporte=p["col_aporte"], col_fecha=p["col_fecha"])["diaria"]
+
+def cargar_generacion_diaria(planta_id, año, mes):
+    with etapa("generación diaria", cacheada=True, planta=planta_id) as r:
+        df_diaria = _cargar_generacion(planta_id, firmas_generacion(planta_id))
+        df_dia = generacion_diaria_mes(df_diaria, año, mes) if not df_diaria.empty else pd.DataFrame()
+        r["filas"] = len(df_dia)
+        r["mb"] = megabytes(df_diaria)
+    return df_dia
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cargar_estado_resultado(path, firma):
+    fallo_cache()
+    return tablas_hec(path, nombres=["estado"])["estado"]
 
-@st.cache_data(ttl=3600)
 def cargar_estado_resultado(path):
-    df = pd.read_excel(str(path), sheet_name="Estado de Resultado", header=None, usecols="A:G", skiprows=5, nrows=39)
-    df.columns = df.iloc[0]
-    df = df[1:].reset_index(drop=True)
+    with etapa("estado de resultado", cacheada=True) as r:
+        df = _cargar_estado_resultado(path, firma_archivo(path))
+        r["filas"] = len(df)
     return df
 
-def calcular_delta(actual, anterior):
-    if anterior is None or pd.isna(anterior) or abs(anterior) < 1e-9:
-        return "N/A"
-    delta = actual - anterior
-    pct = (delta / anterior) * 100
-    color = "green" if delta >= 0 else "red"
-    return f"<span style='font-size:{KPI_DELTA_FONT_SIZE}px; color:{color};'>{delta:+,.0f} ({pct:+.1f}%)</span>"
-
-def format_currency(x):
-    return f"${x:,.0f}"
-
-def format_MWh(x):
-    return f"{x:,.0f} MWh"
-
-def grafico_generacion_diaria(df_dia, mes_nombre, año):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df_dia['Fecha'],
-        y=df_dia['AporteCanelo_kWh'],
-        mode='lines+markers',
-        name='Energía diaria',
-        line=dict(color=PALETTE[1], width=3)
-    ))
-    title = f"<b>Generación Diaria - Central El Canelo ({mes_nombre} {año})</b>"
-    fig.update_layout(
-        title=title,
-        xaxis_title="Fecha",
-        yaxis_title="Energía generada (kWh)",
-        template='plotly_white',
-        height=CHART_HEIGHT,
-        legend=dict(font=dict(size=12)),
-        margin=dict(t=100),
-        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
-        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
-        dragmode=False
+# === LÍNEA BASE ===
+# Media, mínimo, máximo y percentiles de los N años previos (linea_base.py), materializados por
+# central y actualizados solo con los años cuyo libro cambió. Depende de todos los libros; cada
+# consulta (año, N) es una lectura de filas, así que cambiar N no vuelve a leer series.
+def firmas_base(planta_id):
+    return tuple((pid, firmas_libros(libros_planta(pid), 0)) for pid in ids_plantas(planta_id))
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cargar_base(planta_id, firmas):
+    fallo_cache()
+    if planta_id == FLOTA:
+        # Sobre los totales combinados de la flota, como el resto de sus KPIs
+        mensuales = combinar_mensuales([_cargar_base(pid, ((pid, f),))[0] for pid, f in firmas])
+        return mensuales, calcular_base(mensuales, {a for _, f in firmas for a, _ in f})
+    return actualizar_base(libros_planta(planta_id), planta(planta_id)["datos"])
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _base_año(planta_id, año, años_base, firmas):
+    fallo_cache()
+    return consultar_base(_cargar_base(planta_id, firmas)[1], año, años_base)
+
+def cargar_base(planta_id, año, años_base):
+    with etapa("consulta línea base", cacheada=True, planta=planta_id, ventana=años_base):
+        return _base_año(planta_id, año, años_base, firmas_base(planta_id))
+
+# === GRÁFICOS ===
+# Se memoriza la especificación serializada de cada figura (dict de Plotly), indexada por
+# (métrica, central, año, firma de los datos): las tendencias no dependen del mes, así que
+# cambiar el mes solo reconstruye el gráfico diario, y las figuras se comparten entre sesiones.
+@st.cache_data(max_entries=64, show_spinner=False)
+def _figura_tendencia(metrica, planta_id, año, firmas, años_base, firmas_base):
+    fallo_cache()
+    df_pluv, df_hist = _cargar_datos(planta_id, año, firmas)
+    base = _base_año(planta_id, año, años_base, firmas_base)
+    fuente = next(f for f, col, _, _ in TENDENCIAS if col == metrica)
+    return grafico_tendencia(df_hist if fuente == "historicos" else df_pluv, metrica, año, base, años_base).to_dict()
+
+def figuras_tendencia(planta_id, año, años_base):
+    firmas, firmas_b = firmas_series(planta_id, año), firmas_base(planta_id)
+    figuras = []
+    for _, col, _, _ in TENDENCIAS:
+        with etapa(f"figura {col}", cacheada=True):
+            figuras.append(_figura_tendencia(col, planta_id, año, firmas, años_base, firmas_b))
+    return figuras
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _figura_diaria(planta_id, firmas, año, mes):
+    fallo_cache()
+    df_diaria = _cargar_generacion(planta_id, firmas)
+    df_dia = generacion_diaria_mes(df_diaria, año, mes) if not df_diaria.empty else pd.DataFrame()
+    return None if df_dia.empty else grafico_generacion_diaria(df_dia, MESES_LABELS[mes - 1], año, rotulo_central(planta_id)).to_dict()
+
+def figura_diaria(planta_id, año, mes):
+    with etapa("figura diaria", cacheada=True):
+        return _figura_diaria(planta_id, firmas_generacion(planta_id), año, mes)
+
+def _precalentar_cache(path):
+    # Llamado por el vigilante: parsea el libro nuevo fuera del ciclo de la página
+    if PATRON_LIBRO.match(path.name):
+        particionar_libro(path)
+        return
+    for p in REGISTRO.values():
+        if path.resolve() == p["generacion"].resolve():
+            ingerir_generacion(path, col_aporte=p["col_aporte"], col_fecha=p["col_fecha"])
+
+@st.cache_resource
+def iniciar_vigilante_datos():
+    directorios = {p["datos"] for p in REGISTRO.values()} | {p["generacion"].parent for p in REGISTRO.values()}
+    return [vigilar_directorio(d, _precalentar_cache) for d in sorted(directorios) if d.exists()]
+
+# === INTRADÍA ===
+# La serie de 15 minutos se lee del almacén binario (memmap) y al navegador se envían a lo
+# más PUNTOS_INTRADIA puntos de la ventana visible. Seleccionar un rango en el gráfico
+# (arrastrar) vuelve a consultar esa ventana con más resolución.
+PUNTOS_INTRADIA = 2000
+RESOLUCIONES = {"15 minutos": False, "Horaria": True}
+METODOS_SUBMUESTREO = {"Mín-máx": "minmax", "LTTB": "lttb"}
+
+def serie_ventana(planta_id, inicio, fin):
+    # Tramo [inicio, fin] (ns desde epoch) de la serie; en la flota, suma de las centrales
+    with etapa("serie intradía", planta=planta_id) as r:
+        series = []
+        for pid in ids_plantas(planta_id):
+            gen = planta(pid)["generacion"]
+            if gen.exists():
+                series.append(ventana(*leer_serie(gen), inicio, fin))
+        x, y = sumar_series(series)
+        r["filas"] = len(x)
+    return x, y
+
+def _caja_seleccionada():
+    # Rango x de la selección de caja del gráfico (ejecución anterior), en ns
+    evento = st.session_state.get("grafico_intradia")
+    cajas = (evento or {}).get("selection", {}).get("box", [])
+    if not cajas or len(cajas[0].get("x", [])) != 2:
+        return None
+    x0, x1 = sorted(pd.Timestamp(v).value for v in cajas[0]["x"])
+    return (x0, x1) if x1 > x0 else None
+
+def seccion_intradia(planta_id, año, mes):
+    st.subheader("Generación Intradía")
+    c1, c2, c3 = st.columns([2, 2, 1])
+    resolucion = c1.radio("Resolución", list(RESOLUCIONES), horizontal=True)
+    metodo = c2.radio("Submuestreo", list(METODOS_SUBMUESTREO), horizontal=True)
+    restablecer = c3.button("Restablecer zoom")
+
+    inicio_mes = pd.Timestamp(año, mes, 1)
+    contexto = (planta_id, año, mes)
+    estado = st.session_state.setdefault("intradia", {})
+    caja = _caja_seleccionada()
+    if restablecer or estado.get("contexto") != contexto:
+        estado.update(contexto=contexto, caja=caja,
+                      ventana=(inicio_mes.value, (inicio_mes + pd.offsets.MonthBegin(1)).value))
+    elif caja is not None and caja != estado.get("caja"):
+        estado.update(caja=caja, ventana=caja)
+
+    x, y = serie_ventana(planta_id, *estado["ventana"])
+    if RESOLUCIONES[resolucion]:
+        x, y = agregar_horas(x, y)
+    if len(x) == 0:
+        st.info("No hay intervalos de generación para este período.")
+        return
+    n_puntos = len(x)
+    with etapa("submuestreo", metodo=METODOS_SUBMUESTREO[metodo]) as r:
+        x, y = submuestrear(x, y, PUNTOS_INTRADIA, METODOS_SUBMUESTREO[metodo])
+        r["filas"] = n_puntos
+    desde, hasta = (pd.Timestamp(v).strftime("%d/%m/%Y %H:%M") for v in estado["ventana"])
+    fig = grafico_intradia(
+        x.view("datetime64[ns]"), y, f"<b>Generación {resolucion.lower()} ({desde} - {hasta})</b>",
+        unidad="kWh por hora" if RESOLUCIONES[resolucion] else "kWh por intervalo",
+    )
+    with etapa("render intradía"):
+        st.plotly_chart(fig, key="grafico_intradia", on_select="rerun", selection_mode="box", use_container_width=True)
+    st.caption(f"{len(x):,} de {n_puntos:,} puntos. Arrastre sobre el gráfico para ver un rango con más detalle.")
+
+# === LIBRO MAYOR ===
+# El motor (mayor.py) se arma una vez por año y contenido de los libros y se comparte entre sesiones
+# sin copiarse (cache_resource): las consultas solo lo leen. Solo compara el año con el anterior,
+# así que carga las particiones del Mayor de esos dos años.
+CUENTA_DEFECTO = "peaje"
+
+def firmas_mayor(planta_id, año):
+    return firmas_libros(libros_planta(planta_id), año - 1)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _motor_mayor(planta_id, año, firmas):
+    fallo_cache()
+    return construir_mayor(cargar_mayor(libros_planta(planta_id), (año - 1, año)))
+
+def motor_mayor(planta_id, año):
+    with etapa("libro mayor", cacheada=True, planta=planta_id, año=año):
+        return _motor_mayor(planta_id, año, firmas_mayor(planta_id, año))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _figura_cuenta(planta_id, cuenta, año, firmas):
+    fallo_cache()
+    motor = _motor_mayor(planta_id, año, firmas)
+    return grafico_cuenta_mensual(
+        serie_mensual(motor, [cuenta], año), serie_mensual(motor, [cuenta], año - 1),
+        f"{etiqueta_cuenta(motor, cuenta)}: neto mensual {año} vs {año - 1}", año,
+    ).to_dict()
+
+def seccion_mayor(planta_id, año, mes):
+    motor = motor_mayor(planta_id, año)
+    if motor["lineas"].empty:
+        return
+    st.subheader("Libro Mayor")
+    cuentas = range(len(motor["cuentas"]))
+    defecto = next(iter(buscar_cuentas(motor, CUENTA_DEFECTO)), 0)
+    cuenta = st.selectbox("Cuenta", cuentas, index=defecto, format_func=lambda i: etiqueta_cuenta(motor, i))
+    with etapa("figura cuenta", cacheada=True):
+        fig = _figura_cuenta(planta_id, cuenta, año, firmas_mayor(planta_id, año))
+    st.plotly_chart(fig, use_container_width=True)
+    with st.expander(f"Asientos de {MESES_LABELS[mes - 1]} {año}"):
+        st.dataframe(lineas_cuenta(motor, cuenta, año, mes), hide_index=True, use_container_width=True)
+
+    st.markdown(f"**{TOP_CUENTAS} cuentas con mayor acumulado enero-{MESES_LABELS[mes - 1].lower()} {año} vs {año - 1}**")
+    with etapa("mayor top cuentas"):
+        top = top_cuentas(motor, año, mes)
+    st.dataframe(
+        top, hide_index=True, use_container_width=True,
+        column_config={
+            f"Acum. {año}": st.column_config.NumberColumn(format="$%,.0f"),
+            f"Acum. {año - 1}": st.column_config.NumberColumn(format="$%,.0f"),
+            "Δ": st.column_config.NumberColumn(format="$%+,.0f"),
+            "Δ %": st.column_config.NumberColumn(format="%+.1f%%"),
+        },
     )
-    fig.update_traces(hoverinfo="skip", hovertemplate=None)
-    fig['layout']['uirevision'] = True
-    return fig
-
-def grafico_lineas_tendencia(df, col_fecha, col_valor, año_actual, col_label, meses_labels, nombre, color_actual, color_anterior, color_5a):
-    df = df.copy()
-    df['Año'] = df[col_fecha].dt.year
-    df['Mes'] = df[col_fecha].dt.month
-    serie_actual = df[df['Año'] == año_actual].groupby('Mes')[col_valor].sum()
-    serie_anterior = df[df['Año'] == año_actual-1].groupby('Mes')[col_valor].sum()
-    mask_5a = df['Año'].between(año_actual-5, año_actual-1)
-    serie_5a = df[mask_5a].groupby(['Año','Mes'])[col_valor].sum().groupby('Mes').mean()
-    serie_actual = [serie_actual.get(i+1, None) for i in range(12)]
-    serie_anterior = [serie_anterior.get(i+1, None) for i in range(12)]
-    serie_5a = [serie_5a.get(i+1, None) for i in range(12)]
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=meses_labels, y=serie_actual,
-        mode='lines+markers', name=f"{año_actual}", line=dict(color=color_actual, width=3)
-    ))
-    fig.add_trace(go.Scatter(
-        x=meses_labels, y=serie_anterior,
-        mode='lines+markers', name=f"{año_actual-1}", line=dict(color=color_anterior, width=2, dash='dot')
-    ))
-    fig.add_trace(go.Scatter(
-        x=meses_labels, y=serie_5a,
-        mode='lines+markers', name="Promedio 5A", line=dict(color=color_5a, width=2, dash='dash')
-    ))
-    fig.update_layout(
-        title=nombre,
-        xaxis_title="Mes",
-        yaxis_title=col_label,
-        template='plotly_white',
-        height=CHART_HEIGHT,
-        legend=dict(font=dict(size=12)),
-        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
-        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), fixedrange=True),
-        dragmode=False
+
+# === INFORME WORD ===
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+@st.cache_resource
+def generador_informes():
+    return GeneradorInformes()
+
+def _boton_descarga_word(futuro, central, mes_nombre, año):
+    if futuro.exception() is not None:
+        st.error(f"No se pudo generar el informe Word: {futuro.exception()}")
+        return
+    st.download_button(
+        "Descargar informe Word", data=futuro.result(),
+        file_name=f"Reporte {central} {mes_nombre} {año}.docx", mime=MIME_DOCX,
     )
-    fig.update_traces(hoverinfo="skip", hovertemplate=None)
-    fig['layout']['uirevision'] = True
-    return fig
-
-def tabla_estado_resultado_operativa(df):
-    palabras_operativas = [
-        "Transferencias de Energía", "Transferencias de Potencia", "Servicios de Administrativos",
-        "Peajes", "Costos por Energía", "Balance de Potencial", "Transferencia de Energía",
-        "Petroleo", "Bencina", "Pasajes", "Electricidad", "Agua", "Gas", "Telefono", "Computacion",
-        "Aseo", "Mantenimiento", "Revisión", "Depreciación", "Equipos Hidroelectrica", "Seguros",
-        "Rutinaria", "Vehiculos", "Oficina"
-    ]
-    summary_rubros = ["GANANCIA", "PERDIDA", "TOTAL GENERAL"]
-    desc_col = df.columns[0]
-    keep_rows_idx = []
-    for idx, row in df.iterrows():
-        rubro_desc = str(row[desc_col]).strip()
-        is_summary = any(s_rubro.lower() in rubro_desc.lower() for s_rubro in summary_rubros)
-        is_operative = any(p_key.lower() in rubro_desc.lower() for p_key in palabras_operativas)
-        is_heading_or_subtotal = rubro_desc.isupper() and not any(char.isdigit() for char in rubro_desc) and len(rubro_desc) > 3
-        if is_summary or is_operative or is_heading_or_subtotal:
-            keep_rows_idx.append(idx)
-    df_final = df.loc[keep_rows_idx].copy()
-    return df_final
+
+@st.fragment(run_every=2)
+def _esperar_informe_word(clave):
+    # Sondea solo este fragmento; al terminar se vuelve a ejecutar la página para mostrar el botón
+    futuro = generador_informes().obtener(clave)
+    if futuro is None or futuro.done():
+        st.rerun()
+    st.caption("Preparando informe Word…")
+
+def seccion_informe_word(clave, central, mes_nombre, año, *args, **kwargs):
+    # Se construye solo al pulsar el botón; el pedido anterior de la sesión con otra clave
+    # (otro mes, central o datos) se cancela si aún no empezó
+    generador = generador_informes()
+    anterior = st.session_state.get("informe_word")
+    if anterior is not None and anterior != clave:
+        generador.cancelar(anterior)
+        st.session_state["informe_word"] = None
+    futuro = generador.obtener(clave)
+    with st.sidebar:
+        if futuro is None:
+            if not st.button("Generar informe Word"):
+                return
+            futuro = generador.solicitar(clave, *args, **kwargs)
+            st.session_state["informe_word"] = clave
+        if futuro.done():
+            _boton_descarga_word(futuro, central, mes_nombre, año)
+        else:
+            _esperar_informe_word(clave)
+
+# === DIAGNÓSTICO ===
+def panel_diagnostico():
+    # Etapas de esta ejecución (perfil.etapa), también escritas en logs/perfil.jsonl
+    columnas = ["etapa", "ms", "cache", "filas", "mb"] + (["mem_mb"] if perfil.midiendo_memoria() else [])
+    df = pd.DataFrame(perfil.registros()).reindex(columns=["nivel", *columnas])
+    if df.empty:
+        return
+    df["etapa"] = ["\u2003" * n + e for n, e in zip(df["nivel"], df["etapa"])]
+    total = df.loc[df["nivel"] == 0, "ms"].sum()
+    with st.sidebar.expander(f"Diagnóstico: {total:,.0f} ms", expanded=True):
+        st.dataframe(
+            df[columnas],
+            hide_index=True, use_container_width=True,
+            column_config={
+                "mb": st.column_config.NumberColumn("MB", help="Tamaño en memoria de los datos que devuelve la etapa"),
+                "mem_mb": st.column_config.NumberColumn("Δ mem. MB", help="Memoria retenida al terminar la etapa (HEC_TRACEMALLOC=1)"),
+            },
+        )
+
+# === FLOTA ===
+def tabla_flota(año, mes):
+    # Aporte de cada central al mes y al acumulado del año (los KPIs de arriba son la suma)
+    filas = []
+    for pid, p in REGISTRO.items():
+        kpi = valores_kpi(cargar_cubo_kpi(pid, año), año, mes, AÑOS_PROMEDIO)
+        filas.append({
+            "Central": p["nombre"],
+            "Generación (MWh)": kpi["Generacion"]["mes"],
+            "Generación Acum. (MWh)": kpi["Generacion"]["acum"],
+            "Ventas ($)": kpi["Ventas"]["mes"],
+            "Ventas Acum. ($)": kpi["Ventas"]["acum"],
+            "Precipitaciones (mm)": kpi["Precipitacion"]["mes"],
+        })
+    # Las series son float32: se redondea para no mostrar el ruido de la conversión (1105.199951)
+    return pd.DataFrame(filas).round(1)
+
+# === LIBRO SUBIDO ===
+def selector_subida():
+    # Registra el libro subido (una vez por archivo) y lo deja seleccionado como central.
+    # Devuelve los ids de los libros subidos en esta sesión.
+    subidas = st.session_state.setdefault("subidas", [])
+    archivo = st.sidebar.file_uploader(
+        "Subir libro HEC", type="xlsx",
+        help="Libro con las hojas Pluviometria y Datos Historicos; si ya se subió antes se reutilizan sus datos",
+    )
+    if archivo is None:
+        return subidas
+    if st.session_state.get("archivo_subido") != archivo.file_id:
+        st.session_state["archivo_subido"] = archivo.file_id
+        try:
+            with st.spinner("Validando libro…"):
+                meta, nueva = registrar_subida(archivo, archivo.name)
+        except ValueError as e:
+            st.session_state["aviso_subida"] = ("error", str(e))
+        else:
+            if meta["id"] not in subidas:
+                subidas.append(meta["id"])
+            st.session_state["central"] = meta["id"]
+            st.session_state["aviso_subida"] = (
+                "success", f"Libro validado (año {meta['año']})." if nueva else "Libro ya procesado: se reutilizan sus datos.",
+            )
+    tipo, mensaje = st.session_state["aviso_subida"]
+    getattr(st.sidebar, tipo)(mensaje)
+    return subidas
 
 def main():
-    meses_labels = [
-        "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-        "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-    ]
-    meses_str_for_chart = ['Ene','Feb','Mar','Abr','May','Jun','Jul','Ago','Sep','Oct','Nov','Dic']
-
-    mostrar_titulo_con_logo(LOGO_PATH)
-    mes_idx = st.sidebar.selectbox("Selecciona el mes", list(enumerate(meses_labels)), index=5, format_func=lambda x: x[1])[0]
-    mes_nombre = meses_labels[mes_idx]
-    año_actual = 2025
+    perfil.iniciar()
+    iniciar_vigilante_datos()
+    subidas = selector_subida()
+    opciones = list(REGISTRO) + ([FLOTA] if len(REGISTRO) > 1 else []) + subidas
+    planta_id = st.sidebar.selectbox(
+        "Central", opciones, key="central",
+        format_func=lambda pid: "Flota (todas las centrales)" if pid == FLOTA else planta(pid)["nombre"],
+    )
+    es_flota = planta_id == FLOTA
+    central = "Flota" if es_flota else planta(planta_id)["nombre"]
+    mostrar_titulo_con_logo(titulo_planta(planta_id))
+    libros_por_planta = {pid: libros_planta(pid) for pid in ids_plantas(planta_id)}
+    años_disponibles = sorted(set().union(*libros_por_planta.values()))
+    if not años_disponibles:
+        st.error(f"No se encontraron libros 'HEC mensuales AAAA.xlsx' para {central}.")
+        return
+    año_actual = st.sidebar.selectbox("Selecciona el año", años_disponibles, index=len(años_disponibles) - 1)
+    mes_idx = st.sidebar.selectbox("Selecciona el mes", list(enumerate(MESES_LABELS)), index=5, format_func=lambda x: x[1])[0]
+    mes_nombre = MESES_LABELS[mes_idx]
     mes_num = mes_idx + 1
+    años_base = st.sidebar.selectbox(
+        "Años de referencia", VENTANAS, index=VENTANAS.index(AÑOS_PROMEDIO), format_func=lambda n: f"Promedio de {n} años",
+        help="Años previos del promedio y de la banda mínimo-máximo de las tendencias",
+    )
+    diagnostico = st.sidebar.toggle("Diagnóstico de rendimiento", help="Tiempos, caché, filas y memoria por etapa")
 
     st.header(f"Período: {mes_nombre} {año_actual}")
 
+    # Parseo de los libros nuevos o modificados: un proceso por central, en paralelo
+    preparar_flota([planta(pid) for pid in ids_plantas(planta_id)], range(año_actual - AÑOS_PROMEDIO, año_actual + 1))
+    df_pluv, df_hist = cargar_datos(planta_id, año_actual)
+
+    cubo = cargar_cubo_kpi(planta_id, año_actual)
+    base = cargar_base(planta_id, año_actual, años_base)
+    with etapa("kpis"):
+        kpi = valores_kpi(cubo, año_actual, mes_num, años_base, base=base)
+        tarjetas = tarjetas_kpi(kpi)
+
+    for clave, subtitulo in [("mensual", "KPIs Mensuales (solo mes seleccionado)"),
+                             ("acumulado", "KPIs Acumulados (enero a mes seleccionado)")]:
+        st.subheader(subtitulo)
+        for col, (titulo, valor, delta_anterior, delta_promedio) in zip(st.columns(3), tarjetas[clave]):
+            with col:
+                st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>{titulo}</b><br>{valor}</div>", unsafe_allow_html=True)
+                st.markdown(f"Δ vs {año_actual-1}: {delta_anterior}", unsafe_allow_html=True)
+                st.markdown(f"Δ vs Promedio {años_base}A: {delta_promedio}", unsafe_allow_html=True)
 
-    df_pluv, df_hist = cargar_datos(EXCEL_PATH)
-
-    # KPIs mensuales
-    gen25_mes = df_hist[(df_hist["Año"] == año_actual) & (df_hist["Mes"] == mes_num)]["Generacion"].sum()
-    gen24_mes = df_hist[(df_hist["Año"] == año_actual-1) & (df_hist["Mes"] == mes_num)]["Generacion"].sum()
-    genavg_mes = df_hist[(df_hist["Año"].between(año_actual-5, año_actual-1)) & (df_hist["Mes"] == mes_num)]["Generacion"].mean()
-    vent25_mes = df_hist[(df_hist["Año"] == año_actual) & (df_hist["Mes"] == mes_num)]["Ventas"].sum()
-    vent24_mes = df_hist[(df_hist["Año"] == año_actual-1) & (df_hist["Mes"] == mes_num)]["Ventas"].sum()
-    ventavg_mes = df_hist[(df_hist["Año"].between(año_actual-5, año_actual-1)) & (df_hist["Mes"] == mes_num)]["Ventas"].mean()
-    prec25_mes = df_pluv[(df_pluv["Año"] == año_actual) & (df_pluv["Mes"] == mes_num)]["Precipitacion"].sum()
-    prec24_mes = df_pluv[(df_pluv["Año"] == año_actual-1) & (df_pluv["Mes"] == mes_num)]["Precipitacion"].sum()
-    precavg_mes = df_pluv[(df_pluv["Año"].between(año_actual-5, año_actual-1)) & (df_pluv["Mes"] == mes_num)]["Precipitacion"].mean()
-
-    # KPIs acumulados
-    gen25_acum = df_hist[(df_hist["Año"] == año_actual) & (df_hist["Mes"] <= mes_num)]["Generacion"].sum()
-    gen24_acum = df_hist[(df_hist["Año"] == año_actual-1) & (df_hist["Mes"] <= mes_num)]["Generacion"].sum()
-    genavg_acum = df_hist[df_hist["Año"].between(año_actual-5, año_actual-1)].groupby("Año").apply(lambda x: x[x["Mes"] <= mes_num]["Generacion"].sum()).mean()
-    vent25_acum = df_hist[(df_hist["Año"] == año_actual) & (df_hist["Mes"] <= mes_num)]["Ventas"].sum()
-    vent24_acum = df_hist[(df_hist["Año"] == año_actual-1) & (df_hist["Mes"] <= mes_num)]["Ventas"].sum()
-    ventavg_acum = df_hist[df_hist["Año"].between(año_actual-5, año_actual-1)].groupby("Año").apply(lambda x: x[x["Mes"] <= mes_num]["Ventas"].sum()).mean()
-    prec25_acum = df_pluv[(df_pluv["Año"] == año_actual) & (df_pluv["Mes"] <= mes_num)]["Precipitacion"].sum()
-    prec24_acum = df_pluv[(df_pluv["Año"] == año_actual-1) & (df_pluv["Mes"] <= mes_num)]["Precipitacion"].sum()
-    precavg_acum = df_pluv[df_pluv["Año"].between(año_actual-5, año_actual-1)].groupby("Año").apply(lambda x: x[x["Mes"] <= mes_num]["Precipitacion"].sum()).mean()
-
-    st.subheader("KPIs Mensuales (solo mes seleccionado)")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Generación</b><br>{format_MWh(gen25_mes)}</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(gen25_mes, gen24_mes)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(gen25_mes, genavg_mes)}", unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Ventas</b><br>{format_currency(vent25_mes)}</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(vent25_mes, vent24_mes)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(vent25_mes, ventavg_mes)}", unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Precipitaciones</b><br>{prec25_mes:,.1f} mm</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(prec25_mes, prec24_mes)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(prec25_mes, precavg_mes)}", unsafe_allow_html=True)
-
-    st.subheader("KPIs Acumulados (enero a mes seleccionado)")
-    col4, col5, col6 = st.columns(3)
-    with col4:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Generación Acum.</b><br>{format_MWh(gen25_acum)}</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(gen25_acum, gen24_acum)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(gen25_acum, genavg_acum)}", unsafe_allow_html=True)
-    with col5:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Ventas Acum.</b><br>{format_currency(vent25_acum)}</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(vent25_acum, vent24_acum)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(vent25_acum, ventavg_acum)}", unsafe_allow_html=True)
-    with col6:
-        st.markdown(f"<div style='font-size:{KPI_FONT_SIZE}px;'><b>Precipitaciones Acum.</b><br>{prec25_acum:,.1f} mm</div>", unsafe_allow_html=True)
-        st.markdown(f"Δ vs {año_actual-1}: {calcular_delta(prec25_acum, prec24_acum)}", unsafe_allow_html=True)
-        st.markdown(f"Δ vs Promedio 5A: {calcular_delta(prec25_acum, precavg_acum)}", unsafe_allow_html=True)
+    if es_flota:
+        st.subheader("Aporte por Central")
+        st.caption("Generación y ventas se suman entre centrales; la precipitación es el promedio.")
+        with etapa("tabla flota"):
+            st.dataframe(tabla_flota(año_actual, mes_num), hide_index=True, use_container_width=True)
 
     # Gráfico de generación diaria
-    df_dia = cargar_generacion_diaria(GEN_PATH, año_actual, mes_num)
+    df_dia = cargar_generacion_diaria(planta_id, año_actual, mes_num)
     if not df_dia.empty:
-        st.plotly_chart(grafico_generacion_diaria(df_dia, mes_nombre, año_actual), use_container_width=True)
+        fig = figura_diaria(planta_id, año_actual, mes_num)
+        with etapa("render gráfico diario"):
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.info(f"No hay datos diarios disponibles para {mes_nombre}.")
 
+    seccion_intradia(planta_id, año_actual, mes_num)
+
     # Gráficos de tendencias
-    st.subheader("Tendencias Mensuales: Actual, Año Anterior y Promedio 5A")
-    st.plotly_chart(
-        grafico_lineas_tendencia(
-            df_hist, col_fecha="Fecha", col_valor="Generacion", año_actual=año_actual,
-            col_label="Generación (MWh)", meses_labels=meses_str_for_chart,
-            nombre="Generación Mensual",
-            color_actual=PALETTE[0], color_anterior=PALETTE[1], color_5a=PALETTE[2]
-        ), use_container_width=True
-    )
-    st.plotly_chart(
-        grafico_lineas_tendencia(
-            df_hist, col_fecha="Fecha", col_valor="Ventas", año_actual=año_actual,
-            col_label="Ventas ($)", meses_labels=meses_str_for_chart,
-            nombre="Ventas Mensuales",
-            color_actual=PALETTE[0], color_anterior=PALETTE[1], color_5a=PALETTE[2]
-        ), use_container_width=True
-    )
-    st.plotly_chart(
-        grafico_lineas_tendencia(
-            df_pluv, col_fecha="Fecha", col_valor="Precipitacion", año_actual=año_actual,
-            col_label="Precipitación (mm)", meses_labels=meses_str_for_chart,
-            nombre="Precipitaciones Mensuales",
-            color_actual=PALETTE[0], color_anterior=PALETTE[1], color_5a=PALETTE[2]
-        ), use_container_width=True
-    )
+    st.subheader(f"Tendencias Mensuales: Actual, Año Anterior y Promedio {años_base}A")
+    figuras = figuras_tendencia(planta_id, año_actual, años_base)
+    with etapa("render tendencias"):
+        for fig in figuras:
+            st.plotly_chart(fig, use_container_width=True)
 
     # Estado de Resultado Operativo
-    df_estado = cargar_estado_resultado(EXCEL_PATH)
+    # El Estado de Resultado es por central; la flota muestra el aporte por central
+    libro_estado = None if es_flota else libros_por_planta[planta_id].get(año_actual)
+    df_estado = cargar_estado_resultado(libro_estado) if libro_estado else pd.DataFrame()
     if not df_estado.empty:
-        st.subheader("Estado de Resultado Operativo Período 2025")
-        df_estado_op = tabla_estado_resultado_operativa(df_estado)
-        st.dataframe(df_estado_op, use_container_width=True)
+        st.subheader(f"Estado de Resultado Operativo Período {año_actual}")
+        with etapa("filtrado estado") as r:
+            df_estado_op = tabla_estado_resultado_operativa(df_estado)
+            r["filas"] = len(df_estado)
+        with etapa("render tabla estado"):
+            st.dataframe(df_estado_op, use_container_width=True)
     else:
-        st.info("No hay datos de Estado de Resultado para mostrar.")
+        df_estado_op = df_estado
+        if not es_flota:
+            st.info("No hay datos de Estado de Resultado para mostrar.")
+
+    # Libro Mayor: por central, como el Estado de Resultado
+    if not es_flota:
+        seccion_mayor(planta_id, año_actual, mes_num)
+
+    firma_datos = (firmas_series(planta_id, año_actual), firmas_generacion(planta_id), firmas_base(planta_id))
+    with etapa("informe word"):
+        seccion_informe_word(
+            (planta_id, año_actual, mes_num, años_base, firma_datos), central, mes_nombre, año_actual,
+            titulo_planta(planta_id), rotulo_central(planta_id), año_actual, mes_num, kpi, df_dia, df_hist, df_pluv, df_estado_op,
+            logo=imagen_optimizada("logo", 120) if existe("logo") else None, base=base, ventana=años_base,
+        )
 
     # Análisis textual
     st.subheader("Análisis de Partidas Operativas del Estado de Resultado")
@@ -307,6 +545,8 @@ def main():
 """)
 
     st.caption(f"Reporte generado el {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')} | Marcelo Arriagada © 2025")
+    if diagnostico:
+        panel_diagnostico()
 
 if __name__ == "__main__":
     main()
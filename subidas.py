@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from cache_datos import CACHE_DIR, CHUNK_HASH, recordar_huella
+from manifiesto import construir_manifiesto, guardar_manifiesto
+from particiones import PATRON_LIBRO
+from perfil import etapa
+from plantas import PLANTA_CANELO
+
+# === LIBROS SUBIDOS ===
+# Un libro subido desde el navegador se copia por bloques a data/.cache/subidas/ calculando
+# su sha256 en la misma pasada, se valida y queda como subidas/<hash>/HEC mensuales AAAA.xlsx.
+# Esa carpeta funciona como la de una central más (particiones y cachés Parquet), y como su
+# ruta depende solo del contenido, el mismo libro subido de nuevo (por cualquier usuario)
+# reutiliza lo ya validado y parseado sin volver a abrir el Excel.
+SUBIDAS_DIR = CACHE_DIR / "subidas"
+PREFIJO_ID = "subida-"
+HOJAS_REQUERIDAS = ("Pluviometria", "Datos Historicos")
+
+
+def _copiar_con_hash(archivo, destino_dir):
+    # archivo: objeto con read() (UploadedFile de Streamlit, archivo abierto); -> (tmp, sha256)
+    destino_dir.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(prefix=".subida-", suffix=".xlsx", dir=destino_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for bloque in iter(lambda: archivo.read(CHUNK_HASH), b""):
+                h.update(bloque)
+                f.write(bloque)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return Path(tmp), h.hexdigest()
+
+
+def validar_libro(path):
+    # Hojas de series con al menos una fecha en su rango (manifiesto.py: tabla de Excel o
+    # encabezado "Fecha"). Devuelve el manifiesto; ValueError con todos los problemas encontrados.
+    try:
+        manifiesto = construir_manifiesto(path)
+    except Exception as e:
+        raise ValueError(f"No es un libro Excel válido: {e}") from e
+    problemas = []
+    for hoja in HOJAS_REQUERIDAS:
+        rango = manifiesto["rangos"].get(hoja)
+        if rango is None:
+            problemas.append(f"falta la hoja '{hoja}'")
+        elif not rango["filas"]:
+            col = rango["columnas"].split(":")[0]
+            problemas.append(f"la hoja '{hoja}' no tiene fechas en {col}{rango['encabezado'] + 1} y siguientes")
+    if problemas:
+        raise ValueError("El libro no tiene la estructura esperada: " + "; ".join(problemas) + ".")
+    return manifiesto
+
+
+def _leer_meta(dir_subida):
+    meta_path = dir_subida / "subida.json"
+    if not meta_path.exists():
+        return None
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def registrar_subida(archivo, nombre):
+    # -> (meta, nueva). meta: {"id", "sha256", "año", "nombre", "libro"}; nueva es False
+    # si el mismo contenido ya estaba registrado (no se valida ni se parsea de nuevo)
+    with etapa("subida", libro=nombre) as r:
+        tmp, sha256 = _copiar_con_hash(archivo, SUBIDAS_DIR)
+        dir_subida = SUBIDAS_DIR / sha256[:20]
+        meta = _leer_meta(dir_subida)
+        if meta is not None:
+            tmp.unlink(missing_ok=True)
+            r["cache"] = "hit"
+            return meta, False
+        r["cache"] = "miss"
+        recordar_huella(tmp, sha256)
+        try:
+            manifiesto = validar_libro(tmp)
+        except ValueError:
+            tmp.unlink(missing_ok=True)
+            raise
+        # El año del nombre si sigue la convención "HEC mensuales AAAA.xlsx"; si no, el de los datos
+        m = PATRON_LIBRO.match(Path(nombre).name)
+        año = int(m.group(1)) if m else manifiesto["rangos"]["Datos Historicos"]["años"][1]
+        dir_subida.mkdir(exist_ok=True)
+        libro = dir_subida / f"HEC mensuales {año}.xlsx"
+        os.replace(tmp, libro)
+        recordar_huella(libro, sha256)
+        # El manifiesto de la validación sirve para el parseo: el contenido es el mismo
+        guardar_manifiesto(libro, {**manifiesto, "fuente": libro.name})
+        meta = {"id": PREFIJO_ID + sha256[:12], "sha256": sha256, "año": año, "nombre": Path(nombre).name, "libro": libro.name}
+        # subida.json se escribe al final: su presencia marca la subida como validada
+        fd, meta_tmp = tempfile.mkstemp(prefix=".subida-", suffix=".json", dir=dir_subida)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(meta_tmp, dir_subida / "subida.json")
+        return meta, True
+
+
+def es_subida(planta_id):
+    return str(planta_id).startswith(PREFIJO_ID)
+
+
+@lru_cache(maxsize=64)
+def planta_subida(planta_id):
+    # Entrada con la forma del registro de centrales (plantas.py) para un libro subido
+    dir_subida = next(SUBIDAS_DIR.glob(planta_id[len(PREFIJO_ID):] + "*"), None)
+    meta = _leer_meta(dir_subida) if dir_subida is not None else None
+    if meta is None:
+        raise KeyError(planta_id)
+    return {
+        **PLANTA_CANELO,
+        "id": meta["id"],
+        "nombre": f"Libro subido: {meta['nombre']}",
+        "titulo": f"Libro subido ({meta['nombre']})",
+        "datos": dir_subida,
+        # Sin exportación del medidor: el libro trae solo las series mensuales
+        "generacion": dir_subida / "sin exportacion.xlsx",
+    }
@@ -0,0 +1,77 @@
+import numpy as np
+
+# === SUBMUESTREO DE SERIES DE INTERVALOS ===
+# Funciones puras sobre arreglos (x: int64 ns desde epoch, ordenado; y: energía).
+# El navegador recibe a lo más `n` puntos de la ventana visible:
+#   minmax  mínimo y máximo de cada cubeta: conserva picos y caídas (detenciones)
+#   lttb    Largest-Triangle-Three-Buckets: conserva la forma visual de la curva
+HORA_NS = 3_600_000_000_000
+
+
+def ventana(x, y, inicio, fin):
+    # Tramo [inicio, fin] por búsqueda binaria; x puede ser un memmap (solo se lee el tramo)
+    i = int(np.searchsorted(x, inicio, side="left"))
+    j = int(np.searchsorted(x, fin, side="right"))
+    return np.asarray(x[i:j]), np.asarray(y[i:j])
+
+
+def agregar_horas(x, y):
+    # Suma de los intervalos de cada hora; cada marca es el fin del intervalo (0:15 ... 1:00 -> hora 0)
+    if len(x) == 0:
+        return x, y
+    horas = (x - 1) // HORA_NS * HORA_NS
+    inicio = np.flatnonzero(np.r_[True, horas[1:] != horas[:-1]])
+    return horas[inicio], np.add.reduceat(y, inicio)
+
+
+def minmax(x, y, n):
+    if len(x) <= n:
+        return x, y
+    cubetas = max(n // 2, 1)
+    cubeta = np.arange(len(x)) * cubetas // len(x)
+    orden = np.lexsort((y, cubeta))
+    cortes = np.flatnonzero(np.r_[True, cubeta[orden][1:] != cubeta[orden][:-1], True])
+    idx = np.unique(np.concatenate([orden[cortes[:-1]], orden[cortes[1:] - 1]]))
+    return x[idx], y[idx]
+
+
+def lttb(x, y, n):
+    largo = len(x)
+    if n >= largo or n < 3:
+        return x, y
+    xf = x.astype(np.float64)
+    yf = y.astype(np.float64)
+    bordes = np.linspace(1, largo - 1, n - 1).astype(np.int64)
+    idx = np.empty(n, dtype=np.int64)
+    idx[0], idx[-1] = 0, largo - 1
+    a = 0
+    for k in range(n - 2):
+        ini, fin = bordes[k], bordes[k + 1]
+        sig_fin = bordes[k + 2] if k + 2 < n - 1 else largo
+        px, py = xf[fin:sig_fin].mean(), yf[fin:sig_fin].mean()
+        area = np.abs((xf[a] - px) * (yf[ini:fin] - yf[a]) - (xf[a] - xf[ini:fin]) * (py - yf[a]))
+        a = ini + int(area.argmax())
+        idx[k + 1] = a
+    return x[idx], y[idx]
+
+
+METODOS = {"minmax": minmax, "lttb": lttb}
+
+
+def submuestrear(x, y, n, metodo="minmax"):
+    return METODOS[metodo](x, y, n)
+
+
+def sumar_series(series):
+    # Suma por marca de tiempo de varias series (x, y) ordenadas (vista de flota)
+    series = [(x, y) for x, y in series if len(x)]
+    if not series:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    if len(series) == 1:
+        return series[0]
+    x = np.concatenate([s[0] for s in series])
+    y = np.concatenate([s[1] for s in series]).astype(np.float64)
+    orden = np.argsort(x, kind="stable")
+    x, y = x[orden], y[orden]
+    inicio = np.flatnonzero(np.r_[True, x[1:] != x[:-1]])
+    return x[inicio], np.add.reduceat(y, inicio)
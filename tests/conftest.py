@@ -0,0 +1,34 @@
+import datetime as dt
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Caché y log fuera de data/ antes de importar los módulos del proyecto (leen las variables al importarse)
+os.environ["HEC_CACHE_DIR"] = tempfile.mkdtemp(prefix="hec-cache-")
+os.environ["HEC_PERFIL_LOG"] = ""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generar_libros  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def libros_sinteticos(tmp_path_factory):
+    # {año: ruta} de dos libros HEC con 8 años de historia, escritos por generar_libros.py
+    carpeta = tmp_path_factory.mktemp("libros")
+    rutas = generar_libros.generar(carpeta, años=8, hasta=2025, libros=2, años_intervalos=0, asientos_año=50)["El Canelo"]
+    return {int(p.stem[-4:]): p for p in rutas}
+
+
+@pytest.fixture
+def exportacion(tmp_path):
+    # Escribe una exportación del medidor de `dias` días desde el 1 de enero de 2025
+    def escribir(nombre, dias, semilla=0):
+        destino = tmp_path / nombre
+        return generar_libros.escribir_exportacion_medidor(
+            destino, np.random.default_rng(semilla), dt.date(2025, 1, 1), dt.date(2025, 1, dias),
+        )
+    return escribir
@@ -0,0 +1,74 @@
+import shutil
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from openpyxl.utils import range_boundaries
+
+from Crear_tabla_excel import crear_tablas
+from datos import leer_hec
+from manifiesto import TABLAS_EXCEL
+
+
+@pytest.fixture
+def libro(tmp_path, libros_sinteticos):
+    return shutil.copy(libros_sinteticos[max(libros_sinteticos)], tmp_path / "HEC mensuales 2025.xlsx")
+
+
+def _tablas(path):
+    # {nombre: (nombres de columna, texto de las celdas del encabezado)} leídos con openpyxl
+    wb = load_workbook(path)
+    tablas = {}
+    for ws in wb.worksheets:
+        for tabla in ws.tables.values():
+            min_col, fila, max_col, _ = range_boundaries(tabla.ref)
+            celdas = [ws.cell(fila, c).value for c in range(min_col, max_col + 1)]
+            tablas[tabla.name] = ([c.name for c in tabla.tableColumns], celdas)
+    return tablas
+
+
+def _comparar_frames(antes, despues):
+    assert antes.keys() == despues.keys()
+    for nombre in antes:
+        pd.testing.assert_frame_equal(antes[nombre], despues[nombre])
+
+
+def test_tablas_creadas_y_actualizadas_sin_cambiar_los_datos(libro):
+    sin_tablas = leer_hec(libro)
+    escritas, avisos = crear_tablas(libro)
+    assert not avisos
+    assert {(hoja, nombre, accion) for hoja, nombre, _, accion in escritas} == {(h, n, "creada") for h, n in TABLAS_EXCEL.items()}
+
+    tablas = _tablas(libro)
+    assert set(tablas) == set(TABLAS_EXCEL.values())
+    for columnas, celdas in tablas.values():
+        assert columnas == celdas
+    _comparar_frames(sin_tablas, leer_hec(libro))
+
+    # Segunda pasada: las tablas ya existen y solo se actualiza su rango
+    escritas, _ = crear_tablas(libro)
+    assert {accion for *_, accion in escritas} == {"actualizada"}
+    _comparar_frames(sin_tablas, leer_hec(libro))
+
+
+def test_nombres_de_columna_iguales_al_encabezado(libro):
+    wb = load_workbook(libro)
+    ws = wb["Datos Historicos"]
+    ws["C196"], ws["F196"], ws["G196"] = " Fecha ", 2024, "Ventas  "
+    wb.save(libro)
+    sin_tablas = leer_hec(libro)
+
+    crear_tablas(libro)
+    columnas, celdas = _tablas(libro)["DatosHistoricos"]
+    assert columnas == celdas == [" Fecha ", "Generacion", "Generacion Ref", "2024", "Ventas  "]
+    _comparar_frames(sin_tablas, leer_hec(libro))
+
+
+def test_encabezado_repetido_sin_distinguir_mayusculas(libro):
+    wb = load_workbook(libro)
+    wb["Datos Historicos"]["E196"] = "GENERACION"
+    wb.save(libro)
+
+    escritas, avisos = crear_tablas(libro)
+    assert "DatosHistoricos" not in {nombre for _, nombre, _, _ in escritas}
+    assert any("DatosHistoricos" in aviso for aviso in avisos)
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from datos import tablas_hec
+from estado_resultado import (
+    PALABRAS_OPERATIVAS, PALABRAS_RESUMEN, PATRON_FILAS, clasificar_filas_estado, tabla_estado_resultado_operativa,
+)
+
+DESCRIPCIONES = {
+    "INGRESOS DE EXPLOTACION": "encabezado",
+    "COSTOS DE EXPLOTACION": "encabezado",
+    "RESULTADO NO OPERACIONAL": "encabezado",
+    "GASTOS DE ADMINISTRACION": "operativa",  # "Gas" es palabra operativa, también en el filtro anterior
+    "Transferencias de Energía CEN": "operativa",
+    "Transferencias de Potencia": "operativa",
+    "   peajes troncales y zonales  ": "operativa",
+    "Consumo de Electricidad Oficina": "operativa",
+    "Agua potable": "operativa",
+    "Gas licuado (calefacción)": "operativa",
+    "Depreciación Equipos Hidroelectrica": "operativa",
+    "Mantenimiento Rutinaria Bocatoma": "operativa",
+    "Seguros de Vehiculos": "operativa",
+    "GANANCIA BRUTA": "resumen",
+    "Ganancia (Pérdida) del ejercicio": "resumen",
+    "PERDIDA ANTES DE IMPUESTO": "resumen",
+    "Total General": "resumen",
+    "TOTAL 2024": None,
+    "Honorarios auditoría": None,
+    "Intereses bancarios": None,
+    "IVA 19%": None,
+    "IVA": None,  # mayúsculas, pero de 3 letras o menos
+    "": None,
+}
+
+
+def _filas_antes(df):
+    # Filtro fila a fila que reemplazó el patrón compilado (streamlit_app.py antes del cambio)
+    desc_col = df.columns[0]
+    keep_rows_idx = []
+    for idx, row in df.iterrows():
+        rubro_desc = str(row[desc_col]).strip()
+        is_summary = any(s_rubro.lower() in rubro_desc.lower() for s_rubro in PALABRAS_RESUMEN)
+        is_operative = any(p_key.lower() in rubro_desc.lower() for p_key in PALABRAS_OPERATIVAS)
+        is_heading_or_subtotal = rubro_desc.isupper() and not any(char.isdigit() for char in rubro_desc) and len(rubro_desc) > 3
+        if is_summary or is_operative or is_heading_or_subtotal:
+            keep_rows_idx.append(idx)
+    return keep_rows_idx
+
+
+def _estado(descripciones):
+    return pd.DataFrame({"Descripción": list(descripciones), "Monto": range(len(descripciones))})
+
+
+def test_clasificacion_de_descripciones():
+    tipos = clasificar_filas_estado(_estado(DESCRIPCIONES))
+    assert [None if pd.isna(t) else t for t in tipos] == list(DESCRIPCIONES.values())
+
+
+@pytest.mark.parametrize("texto, grupo", [
+    ("Costos por Energía", "operativa"), ("balance de potencial", "operativa"), ("TOTAL GENERAL", "resumen"),
+    ("Pérdida", None), ("Gastos de oficina", "operativa"),
+])
+def test_patron_filas(texto, grupo):
+    m = PATRON_FILAS.match(texto).groupdict()
+    assert {g for g, v in m.items() if v is not None} == ({grupo} if grupo else set())
+
+
+def test_mismas_filas_que_el_filtro_anterior():
+    df = _estado(DESCRIPCIONES)
+    assert list(tabla_estado_resultado_operativa(df).index) == _filas_antes(df)
+
+
+def test_mismas_filas_en_los_libros(libros_sinteticos):
+    for path in libros_sinteticos.values():
+        df = tablas_hec(path, nombres=["estado"])["estado"]
+        df = df[df[df.columns[0]].notna()]
+        assert list(tabla_estado_resultado_operativa(df).index) == _filas_antes(df)
@@ -0,0 +1,74 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import ingesta_generacion
+from datos import COL_FECHA_GEN
+from ingesta_generacion import ingerir_generacion, leer_intervalos_store, leer_serie
+
+
+def _prefijo(origen, destino, dias):
+    # Copia de la exportación con solo sus primeros `dias` días (la misma exportación antes de crecer)
+    wb = load_workbook(origen)
+    ws = wb.worksheets[0]
+    encabezado = next(c.row for c in ws["A"] if c.value == COL_FECHA_GEN)
+    ws.delete_rows(encabezado + 1 + dias * 96, ws.max_row)
+    ws.append(["ID: prefijo"])
+    wb.save(destino)
+    return destino
+
+
+def _reconstruido(origen, tmp_path):
+    # Almacén construido desde cero con el mismo contenido, en otra ruta
+    ref = shutil.copy(origen, tmp_path / "referencia.xlsx")
+    return ref, ingerir_generacion(ref, reconstruir=True)
+
+
+def _comparar(path, ref, agregados, esperado):
+    for clave in ("diaria", "mensual"):
+        pd.testing.assert_frame_equal(agregados[clave], esperado[clave])
+    for a, b in zip(leer_serie(path), leer_serie(ref)):
+        np.testing.assert_array_equal(a, b)
+    pd.testing.assert_frame_equal(
+        leer_intervalos_store(path).sort_values("FechaHora", ignore_index=True),
+        leer_intervalos_store(ref).sort_values("FechaHora", ignore_index=True),
+    )
+
+
+def test_exportacion_que_crece_se_lee_incremental(tmp_path, exportacion):
+    completa = exportacion("completa.xlsx", 31)
+    path = tmp_path / "Generacion Central El Canelo.xlsx"
+    shutil.copy(_prefijo(completa, tmp_path / "prefijo.xlsx", 20), path)
+    ingerir_generacion(path)
+    shutil.copy(completa, path)
+    agregados = ingerir_generacion(path)
+
+    estado = ingesta_generacion._leer_estado(ingesta_generacion._dir_store(path))
+    assert estado["partes"] == 2  # se anexó una parte, no se reconstruyó
+    ref, esperado = _reconstruido(completa, tmp_path)
+    _comparar(path, ref, agregados, esperado)
+
+
+def test_exportacion_reemplazada_reconstruye_el_almacen(tmp_path, exportacion):
+    path = tmp_path / "Generacion Central El Canelo.xlsx"
+    shutil.copy(exportacion("larga.xlsx", 31, semilla=1), path)
+    ingerir_generacion(path)
+    # Exportación más corta y con otros valores: no debe quedar ningún día del almacén anterior
+    corta = exportacion("corta.xlsx", 11, semilla=2)
+    shutil.copy(corta, path)
+    agregados = ingerir_generacion(path)
+
+    ref, esperado = _reconstruido(corta, tmp_path)
+    assert len(agregados["diaria"]) == len(esperado["diaria"]) < 31
+    _comparar(path, ref, agregados, esperado)
+
+
+def test_reconstruir_forzado(tmp_path, exportacion):
+    path = shutil.copy(exportacion("completa.xlsx", 15), tmp_path / "Generacion Central El Canelo.xlsx")
+    previo = ingerir_generacion(path)
+    agregados = ingerir_generacion(path, reconstruir=True)
+
+    assert ingesta_generacion._leer_estado(ingesta_generacion._dir_store(path))["partes"] == 1
+    pd.testing.assert_frame_equal(agregados["diaria"], previo["diaria"])
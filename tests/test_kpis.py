@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from kpis import METRICAS, construir_cubo_kpi, valores_kpi
+from particiones import cargar_particiones
+
+AÑOS = range(2018, 2026)
+PERIODOS = [(2025, 1), (2025, 6), (2025, 12), (2024, 3)]
+
+
+@pytest.fixture(scope="module")
+def series(libros_sinteticos):
+    fuentes = {
+        "historicos": cargar_particiones(libros_sinteticos, AÑOS, "historicos"),
+        "pluviometria": cargar_particiones(libros_sinteticos, AÑOS, "pluviometria"),
+    }
+    # Totales por (año, mes) de cada métrica calculados directamente con pandas
+    totales = {m: fuentes[f].groupby(["Año", "Mes"])[m].sum().astype(float) for m, f in METRICAS.items()}
+    return fuentes, totales
+
+
+def _mes(t, año, mes):
+    return t.get((año, mes))
+
+
+def _acum(t, año, mes):
+    # Acumulado enero-mes; None si el año no tiene datos
+    del_año = t[t.index.get_level_values("Año") == año]
+    return None if del_año.empty else float(del_año[del_año.index.get_level_values("Mes") <= mes].sum())
+
+
+def _previos(fn, t, año, mes, n):
+    return [v for v in (fn(t, a, mes) for a in range(año - n, año)) if v is not None]
+
+
+@pytest.mark.parametrize("año,mes", PERIODOS)
+def test_cubo_igual_a_pandas(series, año, mes):
+    fuentes, totales = series
+    kpi = valores_kpi(construir_cubo_kpi(fuentes["historicos"], fuentes["pluviometria"]), año, mes, 5)
+    for metrica, t in totales.items():
+        esperado = {
+            "mes": _mes(t, año, mes) or 0.0,
+            "mes_anterior": _mes(t, año - 1, mes) or 0.0,
+            "mes_prom": np.mean(_previos(_mes, t, año, mes, 5)),
+            "acum": _acum(t, año, mes) or 0.0,
+            "acum_anterior": _acum(t, año - 1, mes) or 0.0,
+            "acum_prom": np.mean(_previos(_acum, t, año, mes, 5)),
+        }
+        for clave, valor in esperado.items():
+            assert kpi[metrica][clave] == pytest.approx(valor, rel=1e-9), (metrica, clave)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kpis import METRICAS, construir_cubo_kpi, valores_kpi
+from linea_base import actualizar_base, consultar_base
+from particiones import cargar_particiones
+
+AÑOS = range(2018, 2026)
+PERIODOS = [(2025, 1), (2025, 6), (2025, 12), (2024, 3)]
+
+
+@pytest.fixture(scope="module")
+def series(libros_sinteticos):
+    fuentes = {
+        "historicos": cargar_particiones(libros_sinteticos, AÑOS, "historicos"),
+        "pluviometria": cargar_particiones(libros_sinteticos, AÑOS, "pluviometria"),
+    }
+    # Totales por (año, mes) de cada métrica calculados directamente con pandas
+    totales = {m: fuentes[f].groupby(["Año", "Mes"])[m].sum().astype(float) for m, f in METRICAS.items()}
+    return fuentes, totales
+
+
+@pytest.fixture(scope="module")
+def base(libros_sinteticos):
+    return actualizar_base(libros_sinteticos, next(iter(libros_sinteticos.values())).parent)[1]
+
+
+def _mes(t, año, mes):
+    return t.get((año, mes))
+
+
+def _acum(t, año, mes):
+    # Acumulado enero-mes; None si el año no tiene datos
+    del_año = t[t.index.get_level_values("Año") == año]
+    return None if del_año.empty else float(del_año[del_año.index.get_level_values("Mes") <= mes].sum())
+
+
+def _previos(fn, t, año, mes, n):
+    return [v for v in (fn(t, a, mes) for a in range(año - n, año)) if v is not None]
+
+
+@pytest.mark.parametrize("ventana", [5, 10])
+def test_linea_base_igual_a_pandas(series, base, ventana):
+    _, totales = series
+    for año, mes in PERIODOS:
+        consulta = consultar_base(base, año, ventana)
+        for metrica, t in totales.items():
+            for tipo, fn in (("mes", _mes), ("acum", _acum)):
+                valores = _previos(fn, t, año, mes, ventana)
+                stats = consulta[metrica][tipo]
+                assert stats["n"][mes - 1] == len(valores)
+                assert stats["media"][mes - 1] == pytest.approx(np.mean(valores), rel=1e-9)
+                assert stats["minimo"][mes - 1] == pytest.approx(min(valores), rel=1e-9)
+                assert stats["maximo"][mes - 1] == pytest.approx(max(valores), rel=1e-9)
+                assert stats["p50"][mes - 1] == pytest.approx(np.percentile(valores, 50), rel=1e-9)
+
+
+def test_kpis_con_linea_base_iguales_al_cubo(series, base):
+    fuentes, _ = series
+    cubo = construir_cubo_kpi(fuentes["historicos"], fuentes["pluviometria"])
+    for año, mes in PERIODOS:
+        con_base = valores_kpi(cubo, año, mes, 5, base=consultar_base(base, año, 5))
+        sin_base = valores_kpi(cubo, año, mes, 5)
+        for metrica in METRICAS:
+            assert pd.Series(con_base[metrica]).to_numpy() == pytest.approx(pd.Series(sin_base[metrica]).to_numpy(), rel=1e-9)
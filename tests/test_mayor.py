@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mayor import cargar_mayor, construir_mayor, lineas_cuenta, serie_mensual, top_cuentas
+
+AÑO = 2025
+
+
+@pytest.fixture(scope="module")
+def mayor(libros_sinteticos):
+    lineas = cargar_mayor(libros_sinteticos, (AÑO - 1, AÑO))
+    assert not lineas.empty and set(lineas["Año"]) == {AÑO - 1, AÑO}
+    # Neto por (cuenta, año, mes) calculado directamente con pandas
+    tabla = lineas.assign(Cuenta=lineas["Cuenta"].astype(str), Neto=lineas["Debe"] - lineas["Haber"])
+    neto = tabla.groupby(["Cuenta", "Año", "Mes"])[["Debe", "Haber", "Neto"]].sum()
+    return construir_mayor(lineas), tabla, neto
+
+
+def test_serie_mensual_igual_a_pandas(mayor):
+    motor, tabla, neto = mayor
+    for i in range(len(motor["cuentas"])):
+        cuenta = motor["cuentas"][i]
+        serie = serie_mensual(motor, [i], AÑO)
+        del_año = neto.loc[cuenta].reindex(pd.MultiIndex.from_product([[AÑO], range(1, 13)]), fill_value=0.0)
+        assert np.allclose(serie["Neto"], del_año["Neto"])
+        assert np.allclose(serie["Debe"], del_año["Debe"])
+        asientos = tabla[(tabla["Cuenta"] == cuenta) & (tabla["Año"] == AÑO)].groupby("Mes").size()
+        assert serie["Asientos"].tolist() == asientos.reindex(range(1, 13), fill_value=0).tolist()
+
+
+def test_serie_de_varias_cuentas_suma(mayor):
+    motor, _, _ = mayor
+    a, b = serie_mensual(motor, [0], AÑO), serie_mensual(motor, [1], AÑO)
+    assert np.allclose(serie_mensual(motor, [0, 1], AÑO)["Neto"], a["Neto"] + b["Neto"])
+
+
+@pytest.mark.parametrize("mes", [1, 6, 12])
+def test_top_cuentas_igual_a_pandas(mayor, mes):
+    motor, _, neto = mayor
+    hasta_mes = neto[neto.index.get_level_values("Mes") <= mes]["Neto"]
+    acum = hasta_mes.groupby(["Cuenta", "Año"]).sum().unstack("Año", fill_value=0.0)
+    acum = acum.reindex(columns=[AÑO - 1, AÑO], fill_value=0.0)
+    top = top_cuentas(motor, AÑO, mes, n=5)
+    esperado = acum[AÑO].abs().sort_values(ascending=False, kind="stable")
+    assert np.allclose(np.abs(top[f"Acum. {AÑO}"]), esperado.iloc[:5].to_numpy())
+    for _, fila in top.iterrows():
+        assert fila[f"Acum. {AÑO}"] == pytest.approx(acum.loc[fila["Cuenta"], AÑO])
+        assert fila[f"Acum. {AÑO - 1}"] == pytest.approx(acum.loc[fila["Cuenta"], AÑO - 1])
+        assert fila["Δ"] == pytest.approx(acum.loc[fila["Cuenta"], AÑO] - acum.loc[fila["Cuenta"], AÑO - 1])
+
+
+def test_lineas_cuenta(mayor):
+    motor, tabla, _ = mayor
+    for i in range(len(motor["cuentas"])):
+        for mes in (3, None):
+            lineas = lineas_cuenta(motor, i, AÑO, mes)
+            sel = (tabla["Cuenta"] == motor["cuentas"][i]) & (tabla["Año"] == AÑO)
+            if mes is not None:
+                sel &= tabla["Mes"] == mes
+            assert len(lineas) == sel.sum()
+            assert lineas["Debe"].sum() == pytest.approx(tabla.loc[sel, "Debe"].sum())
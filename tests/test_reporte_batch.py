@@ -0,0 +1,16 @@
+import argparse
+
+import pytest
+
+from reporte_batch import _parsear_periodo
+
+
+def test_periodo_valido():
+    assert _parsear_periodo("2025-06") == (2025, 6)
+    assert _parsear_periodo("2024-12") == (2024, 12)
+
+
+@pytest.mark.parametrize("texto", ["2025-13", "2025-00", "2025", "2025-xx", "2025-06-01"])
+def test_periodo_invalido(texto):
+    with pytest.raises(argparse.ArgumentTypeError):
+        _parsear_periodo(texto)
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+import subidas
+from subidas import PREFIJO_ID, planta_subida, registrar_subida, validar_libro
+
+
+@pytest.fixture(autouse=True)
+def dir_subidas(tmp_path, monkeypatch):
+    monkeypatch.setattr(subidas, "SUBIDAS_DIR", tmp_path / "subidas")
+    planta_subida.cache_clear()
+    yield tmp_path / "subidas"
+    planta_subida.cache_clear()
+
+
+@pytest.fixture
+def libro(libros_sinteticos):
+    año, path = max(libros_sinteticos.items())
+    return año, path.read_bytes()
+
+
+class _Cortada(io.BytesIO):
+    # Subida que se interrumpe después del primer bloque
+    def read(self, n=-1):
+        if self.tell():
+            raise ConnectionError("subida interrumpida")
+        return super().read(n)
+
+
+def _archivos(carpeta):
+    return sorted(p.relative_to(carpeta).as_posix() for p in carpeta.rglob("*") if p.is_file()) if carpeta.exists() else []
+
+
+def test_libro_valido(libro, tmp_path):
+    _, contenido = libro
+    path = tmp_path / "libro.xlsx"
+    path.write_bytes(contenido)
+    manifiesto = validar_libro(path)
+    assert manifiesto["rangos"]["Datos Historicos"]["filas"] > 0
+
+
+def test_rechaza_archivo_que_no_es_excel(tmp_path):
+    path = tmp_path / "notas.xlsx"
+    path.write_bytes(b"no es un zip")
+    with pytest.raises(ValueError, match="No es un libro Excel válido"):
+        validar_libro(path)
+
+
+def test_rechaza_libro_sin_las_hojas(tmp_path, dir_subidas):
+    wb = Workbook()
+    wb.active.title = "Pluviometria"
+    wb.create_sheet("Otra")
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    with pytest.raises(ValueError, match="falta la hoja 'Datos Historicos'") as e:
+        registrar_subida(buffer, "HEC mensuales 2025.xlsx")
+    assert "'Pluviometria' no tiene fechas" in str(e.value)
+    assert _archivos(dir_subidas) == []
+
+
+def test_mismo_contenido_se_registra_una_vez(libro, dir_subidas):
+    año, contenido = libro
+    meta, nueva = registrar_subida(io.BytesIO(contenido), f"HEC mensuales {año}.xlsx")
+    assert nueva and meta["año"] == año and meta["id"].startswith(PREFIJO_ID)
+    otra, nueva = registrar_subida(io.BytesIO(contenido), "copia con otro nombre.xlsx")
+    assert not nueva and otra == meta
+    # Una sola carpeta con el libro y su meta, sin temporales de la segunda copia
+    assert _archivos(dir_subidas) == sorted(f"{meta['sha256'][:20]}/{n}" for n in ("subida.json", meta["libro"]))
+    assert planta_subida(meta["id"])["datos"] == dir_subidas / meta["sha256"][:20]
+
+
+def test_subida_interrumpida_no_queda_visible(libro, dir_subidas):
+    año, contenido = libro
+    with pytest.raises(ConnectionError):
+        registrar_subida(_Cortada(contenido), f"HEC mensuales {año}.xlsx")
+    assert _archivos(dir_subidas) == []
+
+
+def test_subida_sin_meta_no_queda_visible(libro, dir_subidas):
+    # Un corte entre mover el libro y escribir subida.json: la subida no existe y se rehace
+    año, contenido = libro
+    meta, _ = registrar_subida(io.BytesIO(contenido), f"HEC mensuales {año}.xlsx")
+    (dir_subidas / meta["sha256"][:20] / "subida.json").unlink()
+    planta_subida.cache_clear()
+    with pytest.raises(KeyError):
+        planta_subida(meta["id"])
+    otra, nueva = registrar_subida(io.BytesIO(contenido), f"HEC mensuales {año}.xlsx")
+    assert nueva and otra == meta
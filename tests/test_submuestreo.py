@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submuestreo import HORA_NS, agregar_horas, lttb, minmax, sumar_series, ventana
+
+QUINCE_MIN_NS = HORA_NS // 4
+
+
+@pytest.fixture
+def serie():
+    # Un mes de intervalos de 15 minutos con una detención (ceros) y un pico
+    rng = np.random.default_rng(0)
+    inicio = pd.Timestamp("2025-06-01 00:15").value
+    x = inicio + np.arange(30 * 96, dtype=np.int64) * QUINCE_MIN_NS
+    y = 400 + 50 * np.sin(np.arange(len(x)) / 96 * 2 * np.pi) + rng.normal(0, 10, len(x))
+    y[1000:1040] = 0.0
+    y[2000] = 900.0
+    return x, y
+
+
+@pytest.mark.parametrize("n", [3, 10, 500, 2879])
+def test_lttb_conserva_extremos_y_largo(serie, n):
+    x, y = serie
+    xs, ys = lttb(x, y, n)
+    assert len(xs) == n
+    assert (xs[0], xs[-1]) == (x[0], x[-1])
+    assert np.all(np.diff(xs) > 0)
+    assert np.isin(xs, x).all()
+
+
+@pytest.mark.parametrize("n", [2, 10, 500])
+def test_minmax_conserva_minimo_y_maximo(serie, n):
+    x, y = serie
+    xs, ys = minmax(x, y, n)
+    assert len(xs) <= n
+    assert ys.min() == y.min() and ys.max() == y.max()
+    assert np.all(np.diff(xs) > 0)
+    # Cada punto es un punto original
+    assert np.array_equal(ys, y[np.searchsorted(x, xs)])
+
+
+def test_minmax_conserva_los_extremos_de_cada_cubeta(serie):
+    x, y = serie
+    n = 60
+    xs, ys = minmax(x, y, n)
+    cubeta = np.arange(len(x)) * (n // 2) // len(x)
+    por_cubeta = pd.Series(y).groupby(cubeta).agg(["min", "max"])
+    assert set(por_cubeta["min"]) | set(por_cubeta["max"]) == set(ys)
+
+
+@pytest.mark.parametrize("metodo", [lttb, minmax])
+def test_series_cortas_sin_cambios(serie, metodo):
+    x, y = serie
+    xs, ys = metodo(x[:50], y[:50], 100)
+    assert np.array_equal(xs, x[:50]) and np.array_equal(ys, y[:50])
+
+
+def test_agregar_horas_conserva_la_suma(serie):
+    x, y = serie
+    horas, suma = agregar_horas(x, y)
+    assert len(horas) == len(x) // 4
+    assert suma.sum() == pytest.approx(y.sum(), rel=1e-12)
+    # Mismo resultado que agrupar por la hora de inicio de cada intervalo (la marca es su fin)
+    esperado = pd.Series(y).groupby(pd.to_datetime(x - 1).floor("h")).sum()
+    assert np.allclose(suma, esperado.to_numpy())
+    assert np.array_equal(horas, esperado.index.as_unit("ns").asi8)
+
+
+def test_ventana_y_suma_de_series(serie):
+    x, y = serie
+    xv, yv = ventana(x, y, x[10], x[19])
+    assert np.array_equal(xv, x[10:20])
+    xs, ys = sumar_series([(x, y), (x[::2], y[::2])])
+    assert np.array_equal(xs, x)
+    assert ys.sum() == pytest.approx(y.sum() + y[::2].sum(), rel=1e-12)
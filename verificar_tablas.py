@@ -1,19 +1,56 @@
-from openpyxl import load_workbook
-
-archivo = "HEC mensuales 2025.xlsx"  # Asegúrate de que esté en la misma carpeta
-
-wb = load_workbook(archivo, data_only=True)
-
-print("🔍 Revisando tablas en el archivo...\n")
-for hoja in wb.sheetnames:
-    ws = wb[hoja]
-    tablas = ws._tables
-    if tablas:
-        print(f"📄 Hoja '{hoja}' contiene las siguientes tablas:")
-        for t in tablas:
-            if hasattr(t, "name") and hasattr(t, "ref"):
-                print(f"   🔹 {t.name} (rango: {t.ref})")
-            else:
-                print(f"   🔹 Tabla mal definida (probablemente solo el nombre): {t}")
-    else:
-        print(f"📄 Hoja '{hoja}' no contiene tablas.")
+import argparse
+from pathlib import Path
+
+from manifiesto import construir_manifiesto, guardar_manifiesto, leer_manifiesto, ruta_manifiesto
+from plantas import libros_registrados
+
+# === ÍNDICE DE LIBROS HEC ===
+# Escribe el manifiesto de cada libro (hojas, tablas de Excel, rangos usados, fila del
+# encabezado, filas y años de cada hoja de datos, huella del archivo) que usan los lectores
+# de datos.py para ir directo al rango de datos. Un libro ya indexado con el mismo contenido
+# no se vuelve a abrir salvo con --forzar.
+# Uso:
+#   python verificar_tablas.py                      (todos los libros de las centrales registradas)
+#   python verificar_tablas.py "data/HEC mensuales 2025.xlsx" --forzar
+
+
+def imprimir_manifiesto(manifiesto):
+    for hoja, info in manifiesto["hojas"].items():
+        print(f"📄 Hoja '{hoja}' (rango usado {info['dimension'] or 'sin dimensión'})")
+        if not info["tablas"]:
+            print("   Sin tablas.")
+        for nombre, tabla in info["tablas"].items():
+            print(f"   🔹 {nombre} (rango: {tabla['ref']})")
+        rango = manifiesto["rangos"].get(hoja)
+        if rango:
+            años = f", años {rango['años'][0]}-{rango['años'][1]}" if rango["años"] else ""
+            print(f"   Datos: {rango['columnas']} desde la fila {rango['encabezado']} hasta la {rango['fin'] or 'última'}"
+                  f" ({rango['origen']}, {rango['filas']} filas{años})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexa los libros HEC en un manifiesto JSON por libro")
+    parser.add_argument("libros", nargs="*", type=Path, help="Libros a indexar (por defecto, los de todas las centrales)")
+    parser.add_argument("--forzar", action="store_true", help="Reconstruye el manifiesto aunque esté vigente")
+    args = parser.parse_args()
+
+    libros = args.libros or libros_registrados()
+    if not libros:
+        parser.error("No se encontraron libros 'HEC mensuales AAAA.xlsx'")
+    for path in libros:
+        if not path.exists():
+            parser.error(f"No se encontró el archivo: {path}")
+
+    for path in libros:
+        manifiesto = None if args.forzar else leer_manifiesto(path)
+        estado = "vigente"
+        if manifiesto is None:
+            manifiesto = construir_manifiesto(path)
+            guardar_manifiesto(path, manifiesto)
+            estado = "indexado"
+        print(f"\n🔍 {path} ({estado}) → {ruta_manifiesto(path)}")
+        imprimir_manifiesto(manifiesto)
+
+
+if __name__ == "__main__":
+    main()